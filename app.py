@@ -8,7 +8,6 @@ import sys
 import os
 import subprocess
 import time
-import sqlite3
 from pathlib import Path
 
 
@@ -77,9 +76,10 @@ def install():
         print("")
         print("📊 Quota Usage Info:")
         print("   • YouTube API has a default quota of 10,000 units/day")
-        print("   • Each search uses ~108 quota units (search + video details)")
-        print("   • Initial app startup uses ~315 units (3 searches)")
-        print("   • 'python app.py search' uses ~324 units (3 searches)")
+        print("   • Each search uses ~101 quota units (search + video details)")
+        print("   • Initial app startup uses ~303 units (3 searches)")
+        print("   • 'python app.py search' uses ~303 units (3 searches)")
+        print("   • Spending is tracked per day; cap it with YOUTUBE_QUOTA_CEILING")
         print("")
 
     print("✅ Installation complete!")
@@ -96,11 +96,10 @@ def check_has_videos():
         return False
 
     try:
-        conn = sqlite3.connect("video_inspiration.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM videos")
-        count = cursor.fetchone()[0]
-        conn.close()
+        from backend.database.connection import get_connection
+
+        conn = get_connection("video_inspiration.db")
+        count = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
         return count > 0
     except:
         return False
@@ -163,18 +162,15 @@ def run_web(port=8000, debug=False, auto_open=True):
 def _load_initial_videos():
     """Load initial videos when starting the web app for the first time"""
     import os
-    from dotenv import load_dotenv
     from backend.database.manager import setup_database_tables
-    from backend.database.video_operations import (
-        save_videos_to_database,
-        save_video_features_to_database,
-    )
     from backend.services.youtube_service import YouTubeService
-    from backend.ml.feature_extraction import extract_all_features_from_video
+    from backend.services.youtube_cache import YouTubeResponseCache
+    from backend.services.quota_ledger import QuotaLedger
+    from backend.services.ingest_service import ingest_videos
+    from backend.ml.model_store import DEFAULT_MODEL_DIR
+    from backend.services.scoring_service import score_new_videos_with_saved_model
     from backend.config.search_config import get_search_queries
 
-    load_dotenv()
-
     api_key = os.getenv("YOUTUBE_API_KEY")
     if not api_key:
         raise Exception("YOUTUBE_API_KEY not found in environment variables")
@@ -182,7 +178,10 @@ def _load_initial_videos():
     db_path = "video_inspiration.db"
     setup_database_tables(db_path)
 
-    youtube_service = YouTubeService(api_key)
+    ledger = QuotaLedger(db_path)
+    youtube_service = YouTubeService(
+        api_key, cache=YouTubeResponseCache(), ledger=ledger
+    )
     all_queries = get_search_queries()
 
     # Use first 3 queries for initial load to save quota
@@ -190,46 +189,51 @@ def _load_initial_videos():
     print(f"      Searching {len(initial_queries)} topics...")
 
     all_videos = []
-    for query in initial_queries:
-        try:
-            videos = youtube_service.search_and_get_details(
-                query, 5
-            )  # Only 5 videos per query to save quota
-            all_videos.extend(videos)
-            print(
-                f"      Found {len(videos)} videos for '{query}' (quota used: ~105 units)"
-            )
-        except Exception as e:
-            print(f"      Warning: Could not search '{query}': {e}")
+    spent_before = ledger.spent()
+    # Only 5 videos per query to save quota; queries run concurrently
+    results = youtube_service.search_many(initial_queries, 5)
+    for query, videos in zip(initial_queries, results):
+        all_videos.extend(videos)
+        print(f"      Found {len(videos)} videos for '{query}'")
+    print(
+        f"      Quota used: {ledger.spent() - spent_before} units "
+        f"({ledger.remaining()} left today)"
+    )
 
     unique_videos = YouTubeService.remove_duplicate_videos(all_videos)
     print(f"      Total unique videos: {len(unique_videos)}")
 
     if unique_videos:
-        save_videos_to_database(unique_videos, db_path)
-        for video in unique_videos:
-            features = extract_all_features_from_video(video)
-            save_video_features_to_database(video["id"], features, db_path)
+        ingest_videos(unique_videos, db_path)
+        score_new_videos_with_saved_model(
+            [video["id"] for video in unique_videos], db_path, DEFAULT_MODEL_DIR
+        )
         print(f"      Saved {len(unique_videos)} videos to database")
     else:
         raise Exception("No videos were found (likely due to API quota limits)")
 
 
-def run_search():
+def run_search(
+    batch_size=None, concurrency=None, use_cache=True, per_query=8, refresh_known=False
+):
     """Search for videos and add them to the database"""
     import os
-    from dotenv import load_dotenv
     from backend.database.manager import setup_database_tables
-    from backend.database.video_operations import (
-        save_videos_to_database,
-        save_video_features_to_database,
-    )
     from backend.services.youtube_service import YouTubeService
-    from backend.ml.feature_extraction import extract_all_features_from_video
+    from backend.services.youtube_cache import YouTubeResponseCache
+    from backend.services.known_videos import get_known_video_index
+    from backend.services.feature_store_service import get_feature_store
+    from backend.services.quota_ledger import QuotaLedger, QUOTA_COSTS
+    from backend.services.ingest_service import (
+        ingest_video_stream,
+        DEFAULT_INGEST_BATCH_SIZE,
+    )
+    from backend.ml.model_store import DEFAULT_MODEL_DIR
+    from backend.services.scoring_service import score_new_videos_with_saved_model
     from backend.config.search_config import get_search_queries
     import random
 
-    load_dotenv()
+    batch_size = batch_size or DEFAULT_INGEST_BATCH_SIZE
 
     api_key = os.getenv("YOUTUBE_API_KEY")
     if not api_key:
@@ -240,8 +244,19 @@ def run_search():
 
     db_path = "video_inspiration.db"
     setup_database_tables(db_path)
-
-    youtube_service = YouTubeService(api_key)
+    # Open the shared feature store so new rows are written through to it
+    get_feature_store(db_path)
+
+    ledger = QuotaLedger(db_path)
+    service_options = {"ledger": ledger}
+    if concurrency:
+        service_options["max_concurrency"] = concurrency
+    if use_cache:
+        service_options["cache"] = YouTubeResponseCache()
+    if not refresh_known:
+        # Only fetch details for videos we don't have yet
+        service_options["known_videos"] = get_known_video_index(db_path)
+    youtube_service = YouTubeService(api_key, **service_options)
     all_queries = get_search_queries()
 
     # Use different queries for search vs initial load
@@ -252,43 +267,227 @@ def run_search():
         random.shuffle(search_queries)
         search_queries = search_queries[:3]  # Limit to 3 queries
 
-    print(f"🔍 Searching {len(search_queries)} topics for videos...")
-    print(f"   Estimated quota usage: ~{len(search_queries) * 110} units")
+    # Plan the harvest against today's remaining budget instead of failing partway
+    pages_per_query = -(-per_query // 50)
+    cost_per_query = pages_per_query * (QUOTA_COSTS["search"] + QUOTA_COSTS["videos"])
+    affordable = ledger.remaining() // cost_per_query
+    if affordable < len(search_queries):
+        print(
+            f"⚠️  Only {ledger.remaining()} quota units left today "
+            f"(ceiling {ledger.ceiling}); limiting to {affordable} queries"
+        )
+        search_queries = search_queries[:affordable]
+    if not search_queries:
+        print(f"❌ Quota budget exhausted. It resets at {ledger.next_reset():%H:%M %Z}.")
+        return
+
+    print(
+        f"🔍 Searching {len(search_queries)} topics for videos "
+        f"({youtube_service.max_concurrency} at a time)..."
+    )
+    print(f"   Quota budget: up to {len(search_queries) * cost_per_query} units")
 
-    all_videos = []
     for i, query in enumerate(search_queries, 1):
-        print(f"  [{i}/{len(search_queries)}] Searching: {query}")
-        try:
-            videos = youtube_service.search_and_get_details(
-                query, 8
-            )  # Reduced from 10 to 8
-            all_videos.extend(videos)
-            print(f"      Found {len(videos)} videos (quota used: ~108 units)")
-        except Exception as e:
-            print(f"      Error searching '{query}': {e}")
+        print(f"  [{i}/{len(search_queries)}] {query}")
+
+    def save_progress(batch_ids):
+        scored = score_new_videos_with_saved_model(batch_ids, db_path, DEFAULT_MODEL_DIR)
+        print(f"💾 Saved {len(batch_ids)} videos and their ML features ({scored} scored)")
+
+    # Pages stream in from all queries at once and are saved while later pages are in flight
+    spent_before = ledger.spent()
+    counts = ingest_video_stream(
+        youtube_service.stream_search_many(search_queries, per_query),
+        db_path,
+        batch_size,
+        on_batch=save_progress,
+    )
+    quota_used = ledger.spent() - spent_before
 
-    unique_videos = YouTubeService.remove_duplicate_videos(all_videos)
+    if youtube_service.cache is not None:
+        stats = youtube_service.cache.stats()
+        print(
+            f"   Cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"(cache hits cost no quota)"
+        )
 
-    if unique_videos:
-        print(f"💾 Saving {len(unique_videos)} unique videos to database...")
-        save_videos_to_database(unique_videos, db_path)
-
-        print("🧠 Extracting features for ML recommendations...")
-        for i, video in enumerate(unique_videos, 1):
-            if i % 10 == 0:  # Show progress every 10 videos
-                print(f"      Processing features: {i}/{len(unique_videos)}")
-            features = extract_all_features_from_video(video)
-            save_video_features_to_database(video["id"], features, db_path)
-
-        estimated_quota_used = len(search_queries) * 108
-        print(f"✅ Successfully added {len(unique_videos)} videos to the database!")
-        print(f"   Estimated quota used: ~{estimated_quota_used} units")
+    unique_count = len(counts["video_ids"])
+    if unique_count:
+        print(f"      {counts['inserted']} new, {counts['updated']} updated")
+        print(f"✅ Successfully added {unique_count} videos to the database!")
+        print(f"   Quota used: {quota_used} units ({ledger.remaining()} left today)")
     else:
         print("❌ No new videos found.")
-        print("   This might be due to YouTube API quota limits or network issues.")
+        print("   Every result may already be in the database (see --refresh-known),")
+        print("   or this might be due to YouTube API quota limits or network issues.")
         print("   API quotas reset daily. Try again later.")
 
 
+def run_refresh_stats(max_videos=None):
+    """Refresh view, like and comment counts for stored videos, oldest first"""
+    import os
+    from backend.database.manager import setup_database_tables
+    from backend.services.youtube_service import YouTubeService
+    from backend.services.quota_ledger import QuotaLedger
+    from backend.services.stats_refresh_service import refresh_video_statistics
+    from backend.services.feature_store_service import get_feature_store
+    from backend.ml.model_store import DEFAULT_MODEL_DIR
+
+    api_key = os.getenv("YOUTUBE_API_KEY")
+    if not api_key:
+        print("❌ Error: YOUTUBE_API_KEY not found in environment variables")
+        return
+
+    db_path = "video_inspiration.db"
+    setup_database_tables(db_path)
+    get_feature_store(db_path)
+
+    # No response cache: the point is to see counts as they are now
+    ledger = QuotaLedger(db_path)
+    youtube_service = YouTubeService(api_key, ledger=ledger)
+
+    print("📈 Refreshing video statistics (50 videos per quota unit)...")
+    spent_before = ledger.spent()
+    result = refresh_video_statistics(
+        youtube_service, ledger, db_path, max_videos, DEFAULT_MODEL_DIR
+    )
+    quota_used = ledger.spent() - spent_before
+
+    if result["resumed"]:
+        print("   Resumed the previous unfinished run")
+    print(
+        f"✅ Refreshed {result['refreshed']} videos "
+        f"({result['missing']} no longer available, {result['scored']} rescored)"
+    )
+    print(f"   Quota used: {quota_used} units ({ledger.remaining()} left today)")
+
+    if result["complete"]:
+        print("   Every stored video is up to date")
+    elif result["stopped_reason"] == "quota":
+        print(
+            f"⚠️  Quota budget reached; run again after "
+            f"{ledger.next_reset():%H:%M %Z} to continue where this left off"
+        )
+    else:
+        print("   Run again to continue where this left off")
+
+
+def run_fake_api(port=None, catalog_size=None, latency_ms=0.0, error_rate=0.0,
+                 quota_limit=None):
+    """Serve the offline YouTube API stand-in until interrupted"""
+    from backend.devtools.fake_youtube_api import (
+        DEFAULT_CATALOG_SIZE,
+        DEFAULT_PORT,
+        create_fake_youtube_server,
+    )
+
+    server, base_url = create_fake_youtube_server(
+        port=port or DEFAULT_PORT,
+        catalog_size=catalog_size or DEFAULT_CATALOG_SIZE,
+        latency_ms=latency_ms,
+        error_rate=error_rate,
+        quota_limit=quota_limit,
+    )
+    print("🧪 Fake YouTube API")
+    print("===================")
+    print(f"📡 Serving {catalog_size or DEFAULT_CATALOG_SIZE:,} synthetic videos at {base_url}")
+    print("💡 Point the app at it (any API key works):")
+    print(f"   YOUTUBE_API_BASE_URL={base_url} YOUTUBE_API_KEY=fake python app.py search")
+    print(f"📊 Request and quota counters: {base_url.rsplit('/youtube', 1)[0]}/_fake/stats")
+    print("🛑 Press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Fake YouTube API stopped!")
+    finally:
+        server.server_close()
+
+
+def run_models(action="list", version=None, keep=5, user_id=None):
+    """List, prune and pin persisted model versions (of the default user unless --user is given)"""
+    from backend.database.migrations import DEFAULT_USER_ID
+    from backend.ml.model_store import (
+        DEFAULT_MODEL_DIR,
+        get_user_model_dir,
+        list_model_artifacts,
+        pin_model_artifact,
+        prune_model_artifacts,
+    )
+    from backend.services.recommendation_service import is_valid_user_id
+
+    user_id = user_id or DEFAULT_USER_ID
+    if not is_valid_user_id(user_id):
+        print(f"❌ Invalid user ID '{user_id}'")
+        return
+    model_dir = get_user_model_dir(DEFAULT_MODEL_DIR, user_id)
+
+    if action == "list":
+        artifacts = list_model_artifacts(model_dir)
+        if not artifacts:
+            print(f"📦 No saved models in {model_dir}/")
+            return
+
+        print(f"📦 Saved models in {model_dir}/")
+        for metadata in artifacts:
+            pin = "📌" if metadata.get("pinned") else "  "
+            print(
+                f"  {pin} {metadata['version']}  "
+                f"rows={metadata['training_rows']}  "
+                f"sklearn={metadata['sklearn_version']}  "
+                f"trained={metadata['trained_at']}"
+            )
+    elif action == "prune":
+        removed = prune_model_artifacts(keep, model_dir)
+        print(f"🧹 Removed {len(removed)} model(s), kept the newest {keep} plus pinned")
+        for removed_version in removed:
+            print(f"      {removed_version}")
+    elif action in ("pin", "unpin"):
+        if not version:
+            print(f"❌ Usage: python app.py models {action} <version>")
+            return
+        if pin_model_artifact(version, action == "pin", model_dir):
+            print(f"✅ Model {version} {action}ned")
+        else:
+            print(f"❌ Model {version} not found in {model_dir}/")
+    else:
+        print(f"❌ Unknown models action '{action}' (use list, prune, pin or unpin)")
+
+
+def run_features(action="status"):
+    """Show or rebuild the memory-mapped feature store"""
+    from backend.database.manager import setup_database_tables
+    from backend.ml.feature_store import DEFAULT_FEATURE_STORE_DIR, FeatureStore
+    from backend.services.feature_store_service import (
+        get_feature_store_directory,
+        rebuild_feature_store,
+    )
+
+    if not DEFAULT_FEATURE_STORE_DIR:
+        print("❌ The feature store is disabled (FEATURE_STORE_DIR is empty)")
+        return
+
+    db_path = "video_inspiration.db"
+    setup_database_tables(db_path)
+    store = FeatureStore(get_feature_store_directory(db_path))
+
+    if action == "rebuild":
+        rebuild_feature_store(db_path, store)
+    elif action not in ("status", "list"):
+        print(f"❌ Unknown features action '{action}' (use status or rebuild)")
+        return
+
+    meta = store.meta
+    if meta is None:
+        print(f"🗂️  No feature store in {store.directory}/ (built on first use)")
+        return
+    _, _, valid = store.view()
+    print(f"🗂️  Feature store in {store.directory}/")
+    print(
+        f"   {meta['rows']} videos ({int(valid.sum())} with complete features), "
+        f"capacity {meta['capacity']}, updated {meta['updated_at']}"
+    )
+
+
 def check_frontend_built():
     """Check if the frontend is built"""
     dist_path = Path("frontend/dist")
@@ -345,10 +544,21 @@ def ensure_venv():
             os.execv(venv_python, [venv_python] + sys.argv)
 
 
+def load_environment():
+    """Load .env before any backend import; several modules read their settings at import time"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        # Dependencies aren't installed yet (python app.py install)
+        return
+    load_dotenv()
+
+
 def main():
     # Auto-switch to venv if available (except for install command)
     if len(sys.argv) == 1 or (len(sys.argv) > 1 and sys.argv[1] != "install"):
         ensure_venv()
+    load_environment()
 
     parser = argparse.ArgumentParser(
         description="MyTube - YouTube Video Recommendation System",
@@ -359,6 +569,10 @@ Commands:
   run                         # Start web dashboard (default)
   search                      # Search for more videos
   dev                         # Start Vue development server
+  models                      # List, prune or pin saved ML models
+  features                    # Show or rebuild the feature store
+  refresh-stats               # Update view/like counts for stored videos
+  fake-api                    # Serve a fake YouTube API for offline runs
 
 Examples:
   python app.py install       # First-time setup
@@ -368,6 +582,11 @@ Examples:
   python app.py run --build   # Force rebuild frontend
   python app.py run --port 3000 --debug  # Custom options
   python app.py search        # Search for videos
+  python app.py refresh-stats --max-videos 500  # Refresh the 500 stalest videos
+  python app.py fake-api --latency-ms 80  # Offline API with realistic latency
+  python app.py models list   # Show saved model versions
+  python app.py models prune --keep 3   # Delete old unpinned models
+  python app.py models pin 000004-1a2b3c4d5e6f  # Protect a model from pruning
         """,
     )
 
@@ -375,12 +594,102 @@ Examples:
         "command",
         nargs="?",
         default="run",
-        choices=["install", "run", "search", "dev"],
+        choices=[
+            "install", "run", "search", "dev", "models", "features", "refresh-stats", "fake-api"
+        ],
         help="Command to execute (default: run)",
     )
 
     parser.add_argument(
-        "--port", type=int, default=8000, help="Port for web server (default: 8000)"
+        "action",
+        nargs="?",
+        default="list",
+        help="Action for models (list, prune, pin, unpin) or features (status, rebuild)",
+    )
+
+    parser.add_argument(
+        "version", nargs="?", help="Model version for models pin/unpin"
+    )
+
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=5,
+        help="Unpinned models to keep for models prune (default: 5)",
+    )
+
+    parser.add_argument(
+        "--user",
+        help="User whose saved models the models command manages (default: the default user)",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="Rows per bulk insert batch for search (default: INGEST_BATCH_SIZE or 500)",
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Parallel YouTube requests for search (default: YOUTUBE_MAX_CONCURRENCY or 4)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the YouTube API response cache for search",
+    )
+
+    parser.add_argument(
+        "--per-query",
+        type=int,
+        default=8,
+        help="Videos to harvest per query for search, following result pages (default: 8)",
+    )
+
+    parser.add_argument(
+        "--refresh-known",
+        action="store_true",
+        help="Also refetch details for videos already in the database during search",
+    )
+
+    parser.add_argument(
+        "--max-videos",
+        type=int,
+        help="Videos to refresh for refresh-stats (default: all, within the quota budget)",
+    )
+
+    parser.add_argument(
+        "--catalog-size",
+        type=int,
+        help="Synthetic videos served by fake-api (default: 2,000,000)",
+    )
+
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Added latency per fake-api request in milliseconds (default: 0)",
+    )
+
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fake-api requests that fail with a backend error (default: 0)",
+    )
+
+    parser.add_argument(
+        "--quota-limit",
+        type=int,
+        help="Units fake-api serves before answering quotaExceeded (default: unlimited)",
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Port for web server (default: 8000) or fake-api (default: 8081)",
     )
 
     parser.add_argument(
@@ -406,9 +715,29 @@ Examples:
     if args.command == "install":
         install()
     elif args.command == "search":
-        run_search()
+        run_search(
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+            per_query=args.per_query,
+            refresh_known=args.refresh_known,
+        )
     elif args.command == "dev":
         start_vue_dev_server()
+    elif args.command == "models":
+        run_models(args.action, args.version, args.keep, args.user)
+    elif args.command == "features":
+        run_features("status" if args.action == "list" else args.action)
+    elif args.command == "refresh-stats":
+        run_refresh_stats(args.max_videos)
+    elif args.command == "fake-api":
+        run_fake_api(
+            port=args.port,
+            catalog_size=args.catalog_size,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            quota_limit=args.quota_limit,
+        )
     elif args.command == "run":
         if args.dev:
             start_vue_dev_server()
@@ -417,7 +746,7 @@ Examples:
             if args.build or not check_frontend_built():
                 if not build_frontend():
                     print("⚠️  Frontend build failed, but continuing with Flask API...")
-            run_web(port=args.port, debug=args.debug, auto_open=not args.no_browser)
+            run_web(port=args.port or 8000, debug=args.debug, auto_open=not args.no_browser)
 
 
 if __name__ == "__main__":
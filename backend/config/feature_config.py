@@ -0,0 +1,54 @@
+import json
+from functools import lru_cache
+from typing import Dict, List
+from pathlib import Path
+
+def get_feature_config_path() -> str:
+    """Get the path to the feature keywords configuration file."""
+    project_root = Path(__file__).parent.parent.parent
+    return str(project_root / "config" / "feature_keywords.json")
+
+def load_feature_keywords() -> dict:
+    """Load feature keyword lists from the configuration file."""
+    config_path = get_feature_config_path()
+
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: Feature keywords config file not found at {config_path}")
+        print("Using default keyword lists.")
+        return get_default_feature_keywords()
+    except json.JSONDecodeError as e:
+        print(f"Error parsing feature keywords config: {e}")
+        print("Using default keyword lists.")
+        return get_default_feature_keywords()
+
+def get_default_feature_keywords() -> dict:
+    """Fallback keyword lists if config file is missing or invalid."""
+    return {
+        "keyword_features": {
+            "tutorial": ['tutorial', 'learn', 'course', 'guide', 'how to', 'explained', 'walkthrough'],
+            "time_constraint": ['24 hours', '1 day', '1 hour', 'minutes', 'seconds', 'crash course', 'quick', 'fast'],
+            "beginner": ['beginner', 'start', 'basics', 'introduction', 'getting started', 'first time', 'new to'],
+            "tech": ['ai', 'artificial intelligence', 'machine learning', 'neural network', 'coding', 'programming', 'tech'],
+            "project": ['challenge', 'build', 'create', 'project', 'diy', 'make', 'workout', 'routine', 'recipe']
+        },
+        "sentiment_words": {
+            "positive": ['amazing', 'best', 'awesome', 'great', 'perfect', 'love', 'incredible'],
+            "negative": ['hard', 'difficult', 'impossible', 'failed', 'broke', 'wrong']
+        }
+    }
+
+@lru_cache(maxsize=1)
+def get_keyword_lists() -> Dict[str, List[str]]:
+    """Get every keyword list by name, loaded once per process."""
+    config = load_feature_keywords()
+    defaults = get_default_feature_keywords()
+
+    keyword_lists = {}
+    for section in ("keyword_features", "sentiment_words"):
+        lists = config.get(section, defaults[section])
+        for name, default_keywords in defaults[section].items():
+            keyword_lists[name] = list(lists.get(name, default_keywords))
+    return keyword_lists
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+# Applied to every new connection; journal_mode=WAL is persisted in the database file
+CONNECTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('mmap_size', int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))),
+    ('cache_size', int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))),  # negative = KiB, so 64 MiB
+    ('temp_store', 'MEMORY'),
+)
+
+# Prepared statements kept per connection so repeated queries skip re-parsing
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Connections released by finished requests, handed to the next thread that needs one
+MAX_IDLE_CONNECTIONS = 8
+
+_local = threading.local()
+_idle = {}
+_idle_pid = os.getpid()
+_idle_lock = threading.Lock()
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """Get this thread's pooled connection to db_path, reusing a released one or opening it on first use"""
+    pool = getattr(_local, 'pool', None)
+    if pool is None or _local.pid != os.getpid():
+        # Never reuse connections inherited across a fork
+        pool = _local.pool = {}
+        _local.depth = {}
+        _local.pid = os.getpid()
+
+    conn = pool.get(db_path)
+    if conn is None:
+        conn = _take_idle_connection(db_path)
+        if conn is None:
+            # Released connections move between threads, one owner at a time
+            conn = sqlite3.connect(
+                db_path,
+                timeout=BUSY_TIMEOUT_SECONDS,
+                cached_statements=STATEMENT_CACHE_SIZE,
+                check_same_thread=False
+            )
+            for pragma, value in CONNECTION_PRAGMAS:
+                conn.execute(f"PRAGMA {pragma} = {value}")
+        pool[db_path] = conn
+    return conn
+
+def release_connections():
+    """Hand the calling thread's connections back for reuse by other threads
+
+    Call this when a short-lived thread (such as a request on the threaded dev server)
+    is done with the database; past MAX_IDLE_CONNECTIONS per database they are closed.
+    """
+    global _idle, _idle_pid
+    pool = getattr(_local, 'pool', None)
+    if not pool or _local.pid != os.getpid():
+        return
+
+    for db_path, conn in pool.items():
+        if conn.in_transaction:
+            conn.rollback()
+        with _idle_lock:
+            if _idle_pid != os.getpid():
+                _idle, _idle_pid = {}, os.getpid()
+            idle = _idle.setdefault(db_path, [])
+            if len(idle) < MAX_IDLE_CONNECTIONS:
+                idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+    pool.clear()
+    _local.depth.clear()
+
+def _take_idle_connection(db_path: str):
+    with _idle_lock:
+        if _idle_pid != os.getpid():
+            return None
+        idle = _idle.get(db_path)
+        return idle.pop() if idle else None
+
+@contextmanager
+def transaction(db_path: str, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+    """Run a block of writes atomically; nested blocks join the outermost transaction
+
+    Use immediate=True for read-then-write blocks so the write lock is taken up front.
+    """
+    conn = get_connection(db_path)
+    depth = _local.depth.get(db_path, 0)
+    if depth == 0 and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    _local.depth[db_path] = depth + 1
+    try:
+        yield conn
+        if depth == 0:
+            conn.commit()
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+        raise
+    finally:
+        _local.depth[db_path] = depth
@@ -0,0 +1,23 @@
+from typing import Optional
+from ..metrics import timed
+from .connection import get_connection, transaction
+
+@timed('db.get_job_state_from_database')
+def get_job_state_from_database(name: str, db_path: str) -> Optional[str]:
+    row = get_connection(db_path).execute(
+        "SELECT value FROM job_state WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else None
+
+@timed('db.save_job_state_to_database')
+def save_job_state_to_database(name: str, value: str, db_path: str):
+    with transaction(db_path) as conn:
+        conn.execute('''
+            INSERT INTO job_state (name, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        ''', (name, value))
+
+@timed('db.clear_job_state_in_database')
+def clear_job_state_in_database(name: str, db_path: str):
+    with transaction(db_path) as conn:
+        conn.execute("DELETE FROM job_state WHERE name = ?", (name,))
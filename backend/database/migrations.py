@@ -0,0 +1,224 @@
+import threading
+from .connection import get_connection
+
+# Owner of ratings made before users existed, and of requests that don't name a user
+DEFAULT_USER_ID = 'default'
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS videos (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            view_count INTEGER,
+            like_count INTEGER,
+            comment_count INTEGER,
+            duration TEXT,
+            published_at TEXT,
+            channel_name TEXT,
+            thumbnail_url TEXT,
+            tags TEXT,
+            category_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS preferences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id TEXT,
+            liked BOOLEAN,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS video_features (
+            video_id TEXT PRIMARY KEY,
+            title_length INTEGER,
+            description_length INTEGER,
+            view_like_ratio REAL,
+            engagement_score REAL,
+            title_sentiment REAL,
+            has_tutorial_keywords BOOLEAN,
+            has_time_constraint BOOLEAN,
+            has_beginner_keywords BOOLEAN,
+            has_tech_keywords BOOLEAN,
+            has_project_keywords BOOLEAN,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS video_scores (
+            video_id TEXT PRIMARY KEY,
+            model_generation INTEGER,
+            like_probability REAL,
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_video_scores_like_probability
+        ON video_scores (like_probability DESC)
+    ''')
+
+def _add_indexes_and_unique_ratings(conn):
+    # Backfill: keep only the latest rating per video before enforcing uniqueness
+    conn.execute('''
+        DELETE FROM preferences
+        WHERE id NOT IN (SELECT MAX(id) FROM preferences GROUP BY video_id)
+    ''')
+
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_preferences_video_id
+        ON preferences (video_id)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_preferences_liked_created_at
+        ON preferences (liked, created_at)
+    ''')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_videos_view_count
+        ON videos (view_count)
+    ''')
+
+def _add_quota_usage(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quota_usage (
+            quota_day TEXT,
+            call_type TEXT,
+            units INTEGER DEFAULT 0,
+            calls INTEGER DEFAULT 0,
+            PRIMARY KEY (quota_day, call_type)
+        )
+    ''')
+
+def _add_stats_refresh_tracking(conn):
+    conn.execute("ALTER TABLE videos ADD COLUMN stats_refreshed_at TEXT")
+
+    # NULLs sort first, so never-refreshed videos lead the oldest-refreshed-first walk
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_videos_stats_refreshed_at
+        ON videos (stats_refreshed_at, id)
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_state (
+            name TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _add_liked_keyset_index(conn):
+    # Serves "liked, newest first" pages keyed on the rating id
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_preferences_liked_id
+        ON preferences (liked, id)
+    ''')
+
+def _add_user_dimension(conn):
+    # Existing ratings and scores belong to the single user the app had so far
+    conn.execute(f"ALTER TABLE preferences ADD COLUMN user_id TEXT NOT NULL DEFAULT '{DEFAULT_USER_ID}'")
+
+    # One rating per user and video; the per-video unique index would block a second user
+    conn.execute("DROP INDEX IF EXISTS idx_preferences_video_id")
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_preferences_user_video_id
+        ON preferences (user_id, video_id)
+    ''')
+
+    # Per-user training data versions and "ratings since" reads
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_preferences_user_id
+        ON preferences (user_id, id)
+    ''')
+
+    conn.execute("DROP INDEX IF EXISTS idx_preferences_liked_id")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_preferences_user_liked_id
+        ON preferences (user_id, liked, id)
+    ''')
+
+    # SQLite can't change a primary key in place, so rebuild video_scores keyed by user
+    conn.execute('''
+        CREATE TABLE video_scores_by_user (
+            user_id TEXT NOT NULL,
+            video_id TEXT NOT NULL,
+            model_generation INTEGER,
+            like_probability REAL,
+            PRIMARY KEY (user_id, video_id),
+            FOREIGN KEY (video_id) REFERENCES videos (id)
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO video_scores_by_user (user_id, video_id, model_generation, like_probability)
+        SELECT ?, video_id, model_generation, like_probability FROM video_scores
+    ''', (DEFAULT_USER_ID,))
+    conn.execute("DROP TABLE video_scores")
+    conn.execute("ALTER TABLE video_scores_by_user RENAME TO video_scores")
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_video_scores_user_like_probability
+        ON video_scores (user_id, like_probability DESC)
+    ''')
+
+def _add_score_staging(conn):
+    # Full rescores are written here chunk by chunk, then moved into video_scores in one short transaction
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS video_scores_staging (
+            user_id TEXT NOT NULL,
+            model_generation INTEGER NOT NULL,
+            video_id TEXT NOT NULL,
+            like_probability REAL,
+            PRIMARY KEY (user_id, model_generation, video_id)
+        )
+    ''')
+
+# Each migration runs exactly once, in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _create_base_tables,
+    _add_indexes_and_unique_ratings,
+    _add_quota_usage,
+    _add_stats_refresh_tracking,
+    _add_liked_keyset_index,
+    _add_user_dimension,
+    _add_score_staging,
+]
+
+_migrated_paths = set()
+_migrated_lock = threading.Lock()
+
+def get_schema_version(db_path: str) -> int:
+    return get_connection(db_path).execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(db_path: str) -> int:
+    """Bring the schema up to date, once per process; returns the number of migrations applied"""
+    with _migrated_lock:
+        if db_path in _migrated_paths:
+            return 0
+
+        conn = get_connection(db_path)
+        # Take the write lock up front so concurrent processes migrate one at a time
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            applied = 0
+            for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                applied += 1
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        if applied:
+            print(f"Database migrated to schema version {current + applied}")
+        _migrated_paths.add(db_path)
+        return applied
@@ -1,46 +1,125 @@
-import sqlite3
 import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from ..metrics import timed
+from .connection import get_connection, transaction
+from .migrations import DEFAULT_USER_ID
 
-def save_video_rating_to_database(video_id: str, liked: bool, notes: str, db_path: str):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+@timed('db.save_video_rating_to_database')
+def save_video_rating_to_database(video_id: str, liked: bool, notes: str, db_path: str,
+                                  user_id: str = DEFAULT_USER_ID):
+    # One rating per user and video: re-rating replaces the old row (with a new id, so
+    # that user's training data version still changes)
+    with transaction(db_path) as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO preferences (user_id, video_id, liked, notes) VALUES (?, ?, ?, ?)
+        ''', (user_id, video_id, liked, notes))
 
-    cursor.execute('''
-        INSERT INTO preferences (video_id, liked, notes) VALUES (?, ?, ?)
-    ''', (video_id, liked, notes))
-
-    conn.commit()
-    conn.close()
-
-def get_training_data_from_database(db_path: str) -> pd.DataFrame:
-    conn = sqlite3.connect(db_path)
+@timed('db.get_training_data_from_database')
+def get_training_data_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> pd.DataFrame:
+    conn = get_connection(db_path)
     query = '''
         SELECT vf.*, p.liked
         FROM video_features vf
         JOIN preferences p ON vf.video_id = p.video_id
+        WHERE p.user_id = ?
     '''
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return pd.read_sql_query(query, conn, params=(user_id,))
 
-def get_unrated_videos_with_features_from_database(db_path: str) -> pd.DataFrame:
-    conn = sqlite3.connect(db_path)
+@timed('db.get_unrated_videos_with_features_from_database')
+def get_unrated_videos_with_features_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> pd.DataFrame:
+    conn = get_connection(db_path)
     query = '''
         SELECT v.*, vf.*
         FROM videos v
         JOIN video_features vf ON v.id = vf.video_id
-        LEFT JOIN preferences p ON v.id = p.video_id
+        LEFT JOIN preferences p ON v.id = p.video_id AND p.user_id = ?
         WHERE p.video_id IS NULL
         ORDER BY v.view_count DESC
     '''
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
-
-def get_rated_count_from_database(db_path: str) -> int:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM preferences")
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
\ No newline at end of file
+    return pd.read_sql_query(query, conn, params=(user_id,))
+
+@timed('db.get_liked_videos_page_from_database')
+def get_liked_videos_page_from_database(db_path: str, feature_columns: List[str], limit: int,
+                                        before_rating_id: Optional[int] = None,
+                                        user_id: str = DEFAULT_USER_ID) -> List[Dict]:
+    """One page of a user's liked videos, newest rating first, with cached scores and features in one query
+
+    Pages are keyed on the rating id (pass the last row's rating_id as before_rating_id),
+    so deep pages cost the same as the first.
+    """
+    conn = get_connection(db_path)
+    features = ', '.join('vf.' + column for column in feature_columns)
+    cursor = conn.execute(f'''
+        SELECT p.id, v.id, v.title, v.channel_name, v.view_count,
+               s.like_probability, s.model_generation, {features}
+        FROM preferences p
+        JOIN videos v ON v.id = p.video_id
+        LEFT JOIN video_scores s ON s.user_id = p.user_id AND s.video_id = p.video_id
+        LEFT JOIN video_features vf ON vf.video_id = p.video_id
+        WHERE p.user_id = ? AND p.liked = 1 AND p.id < ?
+        ORDER BY p.id DESC
+        LIMIT ?
+    ''', (user_id, before_rating_id if before_rating_id is not None else 2 ** 63 - 1, limit))
+
+    videos = []
+    for row in cursor.fetchall():
+        videos.append({
+            'rating_id': row[0],
+            'id': row[1],
+            'title': row[2],
+            'channel_name': row[3],
+            'view_count': row[4],
+            'url': f"https://www.youtube.com/watch?v={row[1]}",
+            'like_probability': row[5],
+            'model_generation': row[6],
+            'features': row[7:]
+        })
+    return videos
+
+@timed('db.get_liked_count_from_database')
+def get_liked_count_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> int:
+    conn = get_connection(db_path)
+    return conn.execute(
+        "SELECT COUNT(*) FROM preferences WHERE user_id = ? AND liked = 1", (user_id,)
+    ).fetchone()[0]
+
+@timed('db.get_ratings_since_from_database')
+def get_ratings_since_from_database(after_rating_id: int, feature_columns: List[str], limit: int,
+                                    db_path: str, user_id: str = DEFAULT_USER_ID) -> Tuple[List[Tuple], Tuple[int, int]]:
+    """A user's ratings newer than after_rating_id with their features, plus the data version they add up to
+
+    Both reads share one snapshot, so the version never covers a rating that wasn't returned.
+    Returns at most limit + 1 ratings so callers can tell when there are too many to apply.
+    """
+    features = ', '.join('vf.' + column for column in feature_columns)
+    with transaction(db_path) as conn:
+        ratings = conn.execute(f'''
+            SELECT p.id, p.liked, {features}
+            FROM preferences p
+            JOIN video_features vf ON vf.video_id = p.video_id
+            WHERE p.user_id = ? AND p.id > ?
+            ORDER BY p.id
+            LIMIT ?
+        ''', (user_id, after_rating_id, limit + 1)).fetchall()
+        version = conn.execute(
+            "SELECT COALESCE(MAX(id), 0), COUNT(*) FROM preferences WHERE user_id = ?", (user_id,)
+        ).fetchone()
+    return ratings, (version[0], version[1])
+
+@timed('db.get_rated_count_from_database')
+def get_rated_count_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> int:
+    conn = get_connection(db_path)
+    return conn.execute("SELECT COUNT(*) FROM preferences WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+@timed('db.get_training_data_version_from_database')
+def get_training_data_version_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> Tuple[int, int]:
+    conn = get_connection(db_path)
+    version = conn.execute(
+        "SELECT COALESCE(MAX(id), 0), COUNT(*) FROM preferences WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return (version[0], version[1])
+
+@timed('db.get_user_count_from_database')
+def get_user_count_from_database(db_path: str) -> int:
+    conn = get_connection(db_path)
+    return conn.execute("SELECT COUNT(DISTINCT user_id) FROM preferences").fetchone()[0]
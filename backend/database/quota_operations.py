@@ -0,0 +1,30 @@
+from typing import Dict
+from ..metrics import timed
+from .connection import get_connection, transaction
+
+@timed('db.reserve_quota_units_in_database')
+def reserve_quota_units_in_database(quota_day: str, call_type: str, units: int, calls: int,
+                                    limit: int, db_path: str) -> bool:
+    # Check and record in one write transaction so concurrent workers can't overspend
+    with transaction(db_path, immediate=True) as conn:
+        spent = conn.execute(
+            "SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE quota_day = ?", (quota_day,)
+        ).fetchone()[0]
+        if spent + units > limit:
+            return False
+
+        conn.execute('''
+            INSERT INTO quota_usage (quota_day, call_type, units, calls) VALUES (?, ?, ?, ?)
+            ON CONFLICT(quota_day, call_type) DO UPDATE SET
+                units = units + excluded.units,
+                calls = calls + excluded.calls
+        ''', (quota_day, call_type, units, calls))
+        return True
+
+@timed('db.get_quota_usage_from_database')
+def get_quota_usage_from_database(quota_day: str, db_path: str) -> Dict[str, Dict[str, int]]:
+    cursor = get_connection(db_path).cursor()
+    cursor.execute(
+        "SELECT call_type, units, calls FROM quota_usage WHERE quota_day = ?", (quota_day,)
+    )
+    return {row[0]: {'units': row[1], 'calls': row[2]} for row in cursor.fetchall()}
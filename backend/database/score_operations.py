@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Iterable, Iterator, Tuple, Optional
+from ..metrics import timed
+from .connection import get_connection, transaction
+from .migrations import DEFAULT_USER_ID
+
+@timed('db.replace_video_scores_in_database')
+def replace_video_scores_in_database(score_chunks: Iterable[List[Tuple[str, float]]], model_generation: int,
+                                     db_path: str, user_id: str = DEFAULT_USER_ID) -> bool:
+    """Replace the user's scores with a full rescore; False if a newer generation's scores landed first
+
+    score_chunks may be a generator that runs inference: each chunk is staged in its own
+    short transaction, so the write lock is never held while a model predicts, and the
+    staged rows are then moved into video_scores at once so readers never see a mix of
+    generations. Videos scored after the rescore started keep their scores.
+    """
+    with transaction(db_path) as conn:
+        # Rows left behind by an interrupted rescore of this or an older generation
+        conn.execute("DELETE FROM video_scores_staging WHERE user_id = ? AND model_generation <= ?",
+                     (user_id, model_generation))
+
+    for scores in score_chunks:
+        with transaction(db_path) as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO video_scores_staging (user_id, model_generation, video_id, like_probability)
+                VALUES (?, ?, ?, ?)
+            ''', [(user_id, model_generation, video_id, probability) for video_id, probability in scores])
+
+    with transaction(db_path, immediate=True) as conn:
+        scored_generation = conn.execute(
+            "SELECT MAX(model_generation) FROM video_scores WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        current = scored_generation is None or scored_generation <= model_generation
+        if current:
+            # An upsert updates rows in place, which is cheaper than INSERT OR REPLACE's delete and reinsert
+            conn.execute('''
+                INSERT INTO video_scores (user_id, video_id, model_generation, like_probability)
+                SELECT user_id, video_id, model_generation, like_probability
+                FROM video_scores_staging
+                WHERE user_id = ? AND model_generation = ?
+                ON CONFLICT (user_id, video_id) DO UPDATE SET
+                    model_generation = excluded.model_generation,
+                    like_probability = excluded.like_probability
+            ''', (user_id, model_generation))
+        conn.execute("DELETE FROM video_scores_staging WHERE user_id = ? AND model_generation = ?",
+                     (user_id, model_generation))
+    return current
+
+@timed('db.save_video_scores_to_database')
+def save_video_scores_to_database(scores: List[Tuple[str, float]], model_generation: int, db_path: str,
+                                  user_id: str = DEFAULT_USER_ID):
+    with transaction(db_path) as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO video_scores (user_id, video_id, model_generation, like_probability)
+            VALUES (?, ?, ?, ?)
+        ''', [(user_id, video_id, model_generation, probability) for video_id, probability in scores])
+
+@timed('db.get_scored_generation_from_database')
+def get_scored_generation_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> Optional[int]:
+    conn = get_connection(db_path)
+    return conn.execute(
+        "SELECT MAX(model_generation) FROM video_scores WHERE user_id = ?", (user_id,)
+    ).fetchone()[0]
+
+@timed('db.get_scored_generations_from_database')
+def get_scored_generations_from_database(db_path: str) -> Dict[str, int]:
+    """Model generation behind each user's scores"""
+    conn = get_connection(db_path)
+    return dict(conn.execute("SELECT user_id, MAX(model_generation) FROM video_scores GROUP BY user_id"))
+
+@timed('db.get_top_scored_unrated_videos_from_database')
+def get_top_scored_unrated_videos_from_database(limit: int, db_path: str,
+                                                user_id: str = DEFAULT_USER_ID) -> List[Dict]:
+    cursor = get_connection(db_path).cursor()
+
+    cursor.execute('''
+        SELECT v.id, v.title, v.channel_name, v.view_count, s.like_probability
+        FROM video_scores s
+        JOIN videos v ON v.id = s.video_id
+        WHERE s.user_id = ?
+          AND NOT EXISTS (SELECT 1 FROM preferences p WHERE p.user_id = s.user_id AND p.video_id = s.video_id)
+        ORDER BY s.like_probability DESC
+        LIMIT ?
+    ''', (user_id, limit))
+
+    videos = []
+    for row in cursor.fetchall():
+        videos.append({
+            'id': row[0],
+            'title': row[1],
+            'channel_name': row[2],
+            'view_count': row[3],
+            'url': f"https://www.youtube.com/watch?v={row[0]}",
+            'like_probability': row[4]
+        })
+
+    return videos
+
+@timed('db.get_video_features_from_database')
+def get_video_features_from_database(db_path: str, video_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    conn = get_connection(db_path)
+    if video_ids is None:
+        return pd.read_sql_query("SELECT * FROM video_features", conn)
+
+    # Stay under SQLite's bound-parameter limit for large ID lists
+    video_ids = list(video_ids)
+    chunks = []
+    for start in range(0, len(video_ids), 500):
+        chunk = video_ids[start:start + 500]
+        placeholders = ','.join('?' for _ in chunk)
+        chunks.append(pd.read_sql_query(
+            f"SELECT * FROM video_features WHERE video_id IN ({placeholders})",
+            conn, params=chunk
+        ))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+@timed('db.get_feature_source_signature_from_database')
+def get_feature_source_signature_from_database(db_path: str) -> Dict:
+    """Cheap fingerprint of video_features: row count plus the latest stats refresh"""
+    conn = get_connection(db_path)
+    return {
+        'feature_rows': conn.execute("SELECT COUNT(*) FROM video_features").fetchone()[0],
+        'stats_refreshed_at': conn.execute("SELECT MAX(stats_refreshed_at) FROM videos").fetchone()[0]
+    }
+
+def iter_video_feature_chunks_from_database(db_path: str, columns: List[str], chunk_size: int = 10000,
+                                            unrated_only: bool = False,
+                                            user_id: str = DEFAULT_USER_ID) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Stream (video IDs, feature matrix) chunks reading only the ID and the given feature columns
+
+    unrated_only skips the videos user_id has rated. Each chunk is its own keyset query on
+    rowid, so no read snapshot stays open between chunks and callers may write while iterating.
+    """
+    conn = get_connection(db_path)
+    where = 'vf.rowid > ?'
+    if unrated_only:
+        where += ' AND NOT EXISTS (SELECT 1 FROM preferences p WHERE p.user_id = ? AND p.video_id = vf.video_id)'
+    query = (f"SELECT vf.rowid, vf.video_id, {', '.join('vf.' + column for column in columns)} "
+             f"FROM video_features vf WHERE {where} ORDER BY vf.rowid LIMIT ?")
+    last_rowid = 0
+    while True:
+        params = (last_rowid, user_id, chunk_size) if unrated_only else (last_rowid, chunk_size)
+        rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return
+        last_rowid = rows[-1][0]
+        # NULL features become NaN, matching what read_sql_query produced
+        yield [row[1] for row in rows], np.array([row[2:] for row in rows], dtype=np.float64)
@@ -1,48 +1,101 @@
-import sqlite3
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Sequence
+from ..metrics import timed
+from .connection import get_connection, transaction
+from .migrations import DEFAULT_USER_ID
 
+@timed('db.save_videos_to_database')
 def save_videos_to_database(videos: List[Dict], db_path: str):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    for video in videos:
-        cursor.execute('''
-            INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            video['id'], video['title'], video['description'],
-            video['view_count'], video['like_count'], video['comment_count'],
-            video['duration'], video['published_at'], video['channel_name'],
-            video['thumbnail_url'], video['tags'], video['category_id'],
-            datetime.now().isoformat()
-        ))
-
-    conn.commit()
-    conn.close()
+    with transaction(db_path) as conn:
+        cursor = conn.cursor()
 
+        for video in videos:
+            cursor.execute('''
+                INSERT OR REPLACE INTO videos (
+                    id, title, description, view_count, like_count, comment_count,
+                    duration, published_at, channel_name, thumbnail_url, tags, category_id, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                video['id'], video['title'], video['description'],
+                video['view_count'], video['like_count'], video['comment_count'],
+                video['duration'], video['published_at'], video['channel_name'],
+                video['thumbnail_url'], video['tags'], video['category_id'],
+                datetime.now().isoformat()
+            ))
+
+@timed('db.save_video_features_to_database')
 def save_video_features_to_database(video_id: str, features: Tuple, db_path: str):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    with transaction(db_path) as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO video_features VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (video_id,) + features)
 
-    cursor.execute('''
-        INSERT OR REPLACE INTO video_features VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (video_id,) + features)
+@timed('db.bulk_save_videos_with_features_to_database')
+def bulk_save_videos_with_features_to_database(videos: List[Dict], features: Sequence[Sequence],
+                                                db_path: str, batch_size: int = 500) -> Dict[str, int]:
+    """Upsert videos and their feature rows in a single transaction"""
+    inserted = 0
+    updated = 0
+    now = datetime.now().isoformat()
+
+    with transaction(db_path) as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(videos), batch_size):
+            batch = videos[start:start + batch_size]
+            batch_features = features[start:start + batch_size]
+            batch_ids = [video['id'] for video in batch]
+
+            placeholders = ','.join('?' for _ in batch_ids)
+            cursor.execute(f"SELECT id FROM videos WHERE id IN ({placeholders})", batch_ids)
+            existing_ids = {row[0] for row in cursor.fetchall()}
+            batch_updated = len(existing_ids & set(batch_ids))
+            updated += batch_updated
+            inserted += len(set(batch_ids)) - batch_updated
+
+            # Upsert keeps created_at from the first time we saw the video
+            cursor.executemany('''
+                INSERT INTO videos (
+                    id, title, description, view_count, like_count, comment_count,
+                    duration, published_at, channel_name, thumbnail_url, tags, category_id, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    description = excluded.description,
+                    view_count = excluded.view_count,
+                    like_count = excluded.like_count,
+                    comment_count = excluded.comment_count,
+                    duration = excluded.duration,
+                    published_at = excluded.published_at,
+                    channel_name = excluded.channel_name,
+                    thumbnail_url = excluded.thumbnail_url,
+                    tags = excluded.tags,
+                    category_id = excluded.category_id
+            ''', [(
+                video['id'], video['title'], video['description'],
+                video['view_count'], video['like_count'], video['comment_count'],
+                video['duration'], video['published_at'], video['channel_name'],
+                video['thumbnail_url'], video['tags'], video['category_id'],
+                now
+            ) for video in batch])
 
-    conn.commit()
-    conn.close()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO video_features VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(video_id,) + tuple(row) for video_id, row in zip(batch_ids, batch_features)])
 
-def get_unrated_videos_from_database(limit: int, db_path: str) -> List[Dict]:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    return {'inserted': inserted, 'updated': updated}
+
+@timed('db.get_unrated_videos_from_database')
+def get_unrated_videos_from_database(limit: int, db_path: str, user_id: str = DEFAULT_USER_ID) -> List[Dict]:
+    cursor = get_connection(db_path).cursor()
 
     cursor.execute('''
         SELECT v.*
         FROM videos v
-        LEFT JOIN preferences p ON v.id = p.video_id
+        LEFT JOIN preferences p ON v.id = p.video_id AND p.user_id = ?
         WHERE p.video_id IS NULL
         ORDER BY v.view_count DESC
         LIMIT ?
-    ''', (limit,))
+    ''', (user_id, limit))
 
     videos = []
     for row in cursor.fetchall():
@@ -54,5 +107,90 @@ def get_unrated_videos_from_database(limit: int, db_path: str) -> List[Dict]:
             'url': f"https://www.youtube.com/watch?v={row[0]}"
         })
 
-    conn.close()
-    return videos
\ No newline at end of file
+    return videos
+
+@timed('db.get_video_summaries_from_database')
+def get_video_summaries_from_database(video_ids: List[str], db_path: str) -> Dict[str, Dict]:
+    """Display fields for a handful of videos, keyed by ID; unknown IDs are absent"""
+    conn = get_connection(db_path)
+    summaries = {}
+    for start in range(0, len(video_ids), 500):
+        chunk = video_ids[start:start + 500]
+        placeholders = ','.join('?' for _ in chunk)
+        for row in conn.execute(f'''
+            SELECT id, title, channel_name, view_count FROM videos WHERE id IN ({placeholders})
+        ''', chunk):
+            summaries[row[0]] = {
+                'id': row[0],
+                'title': row[1],
+                'channel_name': row[2],
+                'view_count': row[3],
+                'url': f"https://www.youtube.com/watch?v={row[0]}"
+            }
+    return summaries
+
+@timed('db.get_unrated_video_count_from_database')
+def get_unrated_video_count_from_database(db_path: str, limit: int, user_id: str = DEFAULT_USER_ID) -> int:
+    """Count videos user_id hasn't rated, stopping at limit so the check stays cheap on big catalogs"""
+    cursor = get_connection(db_path).cursor()
+    cursor.execute('''
+        SELECT COUNT(*) FROM (
+            SELECT 1
+            FROM videos v
+            WHERE NOT EXISTS (SELECT 1 FROM preferences p WHERE p.user_id = ? AND p.video_id = v.id)
+            LIMIT ?
+        )
+    ''', (user_id, limit))
+    return cursor.fetchone()[0]
+
+@timed('db.get_catalog_counts_from_database')
+def get_catalog_counts_from_database(db_path: str, user_id: str = DEFAULT_USER_ID) -> Dict[str, int]:
+    """Catalog size and how much of it user_id has rated"""
+    conn = get_connection(db_path)
+    videos = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+    rated = conn.execute('''
+        SELECT COUNT(*) FROM preferences p
+        WHERE p.user_id = ? AND EXISTS (SELECT 1 FROM videos v WHERE v.id = p.video_id)
+    ''', (user_id,)).fetchone()[0]
+    return {'videos': videos, 'rated': rated, 'unrated': videos - rated}
+
+@timed('db.get_all_video_ids_from_database')
+def get_all_video_ids_from_database(db_path: str) -> List[str]:
+    cursor = get_connection(db_path).cursor()
+    cursor.execute("SELECT id FROM videos")
+    return [row[0] for row in cursor.fetchall()]
+
+@timed('db.get_videos_due_for_stats_refresh_from_database')
+def get_videos_due_for_stats_refresh_from_database(refreshed_before: str, limit: int, db_path: str) -> List[str]:
+    cursor = get_connection(db_path).cursor()
+    cursor.execute('''
+        SELECT id
+        FROM videos
+        WHERE stats_refreshed_at IS NULL OR stats_refreshed_at < ?
+        ORDER BY stats_refreshed_at, id
+        LIMIT ?
+    ''', (refreshed_before, limit))
+    return [row[0] for row in cursor.fetchall()]
+
+@timed('db.update_video_statistics_in_database')
+def update_video_statistics_in_database(statistics: List[Tuple], metrics: List[Tuple],
+                                        video_ids: List[str], refreshed_at: str, db_path: str):
+    """Save refreshed counts, their derived feature columns and the refresh time together
+
+    statistics rows are (video_id, view_count, like_count, comment_count); metrics rows are
+    (video_id, view_like_ratio, engagement_score). Every ID in video_ids is marked refreshed,
+    including videos YouTube no longer returns, so the walk always moves forward.
+    """
+    with transaction(db_path) as conn:
+        conn.executemany('''
+            UPDATE videos SET view_count = ?, like_count = ?, comment_count = ? WHERE id = ?
+        ''', [(views, likes, comments, video_id) for video_id, views, likes, comments in statistics])
+
+        conn.executemany('''
+            UPDATE video_features SET view_like_ratio = ?, engagement_score = ? WHERE video_id = ?
+        ''', [(ratio, engagement, video_id) for video_id, ratio, engagement in metrics])
+
+        conn.executemany(
+            "UPDATE videos SET stats_refreshed_at = ? WHERE id = ?",
+            [(refreshed_at, video_id) for video_id in video_ids]
+        )
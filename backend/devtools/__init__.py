@@ -0,0 +1 @@
+# Development and load-testing helpers (never imported by the web app)
@@ -0,0 +1,295 @@
+"""
+Fake YouTube Data API
+Deterministic stand-in for the search and videos endpoints, for offline runs and load tests
+"""
+import base64
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CATALOG_SIZE = 2_000_000
+DEFAULT_RESULTS_PER_QUERY = 500  # the real search endpoint stops paging around here
+DEFAULT_PORT = 8081
+API_PATH = '/youtube/v3'
+
+# Units charged per call, mirroring the real API
+QUOTA_COSTS = {'search': 100, 'videos': 1}
+
+ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+ID_PREFIX = 'fk'
+ID_DIGITS = 9  # prefix + 9 digits = the 11 characters of a real video ID
+
+TITLE_OPENERS = ['How to', 'I tried', 'The best', 'Learn', 'Beginner guide to', 'Building',
+                 'Why I quit', 'Amazing', '24 hours of', 'Getting started with', 'The hardest']
+TITLE_TOPICS = ['machine learning', 'sourdough bread', 'home workouts', 'Python programming',
+                'a DIY bookshelf', 'guitar basics', 'neural networks', 'meal prep', 'photography',
+                'a coding challenge', 'speedrunning', 'minimalist living', 'electronics projects']
+TITLE_ENDINGS = ['in 10 minutes', 'for beginners', '(full course)', '- it failed', 'explained',
+                 'the right way', 'crash course', '', '', '']
+CHANNELS = ['Byte Sized', 'Maker Lab', 'Quick Kitchen', 'Daily Dev', 'The Learning Loop',
+            'Weekend Builds', 'Tech Notes', 'Studio Nine']
+DESCRIPTION_WORDS = ['tutorial', 'project', 'build', 'learn', 'great', 'hard', 'quick', 'basics',
+                     'tech', 'routine', 'challenge', 'recipe', 'today', 'video', 'subscribe']
+
+
+def encode_video_id(index: int) -> str:
+    digits = []
+    for _ in range(ID_DIGITS):
+        index, digit = divmod(index, len(ID_ALPHABET))
+        digits.append(ID_ALPHABET[digit])
+    return ID_PREFIX + ''.join(reversed(digits))
+
+
+def decode_video_id(video_id: str) -> Optional[int]:
+    if len(video_id) != len(ID_PREFIX) + ID_DIGITS or not video_id.startswith(ID_PREFIX):
+        return None
+    index = 0
+    for char in video_id[len(ID_PREFIX):]:
+        digit = ID_ALPHABET.find(char)
+        if digit < 0:
+            return None
+        index = index * len(ID_ALPHABET) + digit
+    return index
+
+
+def _encode_page_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o{offset}".encode()).decode().rstrip('=')
+
+
+def _decode_page_token(token: str) -> Optional[int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        return int(raw[1:]) if raw.startswith('o') else None
+    except Exception:
+        return None
+
+
+def _error(code: int, reason: str, message: str) -> Tuple[int, Dict]:
+    return code, {'error': {'code': code, 'message': message,
+                            'errors': [{'reason': reason, 'message': message}]}}
+
+
+class FakeYouTubeAPI:
+    """Generates a synthetic catalog on demand; video N always has the same metadata"""
+
+    def __init__(self, catalog_size: int = DEFAULT_CATALOG_SIZE,
+                 results_per_query: int = DEFAULT_RESULTS_PER_QUERY,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, quota_exceeded_rate: float = 0.0,
+                 quota_limit: Optional[int] = None, seed: int = 0):
+        self.catalog_size = max(1, catalog_size)
+        self.results_per_query = results_per_query
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_exceeded_rate = quota_exceeded_rate
+        self.quota_limit = quota_limit
+        self.seed = seed
+
+        # Any stride coprime with the catalog size walks it without repeats
+        self.stride = 7_919
+        while math.gcd(self.stride, self.catalog_size) != 1:
+            self.stride += 2
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'requests': {}, 'units': 0, 'errors': 0, 'quota_exceeded': 0}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def handle(self, endpoint: str, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """Answer one API call; returns (HTTP status, JSON body)"""
+        if endpoint not in QUOTA_COSTS:
+            return _error(404, 'notFound', f"Unknown endpoint '{endpoint}'")
+        if not params.get('key'):
+            return _error(403, 'forbidden', 'The request is missing a valid API key.')
+
+        self._sleep()
+
+        with self._lock:
+            self.stats['requests'][endpoint] = self.stats['requests'].get(endpoint, 0) + 1
+            roll = self._random.random()
+            units = QUOTA_COSTS[endpoint]
+            over_limit = self.quota_limit is not None and self.stats['units'] + units > self.quota_limit
+            if over_limit or roll < self.quota_exceeded_rate:
+                self.stats['quota_exceeded'] += 1
+                return _error(403, 'quotaExceeded',
+                              'The request cannot be completed because you have exceeded your quota.')
+            if roll < self.quota_exceeded_rate + self.error_rate:
+                self.stats['errors'] += 1
+                return _error(500, 'backendError', 'Backend Error')
+            self.stats['units'] += units
+
+        if endpoint == 'search':
+            return self._search(params)
+        return self._videos(params)
+
+    def _sleep(self):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _search(self, params: Dict[str, str]) -> Tuple[int, Dict]:
+        query = params.get('q', '')
+        max_results = min(max(int(params.get('maxResults', 5)), 0), 50)
+        offset = 0
+        if params.get('pageToken'):
+            offset = _decode_page_token(params['pageToken'])
+            if offset is None:
+                return _error(400, 'invalidPageToken', 'The request specifies an invalid page token.')
+
+        total = min(self.results_per_query, self.catalog_size)
+        start = zlib.crc32(f"{self.seed}:{query}".encode()) % self.catalog_size
+        positions = range(offset, min(offset + max_results, total))
+
+        items = []
+        for position in positions:
+            index = (start + position * self.stride) % self.catalog_size
+            video = self.generate_video(index)
+            items.append({
+                'kind': 'youtube#searchResult',
+                'id': {'kind': 'youtube#video', 'videoId': video['id']},
+                'snippet': video['snippet']
+            })
+
+        body = {
+            'kind': 'youtube#searchListResponse',
+            'regionCode': 'US',
+            'pageInfo': {'totalResults': total, 'resultsPerPage': max_results},
+            'items': items
+        }
+        if positions and positions[-1] + 1 < total:
+            body['nextPageToken'] = _encode_page_token(positions[-1] + 1)
+        if offset:
+            body['prevPageToken'] = _encode_page_token(max(offset - max_results, 0))
+        return 200, body
+
+    def _videos(self, params: Dict[str, str]) -> Tuple[int, Dict]:
+        ids = [video_id for video_id in params.get('id', '').split(',') if video_id]
+        if len(ids) > 50:
+            return _error(400, 'invalidFilters', 'No more than 50 video IDs may be requested.')
+        parts = set(params.get('part', 'snippet').split(','))
+
+        items = []
+        for video_id in ids:
+            index = decode_video_id(video_id)
+            if index is None or index >= self.catalog_size:
+                continue  # unknown or deleted videos are simply absent, like the real API
+            video = self.generate_video(index)
+            items.append({'kind': 'youtube#video', 'id': video_id,
+                          **{part: video[part] for part in parts if part in video}})
+
+        return 200, {
+            'kind': 'youtube#videoListResponse',
+            'pageInfo': {'totalResults': len(items), 'resultsPerPage': len(items)},
+            'items': items
+        }
+
+    def generate_video(self, index: int) -> Dict:
+        """Build the full API resource for catalog entry index"""
+        rng = random.Random(self.seed * 1_000_003 + index)
+        video_id = encode_video_id(index)
+
+        title = ' '.join(filter(None, [
+            rng.choice(TITLE_OPENERS), rng.choice(TITLE_TOPICS), rng.choice(TITLE_ENDINGS)
+        ]))
+        description = ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(5, 60)))
+        # Heavy-tailed view counts so the relevance filter drops a realistic share
+        views = int(10 ** rng.uniform(3, 7.5))
+        likes = int(views * rng.uniform(0.005, 0.08))
+        comments = int(likes * rng.uniform(0.01, 0.2))
+        seconds = rng.choice([rng.randint(15, 59), rng.randint(60, 3600), rng.randint(60, 900)])
+        published = f"20{rng.randint(20, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z"
+
+        return {
+            'id': video_id,
+            'snippet': {
+                'publishedAt': published,
+                'channelId': f"UCfake{index % 5000:06d}",
+                'title': title,
+                'description': description,
+                'thumbnails': {
+                    size: {'url': f"https://i.ytimg.com/vi/{video_id}/{size}default.jpg"}
+                    for size in ('default', 'medium', 'high')
+                },
+                'channelTitle': rng.choice(CHANNELS),
+                'tags': rng.sample(DESCRIPTION_WORDS, rng.randint(0, 5)),
+                'categoryId': str(rng.choice([22, 24, 26, 27, 28]))
+            },
+            'statistics': {
+                'viewCount': str(views),
+                'likeCount': str(likes),
+                'favoriteCount': '0',
+                'commentCount': str(comments)
+            },
+            'contentDetails': {
+                'duration': f"PT{seconds // 60}M{seconds % 60}S" if seconds >= 60 else f"PT{seconds}S"
+            }
+        }
+
+
+class _FakeAPIRequestHandler(BaseHTTPRequestHandler):
+    api: FakeYouTubeAPI = None
+    protocol_version = 'HTTP/1.1'  # keep-alive, so pooled sessions behave as against Google
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+
+        if path == '/_fake/stats':
+            status, body = 200, self.api.get_stats()
+        elif path == '/_fake/reset':
+            self.api.reset_stats()
+            status, body = 200, {'reset': True}
+        elif path.startswith(API_PATH + '/'):
+            status, body = self.api.handle(path[len(API_PATH) + 1:], params)
+        else:
+            status, body = _error(404, 'notFound', f"Unknown path '{url.path}'")
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_fake_youtube_server(host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                               **options) -> Tuple[ThreadingHTTPServer, str]:
+    """Build a server (port 0 picks a free one); returns it with the base URL to hand YouTubeService"""
+    handler = type('FakeAPIRequestHandler', (_FakeAPIRequestHandler,), {'api': FakeYouTubeAPI(**options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    base_url = f"http://{host}:{server.server_address[1]}{API_PATH}"
+    return server, base_url
+
+
+def start_fake_youtube_server(host: str = '127.0.0.1', port: int = 0,
+                              **options) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve from a daemon thread; call server.shutdown() when done"""
+    server, base_url = create_fake_youtube_server(host, port, **options)
+    threading.Thread(target=server.serve_forever, name='fake-youtube-api', daemon=True).start()
+    return server, base_url
+
+
+def get_fake_api(server: ThreadingHTTPServer) -> FakeYouTubeAPI:
+    return server.RequestHandlerClass.api
+
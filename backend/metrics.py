@@ -0,0 +1,222 @@
+"""
+Metrics
+In-process counters, gauges and histograms rendered in the Prometheus text format
+
+With METRICS_ENABLED=0 the timing decorators return the original functions and
+every recording call returns immediately, so instrumentation costs nothing.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Seconds; spans a cached SQLite read up to a full retrain
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def _format_labels(self, key: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {_format_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key: Tuple, value) -> List[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else _format_number(bound)
+            lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+        lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_number(total)}")
+        lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric plus callbacks that refresh gauges right before a scrape"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Warning: metrics collector failed: {e}")
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    'mytube_stage_duration_seconds', 'Time spent in each instrumented stage', ('stage',)
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'mytube_http_request_duration_seconds', 'Flask request latency by endpoint',
+    ('method', 'endpoint', 'status')
+)
+RETRAINS = REGISTRY.counter('mytube_model_retrains_total', 'Model retrains by outcome', ('outcome',))
+RETRAIN_DURATION = REGISTRY.histogram(
+    'mytube_model_retrain_duration_seconds', 'Wall time of a retrain including rescoring'
+)
+YOUTUBE_REQUESTS = REGISTRY.counter(
+    'mytube_youtube_requests_total', 'YouTube API calls that went over the wire', ('endpoint', 'status')
+)
+YOUTUBE_CACHE_LOOKUPS = REGISTRY.counter(
+    'mytube_youtube_cache_lookups_total', 'YouTube response cache lookups', ('endpoint', 'result')
+)
+QUOTA_UNITS = REGISTRY.counter(
+    'mytube_youtube_quota_units_total', 'YouTube quota units reserved by this process', ('call_type',)
+)
+MODEL_CACHE_LOOKUPS = REGISTRY.counter(
+    'mytube_model_cache_lookups_total', 'Per-user model cache lookups', ('result',)
+)
+MODEL_CACHE_EVICTIONS = REGISTRY.counter(
+    'mytube_model_cache_evictions_total', 'Models dropped from the per-user model cache', ('reason',)
+)
+MODEL_CACHE_ENTRIES = REGISTRY.gauge('mytube_model_cache_entries', 'Models held in the per-user model cache')
+MODEL_CACHE_BYTES = REGISTRY.gauge(
+    'mytube_model_cache_bytes', 'Estimated memory of the models held in the per-user model cache'
+)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator recording each call's duration under stage; a no-op when metrics are disabled"""
+    def decorator(func: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+
+
+def _format_number(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,143 @@
+"""
+Compiled Forest
+Flattens a fitted RandomForestClassifier into packed arrays and scores small batches without sklearn's per-tree calls
+
+Every tree is walked at once, one level per step (level-synchronous), and the leaf
+probabilities are summed tree by tree in estimator order before dividing by the
+tree count, exactly as RandomForestClassifier.predict_proba does. Inputs are cast
+to float32 and compared against float64 thresholds like sklearn's tree code, so
+the results are bit-for-bit identical.
+"""
+import os
+import threading
+import weakref
+from typing import Optional
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.fixes import parse_version
+
+# Above this many rows sklearn's compiled per-tree loops win (see benchmarks/compiled_forest.py)
+COMPILED_FOREST_MAX_BATCH = int(os.getenv('COMPILED_FOREST_MAX_BATCH', '128'))
+
+# From 1.4 tree_.value holds class fractions; before that it held weighted counts that
+# DecisionTreeClassifier.predict_proba divided by their row sum
+LEAF_VALUES_ARE_FRACTIONS = parse_version(sklearn.__version__) >= parse_version('1.4')
+
+
+class CompiledForest:
+    """Packed node arrays for every tree of a forest
+
+    Leaves point at themselves with an infinite threshold, so walking past a
+    leaf is a no-op and every row can take the same number of steps.
+    """
+
+    def __init__(self, forest: RandomForestClassifier):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        if forest.n_outputs_ != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        node_count = int(offsets[-1])
+        self.n_trees = len(trees)
+        self.n_classes = int(forest.n_classes_)
+        self.n_features = int(forest.n_features_in_)
+        self.feature_names = list(getattr(forest, 'feature_names_in_', [])) or None
+        self.roots = offsets[:-1].astype(np.intp)
+        self.depth = max(tree.max_depth for tree in trees)
+
+        self.feature = np.zeros(node_count, dtype=np.intp)
+        self.threshold = np.full(node_count, np.inf, dtype=np.float64)
+        self.left = np.arange(node_count, dtype=np.intp)
+        self.right = np.arange(node_count, dtype=np.intp)
+        self.missing_left = np.zeros(node_count, dtype=bool)
+        self.value = np.zeros((node_count, self.n_classes), dtype=np.float64)
+
+        for tree, start in zip(trees, offsets[:-1]):
+            # Before 1.3 trees had no missing-value routing
+            missing_go_to_left = getattr(tree, 'missing_go_to_left', None)
+            if missing_go_to_left is None:
+                raise ValueError("Trees without missing-value support can't be compiled")
+            end = start + tree.node_count
+            split = tree.children_left != -1
+            nodes = np.arange(start, end)[split]
+            self.feature[nodes] = tree.feature[split]
+            self.threshold[nodes] = tree.threshold[split]
+            self.left[nodes] = tree.children_left[split] + start
+            self.right[nodes] = tree.children_right[split] + start
+            self.missing_left[nodes] = missing_go_to_left[split].astype(bool)
+            # Same per-tree probabilities DecisionTreeClassifier.predict_proba returns
+            value = tree.value[:, 0, :self.n_classes]
+            if not LEAF_VALUES_ARE_FRACTIONS:
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            self.value[start:end] = value
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.feature_names is not None and hasattr(X, 'columns') and list(X.columns) != self.feature_names:
+            raise ValueError("Feature names must match those seen when the forest was fitted")
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+
+        n_rows = len(X)
+        rows = np.tile(np.arange(n_rows), self.n_trees)
+        node = np.repeat(self.roots, n_rows)
+        has_missing = np.isnan(X).any()
+
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        leaf_values = self.value[node].reshape(self.n_trees, n_rows, self.n_classes)
+        proba = np.zeros((n_rows, self.n_classes), dtype=np.float64)
+        for tree_values in leaf_values:
+            proba += tree_values
+        proba /= self.n_trees
+        return proba
+
+
+_compiled = weakref.WeakKeyDictionary()
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_forest(model) -> Optional[CompiledForest]:
+    """Compile a fitted forest once and reuse it while the model lives
+
+    None for other models, and for forests that can't be compiled; those are only
+    attempted once.
+    """
+    if not isinstance(model, RandomForestClassifier) or not hasattr(model, 'estimators_'):
+        return None
+
+    with _compiled_lock:
+        if model not in _compiled:
+            try:
+                _compiled[model] = CompiledForest(model)
+            except Exception as e:
+                # Tree internals differ across sklearn versions; model.predict_proba always works
+                print(f"Warning: Could not compile forest, using predict_proba: {e}")
+                _compiled[model] = None
+        return _compiled[model]
+
+
+def estimate_compiled_bytes(model) -> int:
+    """Memory get_compiled_forest would use for model, without compiling it (0 for other models)"""
+    if not isinstance(model, RandomForestClassifier) or not hasattr(model, 'estimators_'):
+        return 0
+    node_count = sum(estimator.tree_.node_count for estimator in model.estimators_)
+    # feature, threshold, left and right are 8 bytes each, missing_left 1, plus the class fractions
+    return node_count * (33 + 8 * int(model.n_classes_))
+
+
+def predict_proba_fast(model, X) -> np.ndarray:
+    """predict_proba that takes the compiled path for small forest batches"""
+    if len(X) <= COMPILED_FOREST_MAX_BATCH:
+        compiled = get_compiled_forest(model)
+        if compiled is not None:
+            return compiled.predict_proba(X)
+    return model.predict_proba(X)
@@ -1,36 +1,52 @@
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
+import numpy as np
+from ..config.feature_config import get_keyword_lists
+from ..metrics import timed
+
+# Column order of the tuple returned by extract_all_features_from_video
+FEATURE_TUPLE_FIELDS = [
+    'title_length', 'description_length', 'view_like_ratio', 'engagement_score',
+    'has_tutorial_keywords', 'has_time_constraint', 'has_beginner_keywords',
+    'has_tech_keywords', 'has_project_keywords', 'title_sentiment'
+]
 
 def calculate_basic_video_metrics(video: Dict) -> Tuple:
     title_length = len(video['title'])
     description_length = len(video['description'])
-    view_like_ratio = video['like_count'] / max(video['view_count'], 1)
-    engagement_score = (video['like_count'] + video['comment_count']) / max(video['view_count'], 1)
+    view_like_ratio, engagement_score = calculate_engagement_metrics(
+        video['view_count'], video['like_count'], video['comment_count']
+    )
 
     return (title_length, description_length, view_like_ratio, engagement_score)
 
+def calculate_engagement_metrics(view_count: int, like_count: int, comment_count: int) -> Tuple:
+    """The feature columns derived from statistics, i.e. the ones a stats refresh changes"""
+    view_like_ratio = like_count / max(view_count, 1)
+    engagement_score = (like_count + comment_count) / max(view_count, 1)
+
+    return (view_like_ratio, engagement_score)
+
 def detect_keyword_features_in_video(title: str, description: str) -> Tuple:
-    tutorial_keywords = ['tutorial', 'learn', 'course', 'guide', 'how to', 'explained', 'walkthrough']
-    time_keywords = ['24 hours', '1 day', '1 hour', 'minutes', 'seconds', 'crash course', 'quick', 'fast']
-    beginner_keywords = ['beginner', 'start', 'basics', 'introduction', 'getting started', 'first time', 'new to']
-    tech_keywords = ['ai', 'artificial intelligence', 'machine learning', 'neural network', 'coding', 'programming', 'tech']
-    project_keywords = ['challenge', 'build', 'create', 'project', 'diy', 'make', 'workout', 'routine', 'recipe']
-
-    has_tutorial = any(kw in title.lower() or kw in description.lower() for kw in tutorial_keywords)
-    has_time_constraint = any(kw in title.lower() for kw in time_keywords)
-    has_beginner = any(kw in title.lower() or kw in description.lower() for kw in beginner_keywords)
-    has_tech = any(kw in title.lower() or kw in description.lower() for kw in tech_keywords)
-    has_project = any(kw in title.lower() for kw in project_keywords)
+    keywords = get_keyword_lists()
+    title = title.lower()
+    description = description.lower()
+
+    has_tutorial = any(kw in title or kw in description for kw in keywords['tutorial'])
+    has_time_constraint = any(kw in title for kw in keywords['time_constraint'])
+    has_beginner = any(kw in title or kw in description for kw in keywords['beginner'])
+    has_tech = any(kw in title or kw in description for kw in keywords['tech'])
+    has_project = any(kw in title for kw in keywords['project'])
 
     return (has_tutorial, has_time_constraint, has_beginner, has_tech, has_project)
 
 def calculate_title_sentiment_score(title: str) -> float:
-    positive_words = ['amazing', 'best', 'awesome', 'great', 'perfect', 'love', 'incredible']
-    negative_words = ['hard', 'difficult', 'impossible', 'failed', 'broke', 'wrong']
+    keywords = get_keyword_lists()
 
-    positive_count = sum(1 for word in positive_words if word in title)
-    negative_count = sum(1 for word in negative_words if word in title)
+    positive_count = sum(1 for word in keywords['positive'] if word in title)
+    negative_count = sum(1 for word in keywords['negative'] if word in title)
     return positive_count - negative_count
 
+@timed('features.extract_one')
 def extract_all_features_from_video(video: Dict) -> Tuple:
     title = video['title'].lower()
     description = video['description'].lower()
@@ -39,4 +55,53 @@ def extract_all_features_from_video(video: Dict) -> Tuple:
     keyword_features = detect_keyword_features_in_video(title, description)
     sentiment_score = calculate_title_sentiment_score(title)
 
-    return basic_metrics + keyword_features + (sentiment_score,)
\ No newline at end of file
+    return basic_metrics + keyword_features + (sentiment_score,)
+
+@timed('features.extract_batch')
+def extract_features_batch(videos: List[Dict]) -> np.ndarray:
+    """Extract features for many videos at once.
+
+    Returns a float64 matrix with one row per video in FEATURE_TUPLE_FIELDS order;
+    each row equals the tuple from extract_all_features_from_video.
+    """
+    matrix = np.zeros((len(videos), len(FEATURE_TUPLE_FIELDS)), dtype=np.float64)
+    if not videos:
+        return matrix
+
+    views = np.array([video['view_count'] for video in videos], dtype=np.int64)
+    likes = np.array([video['like_count'] for video in videos], dtype=np.int64)
+    comments = np.array([video['comment_count'] for video in videos], dtype=np.int64)
+    views = np.maximum(views, 1)
+
+    matrix[:, 0] = [len(video['title']) for video in videos]
+    matrix[:, 1] = [len(video['description']) for video in videos]
+    matrix[:, 2] = likes / views
+    matrix[:, 3] = (likes + comments) / views
+
+    keywords = get_keyword_lists()
+    tutorial = keywords['tutorial']
+    time_constraint = keywords['time_constraint']
+    beginner = keywords['beginner']
+    tech = keywords['tech']
+    project = keywords['project']
+    positive = keywords['positive']
+    negative = keywords['negative']
+
+    # Substring tests run in C and stop at the first hit, which beats a regex
+    # scan for a few dozen keywords; rows are collected and written in one go
+    keyword_rows = []
+    for video in videos:
+        title = video['title'].lower()
+        # NUL never occurs in keywords, so no match can straddle title and description
+        both = title + '\0' + video['description'].lower()
+        keyword_rows.append((
+            any(kw in both for kw in tutorial),
+            any(kw in title for kw in time_constraint),
+            any(kw in both for kw in beginner),
+            any(kw in both for kw in tech),
+            any(kw in title for kw in project),
+            sum(1 for word in positive if word in title) - sum(1 for word in negative if word in title)
+        ))
+    matrix[:, 4:] = keyword_rows
+
+    return matrix
@@ -0,0 +1,270 @@
+"""
+Feature Store
+Keeps FEATURE_COLUMNS as a contiguous float32 matrix in memory-mapped files, aligned to video IDs
+
+Every process that maps the same directory shares one copy of the matrix through the
+page cache, and slices of it can go straight into sklearn (trees predict in float32)
+without any conversion.
+"""
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .model_training import FEATURE_COLUMNS
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+DEFAULT_FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', 'feature_store')
+STORE_FORMAT_VERSION = 1
+MAX_VIDEO_ID_LENGTH = 16
+MIN_CAPACITY = 1024
+
+FEATURES_FILE = 'features.f32'
+IDS_FILE = 'ids.u16'
+VALID_FILE = 'valid.u8'
+META_FILE = 'meta.json'
+LOCK_FILE = '.lock'
+
+
+class FeatureStore:
+    """Append-only rows of (video ID, float32 features, valid flag); re-saving an ID overwrites its row"""
+
+    def __init__(self, directory: str, columns: Sequence[str] = FEATURE_COLUMNS):
+        self.directory = directory
+        self.columns = list(columns)
+        self.width = len(self.columns)
+        self._lock = threading.RLock()
+        self._meta = None
+        self._meta_mtime = None
+        self._features = None
+        self._ids = None
+        self._valid = None
+        self._rows_by_id = None
+
+    @property
+    def meta(self) -> Optional[Dict]:
+        with self._lock:
+            self._reload_if_changed()
+            return dict(self._meta) if self._meta else None
+
+    def exists(self) -> bool:
+        return self.meta is not None
+
+    def __len__(self) -> int:
+        meta = self.meta
+        return meta['rows'] if meta else 0
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Zero-copy (ids, features, valid) views of the stored rows
+
+        The arrays are backed by the mapped files; rows written later by any process
+        show up on the next call.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            rows = self._meta['rows'] if self._meta else 0
+            if not rows:
+                return (np.empty(0, dtype=f'<U{MAX_VIDEO_ID_LENGTH}'),
+                        np.empty((0, self.width), dtype=np.float32), np.empty(0, dtype=bool))
+            return self._ids[:rows], self._features[:rows], self._valid[:rows].view(bool)
+
+    def take(self, video_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Features for the given IDs in order (a copy) and a mask of which IDs had valid rows"""
+        with self._lock:
+            self._reload_if_changed()
+            rows_by_id = self._index()
+            rows = np.array([rows_by_id.get(video_id, -1) for video_id in video_ids], dtype=np.int64)
+            found = rows >= 0
+            features = np.zeros((len(rows), self.width), dtype=np.float32)
+            if found.any():
+                features[found] = self._features[rows[found]]
+                found[found] = self._valid[rows[found]].view(bool)
+            return features, found
+
+    def upsert(self, video_ids: Sequence[str], features, source_updates: Optional[Dict] = None) -> int:
+        """Write rows for video_ids, appending unknown IDs; returns how many rows were appended"""
+        matrix = np.asarray(features, dtype=np.float32).reshape(len(video_ids), self.width)
+        with self._write_lock():
+            if self._meta is None:
+                self._create(MIN_CAPACITY, source={})
+            rows_by_id = self._index()
+
+            rows = np.empty(len(video_ids), dtype=np.int64)
+            appended = 0
+            next_row = self._meta['rows']
+            for position, video_id in enumerate(video_ids):
+                row = rows_by_id.get(video_id)
+                if row is None:
+                    if len(video_id) > MAX_VIDEO_ID_LENGTH:
+                        raise ValueError(f"Video ID {video_id!r} is longer than {MAX_VIDEO_ID_LENGTH} characters")
+                    row = rows_by_id[video_id] = next_row + appended
+                    appended += 1
+                rows[position] = row
+
+            if next_row + appended > self._meta['capacity']:
+                self._grow(next_row + appended)
+
+            self._features[rows] = matrix
+            self._ids[rows] = video_ids
+            self._valid[rows] = np.isfinite(matrix).all(axis=1)
+
+            meta = dict(self._meta, rows=next_row + appended)
+            source = dict(meta.get('source') or {})
+            if 'feature_rows' in source:
+                source['feature_rows'] += appended
+            source.update(source_updates or {})
+            meta['source'] = source
+            self._flush()
+            self._write_meta(meta)
+            return appended
+
+    def rebuild(self, chunks: Iterable[Tuple[List[str], np.ndarray]], expected_rows: int, source: Dict) -> int:
+        """Replace the whole store with rows streamed from chunks; readers keep their old mapping until swapped"""
+        with self._write_lock():
+            os.makedirs(self.directory, exist_ok=True)
+            capacity = max(MIN_CAPACITY, int(expected_rows * 1.25))
+            suffix = f'.rebuild-{os.getpid()}'
+            features = self._map_file(FEATURES_FILE + suffix, np.float32, (capacity, self.width), create=True)
+            ids = self._map_file(IDS_FILE + suffix, f'<U{MAX_VIDEO_ID_LENGTH}', (capacity,), create=True)
+            valid = self._map_file(VALID_FILE + suffix, np.uint8, (capacity,), create=True)
+
+            rows = 0
+            for video_ids, matrix in chunks:
+                end = rows + len(video_ids)
+                if end > capacity:
+                    raise RuntimeError("Feature rows changed during rebuild; run it again")
+                features[rows:end] = matrix
+                ids[rows:end] = video_ids
+                valid[rows:end] = np.isfinite(features[rows:end]).all(axis=1)
+                rows = end
+
+            for array in (features, ids, valid):
+                array.flush()
+            del features, ids, valid
+            for name in (FEATURES_FILE, IDS_FILE, VALID_FILE):
+                os.replace(os.path.join(self.directory, name + suffix), os.path.join(self.directory, name))
+
+            self._rows_by_id = None
+            self._write_meta(self._new_meta(rows, capacity, source))
+            self._map_all()
+            return rows
+
+    def _index(self) -> Dict[str, int]:
+        # Built on first lookup only; pure readers of view() never pay for it
+        if self._rows_by_id is None:
+            rows = self._meta['rows'] if self._meta else 0
+            self._rows_by_id = {video_id: row for row, video_id in enumerate(self._ids[:rows].tolist())} if rows else {}
+        return self._rows_by_id
+
+    def _create(self, capacity: int, source: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        self._map_file(FEATURES_FILE, np.float32, (capacity, self.width), create=True)
+        self._map_file(IDS_FILE, f'<U{MAX_VIDEO_ID_LENGTH}', (capacity,), create=True)
+        self._map_file(VALID_FILE, np.uint8, (capacity,), create=True)
+        self._write_meta(self._new_meta(0, capacity, source))
+        self._map_all()
+
+    def _grow(self, needed_rows: int):
+        # Files grow in place (doubling), so existing rows are never copied
+        capacity = self._meta['capacity']
+        while capacity < needed_rows:
+            capacity *= 2
+        self._flush()
+        for name, row_bytes in ((FEATURES_FILE, 4 * self.width), (IDS_FILE, 4 * MAX_VIDEO_ID_LENGTH), (VALID_FILE, 1)):
+            with open(os.path.join(self.directory, name), 'r+b') as f:
+                f.truncate(capacity * row_bytes)
+        self._meta = dict(self._meta, capacity=capacity)
+        self._map_all()
+
+    def _new_meta(self, rows: int, capacity: int, source: Dict) -> Dict:
+        # store_id changes whenever the data files are replaced, so other processes know to remap
+        return {
+            'format_version': STORE_FORMAT_VERSION,
+            'store_id': uuid.uuid4().hex,
+            'columns': self.columns,
+            'rows': rows,
+            'capacity': capacity,
+            'source': source,
+            'updated_at': datetime.now().isoformat()
+        }
+
+    def _write_meta(self, meta: Dict):
+        meta = dict(meta, updated_at=datetime.now().isoformat())
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(path + '.tmp', path)
+        self._meta = meta
+        self._meta_mtime = _file_stamp(path)
+
+    def _reload_if_changed(self):
+        """Pick up rows, growth or a rebuild written by another process"""
+        path = os.path.join(self.directory, META_FILE)
+        try:
+            mtime = _file_stamp(path)
+        except FileNotFoundError:
+            self._meta = self._features = self._ids = self._valid = self._rows_by_id = None
+            return
+        if mtime == self._meta_mtime and self._features is not None:
+            return
+
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != STORE_FORMAT_VERSION or meta.get('columns') != self.columns:
+            # Written by another version of the feature set; treat as missing so it gets rebuilt
+            self._meta = self._features = self._ids = self._valid = self._rows_by_id = None
+            self._meta_mtime = mtime
+            return
+
+        previous = self._meta
+        self._meta = meta
+        self._meta_mtime = mtime
+        if (previous is None or self._features is None or previous['capacity'] != meta['capacity']
+                or previous.get('store_id') != meta.get('store_id')):
+            # Grown in place, or rebuilt into new files at any capacity; the old mapping would
+            # keep pointing at the unlinked files
+            self._map_all()
+        # Another writer may have appended or rebuilt; redo the ID lookup lazily
+        self._rows_by_id = None
+
+    def _map_all(self):
+        capacity = self._meta['capacity']
+        self._features = self._map_file(FEATURES_FILE, np.float32, (capacity, self.width))
+        self._ids = self._map_file(IDS_FILE, f'<U{MAX_VIDEO_ID_LENGTH}', (capacity,))
+        self._valid = self._map_file(VALID_FILE, np.uint8, (capacity,))
+
+    def _map_file(self, name: str, dtype, shape: Tuple, create: bool = False) -> np.memmap:
+        return np.memmap(os.path.join(self.directory, name), dtype=dtype, shape=shape,
+                         mode='w+' if create else 'r+')
+
+    def _flush(self):
+        for array in (self._features, self._ids, self._valid):
+            if array is not None:
+                array.flush()
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._reload_if_changed()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    # Meta is replaced, never rewritten, so a new inode also marks a change within one mtime tick
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import joblib
+import pandas as pd
+import sklearn
+from ..database.migrations import DEFAULT_USER_ID
+from .model_training import FEATURE_COLUMNS
+
+DEFAULT_MODEL_DIR = os.getenv('MODEL_DIR', 'models')
+
+def get_user_model_dir(model_dir: str, user_id: str = DEFAULT_USER_ID) -> str:
+    """Artifacts of the default user stay in model_dir itself; everyone else gets users/<user_id>"""
+    if user_id == DEFAULT_USER_ID:
+        return model_dir
+    return os.path.join(model_dir, 'users', user_id)
+
+def compute_training_fingerprint(training_data: pd.DataFrame) -> str:
+    """Hash the training set so a saved model can be matched to the data it was fit on"""
+    columns = ['video_id'] + FEATURE_COLUMNS + ['liked']
+    rows = training_data[columns].sort_values(['video_id', 'liked']).reset_index(drop=True)
+    digest = hashlib.sha256(','.join(columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(rows, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def save_model_artifact(model, fingerprint: str, generation: int, training_rows: int,
+                        model_dir: str = DEFAULT_MODEL_DIR) -> Dict:
+    """Write a trained model and its metadata to the model directory"""
+    directory = Path(model_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    version = f"{generation:06d}-{fingerprint[:12]}"
+    metadata = {
+        'version': version,
+        'generation': generation,
+        'fingerprint': fingerprint,
+        'feature_columns': FEATURE_COLUMNS,
+        'sklearn_version': sklearn.__version__,
+        'model_class': type(model).__name__,
+        'training_rows': training_rows,
+        'trained_at': datetime.now().isoformat(),
+        'pinned': False
+    }
+
+    # Write to temp files first so a crash never leaves a half-written artifact behind
+    model_path = directory / f"{version}.joblib"
+    tmp_model_path = directory / f"{version}.joblib.tmp"
+    joblib.dump(model, tmp_model_path)
+    os.replace(tmp_model_path, model_path)
+    _write_metadata(directory / f"{version}.json", metadata)
+
+    return metadata
+
+def list_model_artifacts(model_dir: str = DEFAULT_MODEL_DIR) -> List[Dict]:
+    """List saved model artifacts, newest generation first"""
+    directory = Path(model_dir)
+    if not directory.exists():
+        return []
+
+    artifacts = []
+    for metadata_path in directory.glob('*.json'):
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Skipping unreadable model metadata {metadata_path}: {e}")
+            continue
+        if (directory / f"{metadata['version']}.joblib").exists():
+            artifacts.append(metadata)
+
+    return sorted(artifacts, key=lambda m: m['generation'], reverse=True)
+
+def find_model_artifact(fingerprint: str, model_dir: str = DEFAULT_MODEL_DIR,
+                        model_class: Optional[str] = None) -> Optional[Dict]:
+    """Find the newest artifact trained on this exact data with a compatible setup"""
+    for metadata in list_model_artifacts(model_dir):
+        if (metadata['fingerprint'] == fingerprint
+                and metadata['feature_columns'] == FEATURE_COLUMNS
+                and metadata['sklearn_version'] == sklearn.__version__
+                and (model_class is None or metadata.get('model_class') == model_class)):
+            return metadata
+    return None
+
+def get_latest_generation(model_dir: str = DEFAULT_MODEL_DIR) -> int:
+    """Get the highest generation number saved so far"""
+    artifacts = list_model_artifacts(model_dir)
+    return artifacts[0]['generation'] if artifacts else 0
+
+def load_model_artifact(version: str, model_dir: str = DEFAULT_MODEL_DIR):
+    """Load a saved model by version"""
+    return joblib.load(Path(model_dir) / f"{version}.joblib")
+
+def pin_model_artifact(version: str, pinned: bool = True, model_dir: str = DEFAULT_MODEL_DIR) -> bool:
+    """Pin (or unpin) a model version so pruning never deletes it"""
+    metadata_path = Path(model_dir) / f"{version}.json"
+    if not metadata_path.exists():
+        return False
+
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    metadata['pinned'] = pinned
+    _write_metadata(metadata_path, metadata)
+    return True
+
+def prune_model_artifacts(keep: int = 5, model_dir: str = DEFAULT_MODEL_DIR) -> List[str]:
+    """Delete all but the newest `keep` unpinned artifacts, returning removed versions"""
+    unpinned = [m for m in list_model_artifacts(model_dir) if not m.get('pinned')]
+
+    removed = []
+    for metadata in unpinned[keep:]:
+        for suffix in ('.joblib', '.json'):
+            path = Path(model_dir) / f"{metadata['version']}{suffix}"
+            if path.exists():
+                path.unlink()
+        removed.append(metadata['version'])
+    return removed
+
+def _write_metadata(path: Path, metadata: Dict):
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
@@ -1,23 +1,94 @@
+import os
+from typing import Optional
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+import numpy as np
 import pandas as pd
+from ..metrics import stage_timer
 
-def create_recommendation_model():
+FEATURE_COLUMNS = [
+    'title_length', 'description_length', 'view_like_ratio', 'engagement_score',
+    'title_sentiment', 'has_tutorial_keywords', 'has_time_constraint',
+    'has_beginner_keywords', 'has_tech_keywords', 'has_project_keywords'
+]
+
+# 'forest' refits a random forest on every retrain; 'online' folds each rating into a linear model
+MODEL_TYPES = ('forest', 'online')
+DEFAULT_MODEL_TYPE = os.getenv('MODEL_TYPE', 'forest')
+
+class OnlineRecommendationModel:
+    """Logistic regression trained by SGD over features standardized with a running scaler
+
+    partial_fit costs the same for the 1st rating as for the 10,000th, so a new
+    rating can be learned on the request path; fit still retrains from scratch.
+    """
+
+    def __init__(self, alpha: float = 1e-2, random_state: int = 42):
+        self.alpha = alpha
+        self.random_state = random_state
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+
+    @property
+    def classes_(self):
+        return self.classifier.classes_
+
+    def fit(self, X, y):
+        self.scaler = StandardScaler().fit(X)
+        self.classifier = SGDClassifier(loss='log_loss', alpha=self.alpha, random_state=self.random_state)
+        self.classifier.fit(self.scaler.transform(X), np.asarray(y, dtype=int))
+        return self
+
+    def partial_fit(self, X, y):
+        self.scaler.partial_fit(X)
+        self.classifier.partial_fit(self.scaler.transform(X), np.asarray(y, dtype=int), classes=[0, 1])
+        return self
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.classifier.predict_proba(self.scaler.transform(X))
+
+def get_model_class(model_type: Optional[str] = None):
+    model_type = model_type or DEFAULT_MODEL_TYPE
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"Unknown model type {model_type!r} (use one of {', '.join(MODEL_TYPES)})")
+    return OnlineRecommendationModel if model_type == 'online' else RandomForestClassifier
+
+def create_recommendation_model(model_type: Optional[str] = None):
+    if get_model_class(model_type) is OnlineRecommendationModel:
+        return OnlineRecommendationModel()
     return RandomForestClassifier(n_estimators=100, random_state=42)
 
-def train_model_on_user_preferences(model, training_data: pd.DataFrame) -> bool:
+def supports_online_updates(model) -> bool:
+    return hasattr(model, 'partial_fit')
+
+def train_model_on_user_preferences(model, training_data: pd.DataFrame,
+                                    features: Optional[np.ndarray] = None) -> bool:
+    """Fit on training_data; features (e.g. rows from the feature store) replaces its feature columns"""
     if len(training_data) < 10:
         print("Need at least 10 rated videos to train model")
         return False
+    if training_data['liked'].nunique() < 2:
+        print("Need both liked and disliked videos to train model")
+        return False
 
-    feature_columns = [
-        'title_length', 'description_length', 'view_like_ratio', 'engagement_score',
-        'title_sentiment', 'has_tutorial_keywords', 'has_time_constraint',
-        'has_beginner_keywords', 'has_tech_keywords', 'has_project_keywords'
-    ]
-
-    X = training_data[feature_columns]
+    X = training_data[FEATURE_COLUMNS] if features is None else as_model_input(features)
     y = training_data['liked']
 
-    model.fit(X, y)
+    with stage_timer('model.fit'):
+        model.fit(X, y)
     print(f"Model trained on {len(training_data)} rated videos")
-    return True
\ No newline at end of file
+    return True
+
+def update_model_with_ratings(model, features: np.ndarray, liked) -> bool:
+    """Fold a few new ratings into an online model in place"""
+    if not supports_online_updates(model) or not len(features):
+        return False
+
+    with stage_timer('model.partial_fit'):
+        model.partial_fit(as_model_input(features), liked)
+    return True
+
+def as_model_input(features: np.ndarray) -> pd.DataFrame:
+    """Name a FEATURE_COLUMNS matrix for sklearn without copying it (float32 rows stay float32)"""
+    return pd.DataFrame(features, columns=FEATURE_COLUMNS, copy=False)
@@ -1,33 +1,94 @@
-from typing import List, Dict
+import heapq
+from typing import Iterable, List, Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
+from ..metrics import stage_timer
+from .compiled_forest import predict_proba_fast
+from .model_training import FEATURE_COLUMNS, as_model_input
 
-def predict_video_preferences_with_model(model, video_features: pd.DataFrame) -> List[Dict]:
+def like_probabilities(model, X) -> np.ndarray:
+    """Probability of the liked class for each row of X
+
+    The column comes from model.classes_; a model fitted on only likes (or only
+    dislikes) has a single column, so every row gets 1.0 (or 0.0).
+    """
+    classes = list(model.classes_)
+    if len(classes) == 1:
+        return np.full(len(X), 1.0 if classes[0] == 1 else 0.0)
+    return predict_proba_fast(model, X)[:, classes.index(1)]
+
+def predict_video_preferences_with_model(model, video_features: pd.DataFrame, limit: int = 10,
+                                         features: Optional[np.ndarray] = None) -> List[Dict]:
+    """Top videos from video_features; features (e.g. feature store rows) replaces its feature columns"""
     if video_features.empty:
         return []
 
-    feature_columns = [
-        'title_length', 'description_length', 'view_like_ratio', 'engagement_score',
-        'title_sentiment', 'has_tutorial_keywords', 'has_time_constraint',
-        'has_beginner_keywords', 'has_tech_keywords', 'has_project_keywords'
-    ]
+    X = video_features[FEATURE_COLUMNS] if features is None else as_model_input(features)
+    with stage_timer('model.predict_proba'):
+        probabilities = like_probabilities(model, X)
 
-    X = video_features[feature_columns]
-    probabilities = model.predict_proba(X)[:, 1]
-    
-    video_features_copy = video_features.copy()
-    video_features_copy['like_probability'] = probabilities
-
-    top_videos = video_features_copy.nlargest(10, 'like_probability')
+    # Only the winning rows are turned into dicts; no frame copy or iterrows
+    top_indexes = _top_indexes(probabilities, limit)
+    top_videos = video_features.iloc[top_indexes]
 
     recommendations = []
-    for _, row in top_videos.iterrows():
+    for video_id, title, channel_name, view_count, probability in zip(
+            top_videos['id'], top_videos['title'], top_videos['channel_name'],
+            top_videos['view_count'], probabilities[top_indexes]):
         recommendations.append({
-            'id': row['id'],
-            'title': row['title'],
-            'channel_name': row['channel_name'],
-            'view_count': row['view_count'],
-            'url': f"https://www.youtube.com/watch?v={row['id']}",
-            'like_probability': row['like_probability']
+            'id': video_id,
+            'title': title,
+            'channel_name': channel_name,
+            'view_count': view_count,
+            'url': f"https://www.youtube.com/watch?v={video_id}",
+            'like_probability': float(probability)
         })
 
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+def score_videos_with_model(model, video_features: pd.DataFrame) -> List[Tuple[str, float]]:
+    if video_features.empty:
+        return []
+
+    with stage_timer('model.predict_proba'):
+        probabilities = like_probabilities(model, video_features[FEATURE_COLUMNS])
+    return list(zip(video_features['video_id'].tolist(), probabilities.tolist()))
+
+def score_feature_matrix_with_model(model, features: np.ndarray) -> np.ndarray:
+    """Like probabilities for a raw FEATURE_COLUMNS matrix"""
+    if not len(features):
+        return np.empty(0)
+
+    # Keep the column names the model was fitted with; wrapping the array doesn't copy it
+    with stage_timer('model.predict_proba'):
+        return like_probabilities(model, as_model_input(features))
+
+def top_k_scores_from_chunks(model, chunks: Iterable[Tuple[List[str], np.ndarray]],
+                             k: int) -> List[Tuple[str, float]]:
+    """Score (video IDs, features) chunks one at a time, keeping only the k most likely videos
+
+    Memory stays at one chunk plus k candidates no matter how many videos stream
+    through. Ties are broken by video ID so results are deterministic.
+    """
+    if k <= 0:
+        return []
+
+    best = []  # min-heap of (probability, video_id)
+    for video_ids, features in chunks:
+        probabilities = score_feature_matrix_with_model(model, features)
+        for index in _top_indexes(probabilities, k):
+            entry = (float(probabilities[index]), video_ids[index])
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+    return [(video_id, probability) for probability, video_id in sorted(best, reverse=True)]
+
+def _top_indexes(probabilities: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k largest probabilities, best first; earlier rows win ties like nlargest"""
+    if len(probabilities) > k:
+        candidates = np.argpartition(-probabilities, k - 1)[:k]
+    else:
+        candidates = np.arange(len(probabilities))
+    return candidates[np.lexsort((candidates, -probabilities[candidates]))]
@@ -0,0 +1,95 @@
+"""
+Feature Store Service
+Keeps the memory-mapped feature store for a database in step with video_features
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+from ..database.score_operations import (
+    get_feature_source_signature_from_database,
+    get_video_features_from_database,
+    iter_video_feature_chunks_from_database
+)
+from ..ml.feature_store import DEFAULT_FEATURE_STORE_DIR, FeatureStore
+from ..ml.model_training import FEATURE_COLUMNS
+
+REBUILD_CHUNK_SIZE = 20000
+
+_stores: Dict[str, FeatureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_feature_store_directory(db_path: str, base_dir: str = DEFAULT_FEATURE_STORE_DIR) -> str:
+    """One store per database file, so benchmarks and test databases never share rows"""
+    absolute = os.path.abspath(db_path)
+    stem = os.path.splitext(os.path.basename(absolute))[0]
+    return os.path.join(base_dir, f"{stem}-{hashlib.sha1(absolute.encode('utf-8')).hexdigest()[:8]}")
+
+
+def get_feature_store(db_path: str, base_dir: Optional[str] = DEFAULT_FEATURE_STORE_DIR) -> Optional[FeatureStore]:
+    """Get the process-wide store for a database, rebuilt if it has drifted; None when disabled"""
+    if not base_dir:
+        return None
+
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = FeatureStore(get_feature_store_directory(db_path, base_dir))
+
+    ensure_feature_store_current(store, db_path)
+    return store
+
+
+def ensure_feature_store_current(store: FeatureStore, db_path: str) -> bool:
+    """Rebuild the store when rows were written to SQLite behind its back; returns True if rebuilt"""
+    signature = get_feature_source_signature_from_database(db_path)
+    meta = store.meta
+    if meta is not None and {key: meta['source'].get(key) for key in signature} == signature:
+        return False
+
+    rebuild_feature_store(db_path, store, signature)
+    return True
+
+
+def rebuild_feature_store(db_path: str, store: Optional[FeatureStore] = None,
+                          signature: Optional[Dict] = None) -> int:
+    """Stream video_features into a fresh store"""
+    if store is None:
+        store = FeatureStore(get_feature_store_directory(db_path))
+    if signature is None:
+        signature = get_feature_source_signature_from_database(db_path)
+    chunks = iter_video_feature_chunks_from_database(db_path, FEATURE_COLUMNS, REBUILD_CHUNK_SIZE)
+    rows = store.rebuild(chunks, signature['feature_rows'], dict(signature, db_path=os.path.abspath(db_path)))
+    print(f"🗂️  Rebuilt feature store with {rows} videos in {store.directory}/")
+    return rows
+
+
+def update_feature_store(db_path: str, video_ids: Sequence[str], features,
+                         stats_refreshed_at: Optional[str] = None) -> int:
+    """Write freshly saved feature rows through to the store, if this process has one open"""
+    store = _stores.get(db_path)
+    if store is None or not video_ids:
+        return 0
+
+    source_updates = {'stats_refreshed_at': stats_refreshed_at} if stats_refreshed_at else None
+    try:
+        return store.upsert(list(video_ids), features, source_updates)
+    except Exception as e:
+        # SQLite stays the source of truth; the signature check rebuilds the store later
+        print(f"Warning: Could not update feature store: {e}")
+        return 0
+
+
+def refresh_feature_store_rows(db_path: str, video_ids: List[str], stats_refreshed_at: Optional[str] = None) -> int:
+    """Re-read rows whose features changed in SQLite (e.g. after a stats refresh) into the store"""
+    if db_path not in _stores or not video_ids:
+        return 0
+
+    video_features = get_video_features_from_database(db_path, video_ids)
+    if video_features.empty:
+        return 0
+    return update_feature_store(
+        db_path, video_features['video_id'].tolist(),
+        video_features[FEATURE_COLUMNS].to_numpy(dtype='float32'), stats_refreshed_at
+    )
@@ -0,0 +1,60 @@
+"""
+Ingest Service
+Turns harvested videos into video and feature rows with one bulk write
+"""
+import os
+from typing import List, Dict, Iterable, Optional, Callable
+from ..database.video_operations import bulk_save_videos_with_features_to_database
+from ..ml.feature_extraction import extract_features_batch
+from .feature_store_service import update_feature_store
+from .known_videos import remember_known_videos
+
+DEFAULT_INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+
+
+def ingest_videos(videos: List[Dict], db_path: str,
+                  batch_size: int = DEFAULT_INGEST_BATCH_SIZE) -> Dict[str, int]:
+    """Extract features for all videos and save everything in one transaction"""
+    if not videos:
+        return {'inserted': 0, 'updated': 0}
+
+    features = extract_features_batch(videos)
+    counts = bulk_save_videos_with_features_to_database(videos, features.tolist(), db_path, batch_size)
+    remember_known_videos(db_path, (video['id'] for video in videos))
+    update_feature_store(db_path, [video['id'] for video in videos], features)
+    return counts
+
+
+def ingest_video_stream(videos: Iterable[Dict], db_path: str,
+                        batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+                        on_batch: Optional[Callable[[List[str]], None]] = None) -> Dict:
+    """Ingest videos from an iterator batch by batch, so memory stays flat
+
+    Duplicate IDs across the stream are saved once. on_batch receives the IDs of
+    each committed batch, e.g. to score them incrementally.
+    """
+    totals = {'inserted': 0, 'updated': 0, 'video_ids': []}
+    seen_ids = set()
+    batch = []
+
+    def flush():
+        counts = ingest_videos(batch, db_path, batch_size)
+        totals['inserted'] += counts['inserted']
+        totals['updated'] += counts['updated']
+        batch_ids = [video['id'] for video in batch]
+        totals['video_ids'].extend(batch_ids)
+        if on_batch is not None:
+            on_batch(batch_ids)
+        batch.clear()
+
+    for video in videos:
+        if video['id'] in seen_ids:
+            continue
+        seen_ids.add(video['id'])
+        batch.append(video)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return totals
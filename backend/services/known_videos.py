@@ -0,0 +1,61 @@
+"""
+Known Video Index
+In-memory set of video IDs already stored, used to skip redundant detail lookups
+"""
+import threading
+from typing import Dict, Iterable, List
+from ..database.video_operations import get_all_video_ids_from_database
+
+
+class KnownVideoIndex:
+    """Membership layer over videos.id, loaded once and kept current on insert"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._ids = set()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self):
+        ids = get_all_video_ids_from_database(self.db_path)
+        with self._lock:
+            self._ids.update(ids)
+            self.loaded = True
+
+    def add_many(self, video_ids: Iterable[str]):
+        with self._lock:
+            self._ids.update(video_ids)
+
+    def filter_unknown(self, video_ids: List[str]) -> List[str]:
+        """Keep only IDs that are not stored yet, preserving order"""
+        with self._lock:
+            return [video_id for video_id in video_ids if video_id not in self._ids]
+
+    def __contains__(self, video_id: str) -> bool:
+        with self._lock:
+            return video_id in self._ids
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+
+_indexes: Dict[str, KnownVideoIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_known_video_index(db_path: str) -> KnownVideoIndex:
+    """Get the process-wide index for a database, loading it on first use"""
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = _indexes[db_path] = KnownVideoIndex(db_path)
+            index.load()
+        return index
+
+
+def remember_known_videos(db_path: str, video_ids: Iterable[str]):
+    """Record newly saved IDs in the index, if this process has one loaded"""
+    index = _indexes.get(db_path)
+    if index is not None:
+        index.add_many(video_ids)
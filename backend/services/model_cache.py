@@ -0,0 +1,133 @@
+"""
+Model Cache
+Bounded in-memory LRU of per-user models keyed by (user ID, model generation)
+
+Models are evicted least recently used first once either the count or the estimated
+byte budget is exceeded, and loaded again lazily (usually from their saved artifact)
+the next time their user needs them. Publishing a new generation drops the user's
+older ones right away.
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from ..metrics import MODEL_CACHE_BYTES, MODEL_CACHE_ENTRIES, MODEL_CACHE_EVICTIONS, MODEL_CACHE_LOOKUPS
+from ..ml.compiled_forest import estimate_compiled_bytes
+
+DEFAULT_MAX_MODELS = int(os.getenv('MODEL_CACHE_MAX_MODELS', '32'))
+DEFAULT_MAX_BYTES = int(float(os.getenv('MODEL_CACHE_MAX_MB', '512')) * 1024 * 1024)
+
+CacheKey = Tuple[str, int]
+
+
+def estimate_model_bytes(model) -> int:
+    """Rough resident size: the pickled model plus the compiled copy small batches build from it"""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) + estimate_compiled_bytes(model)
+
+
+class ModelCache:
+    """Thread-safe LRU of models; concurrent misses on one key share a single load"""
+
+    def __init__(self, max_models: int = DEFAULT_MAX_MODELS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (model, estimated bytes), least recently used first
+        self._bytes = 0
+        self._loading: Dict[CacheKey, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """The cached model for key, calling loader on a miss; None if the loader has nothing"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    MODEL_CACHE_LOOKUPS.inc(result='hit')
+                    return entry[0]
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    MODEL_CACHE_LOOKUPS.inc(result='miss')
+                    break
+            # Another thread is loading this model; use its result
+            loading.wait()
+
+        try:
+            model = loader()
+            if model is not None:
+                self.put(key, model)
+            return model
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def peek(self, key: CacheKey) -> Optional[Any]:
+        """The cached model without loading it or counting a lookup"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key: CacheKey, model, replace: bool = False) -> bool:
+        """Cache a model, dropping its user's older generations; False if a newer one is cached
+
+        replace=True drops the user's other generations whatever their number, for a
+        model that has just been published.
+        """
+        user_id, generation = key
+        size = estimate_model_bytes(model)
+        with self._lock:
+            for other in [other for other in self._entries if other[0] == user_id and other != key]:
+                if other[1] > generation and not replace:
+                    # A late load of a superseded generation; serve it once but don't keep it
+                    return False
+                self._remove(other, 'superseded')
+
+            if key in self._entries:
+                self._bytes -= self._entries[key][1]
+            self._entries[key] = (model, size)
+            self._entries.move_to_end(key)
+            self._bytes += size
+
+            # The newest model always stays, even if it alone is over the byte budget
+            while len(self._entries) > 1 and (len(self._entries) > self.max_models or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest, 'count' if len(self._entries) > self.max_models else 'bytes')
+            self._update_gauges()
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_models': self.max_models,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'users': len({key[0] for key in self._entries})
+            }
+
+    def _remove(self, key: CacheKey, reason: str):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+        if reason in ('count', 'bytes'):
+            self.evictions += 1
+        MODEL_CACHE_EVICTIONS.inc(reason=reason)
+
+    def _update_gauges(self):
+        MODEL_CACHE_ENTRIES.set(len(self._entries))
+        MODEL_CACHE_BYTES.set(self._bytes)
@@ -0,0 +1,314 @@
+"""
+Background Model Trainer
+Debounces one user's rating bursts into a single retrain and publishes models by atomic swap
+"""
+import copy
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple, Any
+import numpy as np
+from ..database.migrations import DEFAULT_USER_ID
+from ..database.preference_operations import (
+    get_ratings_since_from_database,
+    get_training_data_from_database,
+    get_training_data_version_from_database
+)
+from ..ml.model_training import (
+    FEATURE_COLUMNS,
+    create_recommendation_model,
+    get_model_class,
+    supports_online_updates,
+    train_model_on_user_preferences,
+    update_model_with_ratings
+)
+from ..database.score_operations import get_scored_generation_from_database
+from ..ml.model_store import (
+    compute_training_fingerprint,
+    find_model_artifact,
+    get_latest_generation,
+    get_user_model_dir,
+    load_model_artifact,
+    save_model_artifact
+)
+from ..metrics import RETRAIN_DURATION, RETRAINS
+from .feature_store_service import ensure_feature_store_current
+from .model_cache import ModelCache
+from .scoring_service import rescore_all_videos
+
+# More new ratings than this at once are cheaper to learn with a full retrain
+MAX_ONLINE_BATCH = 50
+# An idle trainer's thread exits after this long; the next retrain request starts a new one
+IDLE_THREAD_SECONDS = 60.0
+
+
+class ModelSnapshot(NamedTuple):
+    """Immutable view of the currently published model; the model itself lives in the model cache"""
+    generation: int
+    data_version: Optional[Tuple[int, int]]
+    trained_at: Optional[str]
+    artifact: Optional[str]
+
+    @property
+    def has_model(self) -> bool:
+        return self.trained_at is not None
+
+
+class BackgroundModelTrainer:
+    """Retrains one user's recommendation model off the request path"""
+
+    def __init__(self, db_path: str, quiet_period: float = 2.0, rating_threshold: int = 5,
+                 model_dir: Optional[str] = None, feature_store=None, model_type: Optional[str] = None,
+                 full_retrain_every: int = 50, user_id: str = DEFAULT_USER_ID,
+                 model_cache: Optional[ModelCache] = None):
+        self.db_path = db_path
+        self.user_id = user_id
+        self.quiet_period = quiet_period
+        self.rating_threshold = rating_threshold
+        self.model_dir = get_user_model_dir(model_dir, user_id) if model_dir else None
+        self.feature_store = feature_store
+        self.model_type = model_type
+        # Online models still get a from-scratch fit after this many incremental updates
+        self.full_retrain_every = full_retrain_every
+        # Shared by every user's trainer so the total number of loaded models stays bounded
+        self.model_cache = model_cache if model_cache is not None else ModelCache(max_models=1)
+
+        # Readers only ever load this attribute; a retrain replaces it in one assignment
+        self.snapshot = ModelSnapshot(0, None, None, None)
+
+        self._condition = threading.Condition()
+        self._train_lock = threading.Lock()
+        self._pending = 0
+        self._last_request = 0.0
+        self._thread = None
+        self._stopping = False
+        self._online_updates = 0
+        self._force_full_retrain = False
+        self._rescore_pending = False
+
+    def schedule_retrain(self) -> int:
+        """Ask for a retrain; bursts of requests are merged into one fit"""
+        with self._condition:
+            self._pending += 1
+            self._last_request = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='model-trainer', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return self._pending
+
+    def train_now(self) -> bool:
+        """Retrain (or warm start from a saved artifact) before any request is served"""
+        return self._retrain()
+
+    def get_model(self, snapshot: Optional[ModelSnapshot] = None):
+        """The model behind snapshot (the published one by default), reloaded if it was evicted"""
+        snapshot = snapshot if snapshot is not None else self.snapshot
+        if not snapshot.has_model:
+            return None
+        return self.model_cache.get((self.user_id, snapshot.generation), lambda: self._reload_model(snapshot))
+
+    def update_online(self) -> bool:
+        """Fold ratings newer than the published model into it right away (online models only)
+
+        Publishes a copy, so readers never see a half-updated model. Returns False when
+        a full retrain is needed instead: no online model yet, a retrain is running,
+        too many new ratings piled up, or a rating replaced an earlier one (partial_fit
+        can't unlearn the old label). Either way call schedule_retrain() next; after an
+        online update it only refreshes the score table (or runs the periodic full fit).
+        """
+        current = self.snapshot
+        if (not current.has_model or current.data_version is None
+                or not supports_online_updates(get_model_class(self.model_type))):
+            return False
+        if not self._train_lock.acquire(blocking=False):
+            return False
+
+        try:
+            current = self.snapshot
+            ratings, version = get_ratings_since_from_database(
+                current.data_version[0], FEATURE_COLUMNS, MAX_ONLINE_BATCH, self.db_path, self.user_id
+            )
+            if len(ratings) > MAX_ONLINE_BATCH:
+                return False
+            if not ratings:
+                return version == current.data_version
+            if version[1] - current.data_version[1] < len(ratings):
+                # Re-rating replaces the old row, so fewer new rows than ratings means a label changed
+                return False
+
+            model = self.get_model(current)
+            if model is None:
+                return False
+            model = copy.deepcopy(model)
+            rows = np.array([rating[2:] for rating in ratings], dtype=np.float64)
+            update_model_with_ratings(model, rows, [rating[1] for rating in ratings])
+
+            # Online updates aren't saved; if evicted, this generation is refit from the ratings
+            self._publish(ModelSnapshot(current.generation + 1, version, datetime.now().isoformat(), None), model)
+            self._online_updates += len(ratings)
+            self._rescore_pending = True
+            if self.full_retrain_every and self._online_updates >= self.full_retrain_every:
+                self._force_full_retrain = True
+        finally:
+            self._train_lock.release()
+
+        RETRAINS.inc(outcome='online_update')
+        return True
+
+    def is_stale(self) -> bool:
+        """Check whether ratings changed since the published model was trained"""
+        version = get_training_data_version_from_database(self.db_path, self.user_id)
+        return version != self.snapshot.data_version
+
+    def stop(self, wait: bool = True):
+        """Stop the trainer thread once the current fit (if any) finishes; wait=False returns right away"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                idle_until = time.monotonic() + IDLE_THREAD_SECONDS
+                while not self._stopping and self._pending == 0:
+                    remaining = idle_until - time.monotonic()
+                    if remaining <= 0:
+                        # Many users rate rarely; don't keep a thread per user parked forever
+                        self._thread = None
+                        return
+                    self._condition.wait(remaining)
+
+                # Wait for a quiet period unless enough ratings have piled up
+                while not self._stopping and self._pending < self.rating_threshold:
+                    remaining = self._last_request + self.quiet_period - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                if self._stopping:
+                    return
+                self._pending = 0
+
+            try:
+                self._retrain()
+            except Exception as e:
+                print(f"Error retraining model for user {self.user_id}: {e}")
+
+    def _retrain(self) -> bool:
+        with self._train_lock:
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                published = self._retrain_locked()
+                outcome = 'published' if published else 'skipped'
+                return published
+            finally:
+                RETRAINS.inc(outcome=outcome)
+                if outcome == 'published':
+                    RETRAIN_DURATION.observe(time.perf_counter() - started)
+
+    def _retrain_locked(self) -> bool:
+        current = self.snapshot
+        version = get_training_data_version_from_database(self.db_path, self.user_id)
+        if version == current.data_version and not self._force_full_retrain:
+            if self._rescore_pending:
+                # An online update already published the model; bring the score table up to it
+                self._rescore_pending = False
+                model = self.get_model(current)
+                if model is not None:
+                    rescore_all_videos(model, current.generation, self.db_path, user_id=self.user_id,
+                                       feature_store=self._current_feature_store())
+            return False
+
+        if version[1] >= 3:
+            training_data = get_training_data_from_database(self.db_path, self.user_id)
+            snapshot, model, loaded = self._load_or_train(training_data, current.generation, version)
+            if snapshot is not None:
+                # Rescore before publishing so the score table matches the new generation
+                scored_generation = get_scored_generation_from_database(self.db_path, self.user_id)
+                if not loaded or scored_generation != snapshot.generation:
+                    try:
+                        rescore_all_videos(model, snapshot.generation, self.db_path, user_id=self.user_id,
+                                           feature_store=self._current_feature_store())
+                    except Exception as e:
+                        print(f"Warning: Could not rescore videos: {e}")
+                self._publish(snapshot, model)
+                self._online_updates = 0
+                self._force_full_retrain = False
+                self._rescore_pending = False
+                return True
+
+        # Not enough data for a new model; remember the version so we don't retry it
+        self.snapshot = current._replace(data_version=version)
+        return False
+
+    def _publish(self, snapshot: ModelSnapshot, model):
+        # Cache first, so a reader that sees the new snapshot finds its model
+        self.model_cache.put((self.user_id, snapshot.generation), model, replace=True)
+        self.snapshot = snapshot
+
+    def _reload_model(self, snapshot: ModelSnapshot):
+        """Load an evicted model from its artifact, or refit it when there is none"""
+        if snapshot.artifact and self.model_dir:
+            try:
+                return load_model_artifact(snapshot.artifact, self.model_dir)
+            except Exception as e:
+                print(f"Warning: Could not load model {snapshot.artifact} for user {self.user_id}: {e}")
+
+        # Online updates, no MODEL_DIR or a pruned artifact: fit on the user's ratings instead
+        model = create_recommendation_model(self.model_type)
+        training_data = get_training_data_from_database(self.db_path, self.user_id)
+        return model if train_model_on_user_preferences(model, training_data) else None
+
+    def _current_feature_store(self):
+        if self.feature_store is None:
+            return None
+        try:
+            ensure_feature_store_current(self.feature_store, self.db_path)
+            return self.feature_store
+        except Exception as e:
+            print(f"Warning: Feature store unavailable, scoring from SQLite: {e}")
+            return None
+
+    def _load_or_train(self, training_data, generation: int,
+                       version) -> Tuple[Optional[ModelSnapshot], Optional[Any], bool]:
+        fingerprint = None
+        if self.model_dir and len(training_data) > 0:
+            fingerprint = compute_training_fingerprint(training_data)
+            model_class = get_model_class(self.model_type).__name__
+            artifact = find_model_artifact(fingerprint, self.model_dir, model_class)
+            if artifact:
+                # Same data, same features, same sklearn: reuse the saved fit
+                model = load_model_artifact(artifact['version'], self.model_dir)
+                print(f"Loaded model {artifact['version']} trained on {artifact['training_rows']} rated videos")
+                loaded_generation = artifact['generation']
+                latest_generation = get_latest_generation(self.model_dir)
+                if loaded_generation <= generation or loaded_generation < latest_generation:
+                    # Ratings went back to an older model's data (e.g. a like undone and redone);
+                    # generations only move forward, so publish the old fit as a new one
+                    loaded_generation = max(generation, latest_generation) + 1
+                snapshot = ModelSnapshot(loaded_generation, version, artifact['trained_at'], artifact['version'])
+                return snapshot, model, True
+
+        model = create_recommendation_model(self.model_type)
+        if not train_model_on_user_preferences(model, training_data):
+            return None, None, False
+
+        generation += 1
+        trained_at = datetime.now().isoformat()
+        artifact = None
+        if self.model_dir:
+            generation = max(generation, get_latest_generation(self.model_dir) + 1)
+            try:
+                metadata = save_model_artifact(model, fingerprint, generation, len(training_data), self.model_dir)
+                trained_at = metadata['trained_at']
+                artifact = metadata['version']
+            except Exception as e:
+                print(f"Warning: Could not save model artifact: {e}")
+
+        return ModelSnapshot(generation, version, trained_at, artifact), model, False
@@ -0,0 +1,88 @@
+"""
+YouTube Quota Ledger
+Persistent record of YouTube Data API quota spent per Pacific-time day
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from ..metrics import QUOTA_UNITS
+from ..database.migrations import run_migrations
+from ..database.quota_operations import (
+    get_quota_usage_from_database,
+    reserve_quota_units_in_database
+)
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo('America/Los_Angeles')
+except Exception:
+    # No tz database available; fall back to PST and accept being an hour off in summer
+    PACIFIC = timezone(timedelta(hours=-8))
+
+# Units charged by the YouTube Data API v3 per call
+QUOTA_COSTS = {
+    'search': 100,
+    'videos': 1
+}
+DEFAULT_QUOTA_CEILING = int(os.getenv('YOUTUBE_QUOTA_CEILING', '10000'))
+
+
+class QuotaExceededError(Exception):
+    """Raised when a call would push today's spend past the configured ceiling"""
+
+
+class QuotaLedger:
+    """Tracks and budgets YouTube API quota; the daily reset follows Pacific time like Google's"""
+
+    def __init__(self, db_path: str, ceiling: int = DEFAULT_QUOTA_CEILING):
+        self.db_path = db_path
+        self.ceiling = ceiling
+        run_migrations(self.db_path)
+
+    @staticmethod
+    def current_quota_day() -> str:
+        return datetime.now(PACIFIC).date().isoformat()
+
+    @staticmethod
+    def next_reset() -> datetime:
+        now = datetime.now(PACIFIC)
+        tomorrow = (now + timedelta(days=1)).date()
+        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=PACIFIC)
+
+    def reserve(self, call_type: str, calls: int = 1) -> int:
+        """Charge quota for upcoming calls, or raise QuotaExceededError if over budget"""
+        units = QUOTA_COSTS.get(call_type, 1) * calls
+        reserved = reserve_quota_units_in_database(
+            self.current_quota_day(), call_type, units, calls, self.ceiling, self.db_path
+        )
+        if not reserved:
+            raise QuotaExceededError(
+                f"YouTube quota budget reached: {call_type} needs {units} units, "
+                f"{self.remaining()} of {self.ceiling} left today"
+            )
+        QUOTA_UNITS.inc(units, call_type=call_type)
+        return units
+
+    def spent(self) -> int:
+        usage = get_quota_usage_from_database(self.current_quota_day(), self.db_path)
+        return sum(entry['units'] for entry in usage.values())
+
+    def remaining(self) -> int:
+        return max(self.ceiling - self.spent(), 0)
+
+    def can_afford(self, units: int) -> bool:
+        return units <= self.remaining()
+
+    def usage(self) -> Dict:
+        quota_day = self.current_quota_day()
+        by_call_type = get_quota_usage_from_database(quota_day, self.db_path)
+        spent = sum(entry['units'] for entry in by_call_type.values())
+        return {
+            'quota_day': quota_day,
+            'ceiling': self.ceiling,
+            'spent': spent,
+            'remaining': max(self.ceiling - spent, 0),
+            'by_call_type': by_call_type,
+            'costs': QUOTA_COSTS,
+            'resets_at': self.next_reset().isoformat()
+        }
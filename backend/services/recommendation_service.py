@@ -1,186 +1,265 @@
 import os
-import sqlite3
-import pandas as pd
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
 from ..database.manager import setup_database_tables
+from ..database.migrations import DEFAULT_USER_ID
 from ..database.preference_operations import (
-    get_training_data_from_database,
-    get_unrated_videos_with_features_from_database,
+    get_liked_videos_page_from_database,
     get_rated_count_from_database,
     save_video_rating_to_database
 )
 from ..database.video_operations import get_unrated_videos_from_database
-from ..ml.model_training import create_recommendation_model, train_model_on_user_preferences
-from ..ml.predictions import predict_video_preferences_with_model
+from ..database.score_operations import get_top_scored_unrated_videos_from_database
+from ..ml.model_training import FEATURE_COLUMNS
+from ..ml.predictions import score_feature_matrix_with_model
+from .feature_store_service import get_feature_store
+from .model_cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_MODELS, ModelCache
+from .model_trainer import BackgroundModelTrainer, ModelSnapshot
+from .video_refiller import BackgroundVideoRefiller
+from .scoring_service import recommend_top_unrated_videos, score_new_videos
+
+# User IDs end up in URLs and model directory names, so keep them to a safe alphabet
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.@-]{0,63}$')
+# Trainers kept for recently active users; the least recently used is dropped past this
+DEFAULT_MAX_TRAINERS = int(os.getenv('MODEL_TRAINERS_MAX', '256'))
+# What users without ratings (and so without a trainer) see
+NO_MODEL = ModelSnapshot(0, None, None, None)
+
+def is_valid_user_id(user_id) -> bool:
+    return isinstance(user_id, str) and USER_ID_PATTERN.match(user_id) is not None
 
 class RecommendationService:
-    """Service for handling video recommendations and ML model management"""
+    """Service for handling video recommendations and per-user ML model management"""
     
-    def __init__(self, db_path):
+    def __init__(self, db_path, retrain_quiet_period=2.0, retrain_rating_threshold=5, model_dir=None,
+                 refill_low_watermark=5, refill_high_watermark=20, refill_retry_seconds=300.0,
+                 feature_store_dir=None, model_type=None, full_retrain_every=50,
+                 model_cache_max_models=DEFAULT_MAX_MODELS, model_cache_max_bytes=DEFAULT_MAX_BYTES,
+                 max_trainers=DEFAULT_MAX_TRAINERS):
         self.db_path = db_path
-        self.model = None
-        self.model_trained = False
         setup_database_tables(self.db_path)
-        self._initialize_model()
-
-    def _initialize_model(self):
-        """Initialize the ML model if we have enough ratings"""
-        rated_count = get_rated_count_from_database(self.db_path)
-        if rated_count >= 3:
-            self.model = create_recommendation_model()
-            training_data = get_training_data_from_database(self.db_path)
-            success = train_model_on_user_preferences(self.model, training_data)
-            if success:
-                self.model_trained = True
-
-    def get_recommendations(self):
-        """Get video recommendations based on user preferences"""
-        self._ensure_sufficient_videos()
-        
-        if self.model_trained and self.model:
-            video_features = get_unrated_videos_with_features_from_database(self.db_path)
-            recommendations = predict_video_preferences_with_model(self.model, video_features)
-            return recommendations[:12]
+        self.feature_store = get_feature_store(self.db_path, feature_store_dir) if feature_store_dir else None
+        # Every user's models share one bounded cache; trainers only keep snapshot metadata
+        self.model_cache = ModelCache(model_cache_max_models, model_cache_max_bytes)
+        self._trainer_options = {
+            'quiet_period': retrain_quiet_period,
+            'rating_threshold': retrain_rating_threshold,
+            'model_dir': model_dir,
+            'feature_store': self.feature_store,
+            'model_type': model_type,
+            'full_retrain_every': full_retrain_every
+        }
+        self.max_trainers = max(1, max_trainers)
+        self._trainers = OrderedDict()  # user ID -> trainer, least recently used first
+        self._trainers_lock = threading.Lock()
+        self.refiller = BackgroundVideoRefiller(
+            self.db_path,
+            self._search_more_videos,
+            low_watermark=refill_low_watermark,
+            high_watermark=refill_high_watermark,
+            retry_after=refill_retry_seconds
+        )
+        self.get_trainer(DEFAULT_USER_ID)
+
+    def get_trainer(self, user_id=DEFAULT_USER_ID) -> Optional[BackgroundModelTrainer]:
+        """The user's model trainer, created and warm started (from a saved artifact if any) on first use
+
+        Users without ratings have nothing to train, so they get None and no trainer is kept
+        for them. Past max_trainers the least recently used trainer is dropped; its model
+        stays in the model cache and a later request builds a new trainer.
+        """
+        if not is_valid_user_id(user_id):
+            raise ValueError(f"Invalid user ID {user_id!r}")
+
+        with self._trainers_lock:
+            trainer = self._trainers.get(user_id)
+            if trainer is not None:
+                self._trainers.move_to_end(user_id)
+                return trainer
+
+        if get_rated_count_from_database(self.db_path, user_id) == 0:
+            return None
+
+        evicted = []
+        with self._trainers_lock:
+            trainer = self._trainers.get(user_id)
+            created = trainer is None
+            if created:
+                trainer = BackgroundModelTrainer(
+                    self.db_path, user_id=user_id, model_cache=self.model_cache, **self._trainer_options
+                )
+                self._trainers[user_id] = trainer
+                while len(self._trainers) > self.max_trainers:
+                    evicted.append(self._trainers.popitem(last=False)[1])
+
+        for old_trainer in evicted:
+            old_trainer.stop(wait=False)
+        # Outside the registry lock so one user's first fit never blocks other users
+        if created:
+            try:
+                trainer.train_now()
+            except Exception as e:
+                # Serve the fallback and keep accepting ratings; the next rating retries the fit
+                print(f"Error training model for user {user_id}: {e}")
+        return trainer
+
+    def get_model_snapshot(self, user_id=DEFAULT_USER_ID) -> ModelSnapshot:
+        trainer = self.get_trainer(user_id)
+        return trainer.snapshot if trainer is not None else NO_MODEL
+
+    @property
+    def user_count(self):
+        """Users with a trainer in this process"""
+        return len(self._trainers)
+
+    def stop(self):
+        """Stop every trainer thread; for scripts and shutdown"""
+        with self._trainers_lock:
+            trainers = list(self._trainers.values())
+        for trainer in trainers:
+            trainer.stop()
+
+    def _ensure_model_current(self, trainer):
+        """Schedule a background retrain if ratings changed since the published model"""
+        if trainer is not None and trainer.is_stale():
+            trainer.schedule_retrain()
+
+    def get_recommendations(self, user_id=DEFAULT_USER_ID):
+        """Get video recommendations based on the user's preferences"""
+        trainer = self.get_trainer(user_id)
+        # Low inventory is topped up in the background; serve what we have now
+        self.refiller.check(user_id)
+        self._ensure_model_current(trainer)
+
+        snapshot = trainer.snapshot if trainer is not None else NO_MODEL
+        if snapshot.has_model:
+            # Scores are materialized after each training, so this is one indexed query
+            recommendations = get_top_scored_unrated_videos_from_database(12, self.db_path, user_id)
+            if recommendations:
+                return recommendations
+
+            # Score table is empty (e.g. mid-rescore); stream the catalog instead of loading it
+            model = trainer.get_model(snapshot)
+            if model is not None:
+                return recommend_top_unrated_videos(model, self.db_path, 12, user_id=user_id)
+
+        fallback_videos = get_unrated_videos_from_database(12, self.db_path, user_id)
+        for video in fallback_videos:
+            video['like_probability'] = 0.5
+        return fallback_videos
+
+    def _search_more_videos(self, refill_round=0):
+        """Search for more videos; returns how many new videos were stored"""
+        from .youtube_service import YouTubeService
+        from .youtube_cache import YouTubeResponseCache
+        from .quota_ledger import QuotaLedger
+        from .known_videos import get_known_video_index
+        from .ingest_service import ingest_videos
+        from ..config.search_config import get_search_queries
+        import random
+
+        api_key = os.getenv('YOUTUBE_API_KEY')
+        if not api_key:
+            print("Warning: No YouTube API key found, cannot fetch more videos")
+            return 0
+
+        youtube_service = YouTubeService(
+            api_key,
+            cache=YouTubeResponseCache(),
+            ledger=QuotaLedger(self.db_path),
+            known_videos=get_known_video_index(self.db_path)
+        )
+        all_queries = get_search_queries()
+
+        if not all_queries:
+            return 0
+        if len(all_queries) > 5:
+            search_queries = all_queries[5:]
         else:
-            fallback_videos = get_unrated_videos_from_database(12, self.db_path)
-            for video in fallback_videos:
-                video['like_probability'] = 0.5
-            return fallback_videos
-
-    def _ensure_sufficient_videos(self):
-        """Check if we have sufficient videos (auto-search disabled to save API quota)"""
-        unrated_videos = get_unrated_videos_from_database(20, self.db_path)
-
-        if len(unrated_videos) < 5:
-            print("🔍 Running low on videos, automatically searching for more...")
-            self._search_more_videos()
-
-    def _search_more_videos(self):
-        """Search for more videos using the search_more_videos functionality"""
-        try:
-            from .youtube_service import YouTubeService
-            from ..ml.feature_extraction import extract_all_features_from_video
-            from ..database.video_operations import save_videos_to_database, save_video_features_to_database
-            from ..config.search_config import get_search_queries
-            import random
-
-            api_key = os.getenv('YOUTUBE_API_KEY')
-            if not api_key:
-                print("Warning: No YouTube API key found, cannot fetch more videos")
-                return
-
-            youtube_service = YouTubeService(api_key)
-            all_queries = get_search_queries()
-
-            if len(all_queries) > 5:
-                search_queries = all_queries[5:]
-            else:
-                search_queries = all_queries.copy()
-                random.shuffle(search_queries)
-
-            search_queries = search_queries[:3]
-
-            all_videos = []
-            for query in search_queries:
-                videos = youtube_service.search_and_get_details(query, 10)
-                all_videos.extend(videos)
-
-            unique_videos = YouTubeService.remove_duplicate_videos(all_videos)
-
-            if unique_videos:
-                save_videos_to_database(unique_videos, self.db_path)
-
-                for video in unique_videos:
-                    features = extract_all_features_from_video(video)
-                    save_video_features_to_database(video['id'], features, self.db_path)
-
-                print(f"✅ Automatically found and saved {len(unique_videos)} new videos!")
-
-        except Exception as e:
-            print(f"Error searching for more videos: {e}")
-
-    def rate_video(self, video_id, liked):
-        """Rate a video and potentially retrain the model"""
-        # Save the rating
-        save_video_rating_to_database(video_id, liked, "", self.db_path)
-
-        # Check if we should retrain the model
-        model_retrained = False
-        rated_count = get_rated_count_from_database(self.db_path)
-
-        if rated_count >= 3:
-            if not self.model:
-                self.model = create_recommendation_model()
-
-            training_data = get_training_data_from_database(self.db_path)
-            success = train_model_on_user_preferences(self.model, training_data)
-
-            if success:
-                self.model_trained = True
-                model_retrained = True
+            search_queries = all_queries.copy()
+            random.shuffle(search_queries)
+
+        # Each refill round moves on to the next three queries
+        start = (refill_round * 3) % len(search_queries)
+        search_queries = (search_queries[start:] + search_queries[:start])[:3]
+
+        all_videos = []
+        for videos in youtube_service.search_many(search_queries, 10):
+            all_videos.extend(videos)
+
+        unique_videos = YouTubeService.remove_duplicate_videos(all_videos)
+
+        if not unique_videos:
+            return 0
+
+        counts = ingest_videos(unique_videos, self.db_path)
+
+        # Only users whose model is already loaded; the rest get these on their next rescore
+        video_ids = [video['id'] for video in unique_videos]
+        with self._trainers_lock:
+            trainers = list(self._trainers.values())
+        for trainer in trainers:
+            snapshot = trainer.snapshot
+            model = self.model_cache.peek((trainer.user_id, snapshot.generation))
+            score_new_videos(video_ids, model, snapshot.generation, self.db_path, trainer.user_id)
+
+        print(f"✅ Automatically found and saved {counts['inserted']} new videos!")
+        return counts['inserted']
+
+    def rate_video(self, video_id, liked, user_id=DEFAULT_USER_ID):
+        """Rate a video; online models learn it immediately, others retrain in the background"""
+        if not is_valid_user_id(user_id):
+            raise ValueError(f"Invalid user ID {user_id!r}")
+        save_video_rating_to_database(video_id, liked, "", self.db_path, user_id)
+        # Saved first, so a first-time rater gets a trainer
+        trainer = self.get_trainer(user_id)
+        model_updated = trainer.update_online()
+        # A full retrain, or after an online update just a debounced rescore
+        trainer.schedule_retrain()
 
         return {
-            'model_retrained': model_retrained,
-            'total_ratings': rated_count
+            'retrain_scheduled': True,
+            'model_updated': model_updated,
+            'model_generation': trainer.snapshot.generation,
+            'total_ratings': get_rated_count_from_database(self.db_path, user_id)
         }
 
-    def get_liked_videos(self):
-        """Get all liked videos with confidence scores"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT v.id, v.title, v.channel_name, v.view_count, v.url
-                FROM videos v
-                JOIN preferences p ON v.id = p.video_id
-                WHERE p.liked = 1
-                ORDER BY p.created_at DESC
-            """)
-
-            liked_videos = []
-            for row in cursor.fetchall():
-                liked_videos.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'channel_name': row[2],
-                    'view_count': row[3],
-                    'url': row[4]
-                })
-
-            conn.close()
-
-            if self.model_trained and self.model and liked_videos:
-                cursor = sqlite3.connect(self.db_path).cursor()
-
-                df_data = []
-                for video in liked_videos:
-                    cursor.execute("SELECT * FROM video_features WHERE video_id = ?", (video['id'],))
-                    features = cursor.fetchone()
-                    if features:
-                        df_data.append({
-                            'video_id': features[0],
-                            'title_length': features[1],
-                            'description_length': features[2],
-                            'view_like_ratio': features[3],
-                            'engagement_score': features[4],
-                            'title_sentiment': features[5],
-                            'has_tutorial_keywords': features[6],
-                            'has_time_constraint': features[7],
-                            'has_beginner_keywords': features[8],
-                            'has_tech_keywords': features[9],
-                            'has_project_keywords': features[10]
-                        })
-
-                if df_data:
-                    video_features_df = pd.DataFrame(df_data)
-                    predictions = predict_video_preferences_with_model(self.model, video_features_df)
-                    return sorted(predictions, key=lambda x: x.get('like_probability', 0), reverse=True)
-
-            for video in liked_videos:
+    def get_liked_videos(self, limit=50, before_rating_id=None, user_id=DEFAULT_USER_ID):
+        """Get one page of the user's liked videos, newest rating first, with confidence scores"""
+        trainer = self.get_trainer(user_id)
+        self._ensure_model_current(trainer)
+        snapshot = trainer.snapshot if trainer is not None else NO_MODEL
+
+        liked_videos = get_liked_videos_page_from_database(
+            self.db_path, FEATURE_COLUMNS, limit, before_rating_id, user_id
+        )
+
+        # Scores cached for the published model are reused; the rest are scored in one batch
+        unscored = []
+        for video in liked_videos:
+            features = video.pop('features')
+            if not snapshot.has_model:
+                video['like_probability'] = 0.8
+            elif video['like_probability'] is None or video['model_generation'] != snapshot.generation:
+                if None in features:
+                    video['like_probability'] = 0.8
+                else:
+                    unscored.append((video, features))
+            video.pop('model_generation')
+
+        # Only now is the model itself needed, so fully cached pages never touch the model cache
+        model = trainer.get_model(snapshot) if unscored else None
+        if model is not None:
+            probabilities = score_feature_matrix_with_model(
+                model, np.array([features for _, features in unscored], dtype=np.float64)
+            )
+            for (video, _), probability in zip(unscored, probabilities.tolist()):
+                video['like_probability'] = probability
+        else:
+            for video, _ in unscored:
                 video['like_probability'] = 0.8
 
-            return liked_videos
-
-        except Exception as e:
-            print(f"Error getting liked videos: {e}")
-            return []
+        return liked_videos
@@ -0,0 +1,120 @@
+"""
+Scoring Service
+Keeps the materialized video_scores table in step with the published model
+"""
+from typing import Dict, List, Optional
+from ..database.migrations import DEFAULT_USER_ID
+from ..database.score_operations import (
+    get_scored_generations_from_database,
+    get_video_features_from_database,
+    iter_video_feature_chunks_from_database,
+    replace_video_scores_in_database,
+    save_video_scores_to_database
+)
+from ..database.video_operations import get_video_summaries_from_database
+from ..ml.model_store import get_user_model_dir, list_model_artifacts, load_model_artifact
+from ..ml.model_training import FEATURE_COLUMNS
+from ..ml.predictions import (
+    score_feature_matrix_with_model,
+    score_videos_with_model,
+    top_k_scores_from_chunks
+)
+
+# Rows read, scored and written per step; bounds memory regardless of catalog size
+SCORING_CHUNK_SIZE = 10000
+
+
+def rescore_all_videos(model, model_generation: int, db_path: str,
+                       chunk_size: int = SCORING_CHUNK_SIZE, feature_store=None,
+                       user_id: str = DEFAULT_USER_ID) -> int:
+    """Score every video with features and replace the user's scores, one chunk at a time
+
+    Each chunk is scored before its write transaction opens, so ratings saved during a
+    long rescore never wait on inference. With a feature store the chunks are zero-copy
+    slices of its mapped matrix instead of rows converted from SQLite.
+    """
+    scored = 0
+    chunks = (_iter_feature_store_chunks(feature_store, chunk_size) if feature_store is not None
+              else iter_video_feature_chunks_from_database(db_path, FEATURE_COLUMNS, chunk_size))
+
+    def score_chunks():
+        nonlocal scored
+        for video_ids, features in chunks:
+            probabilities = score_feature_matrix_with_model(model, features)
+            scored += len(video_ids)
+            yield list(zip(video_ids, probabilities.tolist()))
+
+    if not replace_video_scores_in_database(score_chunks(), model_generation, db_path, user_id):
+        print(f"Skipped scores from model generation {model_generation} for user {user_id}; newer ones are in place")
+        return 0
+    print(f"Scored {scored} videos with model generation {model_generation} for user {user_id}")
+    return scored
+
+
+def _iter_feature_store_chunks(feature_store, chunk_size: int):
+    ids, features, valid = feature_store.view()
+    for start in range(0, len(ids), chunk_size):
+        end = start + chunk_size
+        chunk_valid = valid[start:end]
+        if chunk_valid.all():
+            yield ids[start:end].tolist(), features[start:end]
+        else:
+            # Rows without complete features are left unscored, as in SQLite
+            yield ids[start:end][chunk_valid].tolist(), features[start:end][chunk_valid]
+
+
+def recommend_top_unrated_videos(model, db_path: str, limit: int = 12,
+                                 chunk_size: int = SCORING_CHUNK_SIZE,
+                                 user_id: str = DEFAULT_USER_ID) -> List[Dict]:
+    """Score the user's unrated videos chunk by chunk and load display fields only for the winners"""
+    chunks = iter_video_feature_chunks_from_database(
+        db_path, FEATURE_COLUMNS, chunk_size, unrated_only=True, user_id=user_id
+    )
+    top_scores = top_k_scores_from_chunks(model, chunks, limit)
+    summaries = get_video_summaries_from_database([video_id for video_id, _ in top_scores], db_path)
+
+    recommendations = []
+    for video_id, probability in top_scores:
+        if video_id in summaries:
+            recommendations.append(dict(summaries[video_id], like_probability=probability))
+    return recommendations
+
+
+def score_new_videos(video_ids: List[str], model, model_generation: int, db_path: str,
+                     user_id: str = DEFAULT_USER_ID) -> int:
+    """Score freshly ingested videos for one user without touching the rest of their scores"""
+    if not video_ids or model is None:
+        return 0
+
+    video_features = get_video_features_from_database(db_path, video_ids)
+    scores = score_videos_with_model(model, video_features)
+    save_video_scores_to_database(scores, model_generation, db_path, user_id)
+    return len(scores)
+
+
+def score_new_videos_with_saved_model(video_ids: List[str], db_path: str,
+                                      model_dir: Optional[str]) -> int:
+    """Score new videos outside the web process with each user's model behind their scores
+
+    Models are loaded one user at a time, so memory stays at one model however many
+    users there are. Returns how many of the videos were scored.
+    """
+    if not video_ids or not model_dir:
+        return 0
+
+    video_features = None
+    scored = 0
+    for user_id, generation in get_scored_generations_from_database(db_path).items():
+        user_model_dir = get_user_model_dir(model_dir, user_id)
+        for metadata in list_model_artifacts(user_model_dir):
+            if metadata['generation'] == generation:
+                if video_features is None:
+                    video_features = get_video_features_from_database(db_path, video_ids)
+                model = load_model_artifact(metadata['version'], user_model_dir)
+                scores = score_videos_with_model(model, video_features)
+                save_video_scores_to_database(scores, generation, db_path, user_id)
+                scored = max(scored, len(scores))
+                break
+        # Users without a saved model get these videos on their next full rescore in the web process
+
+    return scored
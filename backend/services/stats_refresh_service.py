@@ -0,0 +1,83 @@
+"""
+Stats Refresh Service
+Walks stored videos oldest-refreshed first and updates their counts and derived features
+"""
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from ..database.job_operations import (
+    clear_job_state_in_database,
+    get_job_state_from_database,
+    save_job_state_to_database
+)
+from ..database.video_operations import (
+    get_videos_due_for_stats_refresh_from_database,
+    update_video_statistics_in_database
+)
+from ..ml.feature_extraction import calculate_engagement_metrics
+from .feature_store_service import refresh_feature_store_rows
+from .quota_ledger import QUOTA_COSTS, QuotaExceededError
+from .scoring_service import score_new_videos_with_saved_model
+from .youtube_service import MAX_RESULTS_PER_PAGE
+
+# Start time of the unfinished run; videos refreshed since then are skipped when resuming
+REFRESH_RUN_STATE = 'refresh_stats_run_started'
+
+
+def refresh_video_statistics(youtube_service, ledger, db_path: str,
+                             max_videos: Optional[int] = None,
+                             model_dir: Optional[str] = None) -> Dict:
+    """Refresh statistics in videos.list batches of 50 until done, capped or out of quota"""
+    run_started = get_job_state_from_database(REFRESH_RUN_STATE, db_path)
+    resumed = run_started is not None
+    if not resumed:
+        run_started = _utc_now()
+        save_job_state_to_database(REFRESH_RUN_STATE, run_started, db_path)
+
+    result = {'refreshed': 0, 'missing': 0, 'scored': 0, 'resumed': resumed,
+              'complete': False, 'stopped_reason': None}
+    cost = QUOTA_COSTS['videos']
+
+    while max_videos is None or result['refreshed'] + result['missing'] < max_videos:
+        limit = MAX_RESULTS_PER_PAGE
+        if max_videos is not None:
+            limit = min(limit, max_videos - result['refreshed'] - result['missing'])
+
+        video_ids = get_videos_due_for_stats_refresh_from_database(run_started, limit, db_path)
+        if not video_ids:
+            clear_job_state_in_database(REFRESH_RUN_STATE, db_path)
+            result['complete'] = True
+            break
+
+        if not ledger.can_afford(cost):
+            result['stopped_reason'] = 'quota'
+            break
+
+        try:
+            statistics = youtube_service.get_video_statistics(video_ids)
+        except QuotaExceededError:
+            result['stopped_reason'] = 'quota'
+            break
+        except Exception as e:
+            print(f"Error refreshing video statistics: {e}")
+            result['stopped_reason'] = 'error'
+            break
+
+        rows = []
+        metrics = []
+        for video_id, counts in statistics.items():
+            views, likes, comments = counts['view_count'], counts['like_count'], counts['comment_count']
+            rows.append((video_id, views, likes, comments))
+            metrics.append((video_id, *calculate_engagement_metrics(views, likes, comments)))
+
+        refreshed_at = _utc_now()
+        update_video_statistics_in_database(rows, metrics, video_ids, refreshed_at, db_path)
+        refresh_feature_store_rows(db_path, list(statistics), refreshed_at)
+        result['scored'] += score_new_videos_with_saved_model(list(statistics), db_path, model_dir)
+        result['refreshed'] += len(statistics)
+        result['missing'] += len(video_ids) - len(statistics)
+
+    return result
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
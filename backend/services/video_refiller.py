@@ -0,0 +1,108 @@
+"""
+Background Video Refiller
+Tops up the pool of unrated videos off the request path, one refill at a time
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from ..database.migrations import DEFAULT_USER_ID
+from ..database.video_operations import get_unrated_video_count_from_database
+
+# Searches per refill before giving up on reaching the high watermark
+MAX_REFILL_ROUNDS = 3
+
+
+class BackgroundVideoRefiller:
+    """Starts a refill when a user's unrated videos drop below low_watermark and searches up to high_watermark
+
+    The catalog is shared, so one refill at a time serves every user; it stops once
+    the user who triggered it is back at the high watermark. search_more is called
+    with a round number (so each round can use different queries) and returns how
+    many new videos it stored.
+    """
+
+    def __init__(self, db_path: str, search_more: Callable[[int], int],
+                 low_watermark: int = 5, high_watermark: int = 20, retry_after: float = 300.0):
+        self.db_path = db_path
+        self.search_more = search_more
+        self.low_watermark = low_watermark
+        self.high_watermark = max(high_watermark, low_watermark)
+        self.retry_after = retry_after
+
+        # Single flight: only the request that takes this lock starts a refill
+        self._lock = threading.Lock()
+        self._thread = None
+        self._rounds = 0
+        self._user_id = DEFAULT_USER_ID
+        self._retry_at = 0.0
+        self._last_added = None
+        self._last_error = None
+        self._last_finished_at = None
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def check(self, user_id: str = DEFAULT_USER_ID) -> Dict:
+        """Start a refill if the user's inventory is low; never waits on one. Returns the refill status"""
+        unrated = get_unrated_video_count_from_database(self.db_path, self.high_watermark, user_id)
+        if unrated < self.low_watermark and time.monotonic() >= self._retry_at:
+            if self._lock.acquire(blocking=False):
+                self._user_id = user_id
+                self._thread = threading.Thread(target=self._run, name='video-refiller', daemon=True)
+                self._thread.start()
+        return self.status(unrated)
+
+    def status(self, unrated: Optional[int] = None, user_id: str = DEFAULT_USER_ID) -> Dict:
+        if unrated is None:
+            unrated = get_unrated_video_count_from_database(self.db_path, self.high_watermark, user_id)
+
+        if self.running:
+            state = 'running'
+        elif time.monotonic() < self._retry_at:
+            state = 'backing_off'
+        else:
+            state = 'idle'
+
+        return {
+            'state': state,
+            'unrated_videos': unrated,
+            'low_watermark': self.low_watermark,
+            'high_watermark': self.high_watermark,
+            'last_added': self._last_added,
+            'last_error': self._last_error,
+            'last_finished_at': self._last_finished_at
+        }
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the current refill (if any) finishes; for scripts and shutdown"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        added = 0
+        error = None
+        try:
+            print("🔍 Running low on videos, searching for more in the background...")
+            for _ in range(MAX_REFILL_ROUNDS):
+                new_videos = self.search_more(self._rounds)
+                self._rounds += 1
+                added += new_videos
+                if not new_videos:
+                    break
+                unrated = get_unrated_video_count_from_database(self.db_path, self.high_watermark, self._user_id)
+                if unrated >= self.high_watermark:
+                    break
+        except Exception as e:
+            error = str(e)
+            print(f"Error refilling videos: {e}")
+        finally:
+            # Nothing found usually means quota or network trouble; don't retry on every request
+            if error or not added:
+                self._retry_at = time.monotonic() + self.retry_after
+            self._last_added = added
+            self._last_error = error
+            self._last_finished_at = datetime.now().isoformat()
+            self._lock.release()
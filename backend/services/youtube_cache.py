@@ -0,0 +1,120 @@
+"""
+YouTube Response Cache
+Persistent SQLite cache for YouTube API responses with per-endpoint TTLs and LRU eviction
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from ..database.connection import get_connection, transaction
+
+DEFAULT_CACHE_PATH = os.getenv('YOUTUBE_CACHE_PATH', 'youtube_cache.db')
+DEFAULT_SEARCH_TTL_SECONDS = int(os.getenv('YOUTUBE_CACHE_SEARCH_TTL', str(24 * 60 * 60)))
+DEFAULT_VIDEOS_TTL_SECONDS = int(os.getenv('YOUTUBE_CACHE_VIDEOS_TTL', str(6 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv('YOUTUBE_CACHE_MAX_ENTRIES', '5000'))
+
+
+class YouTubeResponseCache:
+    """Caches API responses keyed on endpoint plus normalized params (never the API key)"""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH,
+                 search_ttl: int = DEFAULT_SEARCH_TTL_SECONDS,
+                 videos_ttl: int = DEFAULT_VIDEOS_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttls = {'search': search_ttl, 'videos': videos_ttl}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS api_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    endpoint TEXT,
+                    response TEXT,
+                    fetched_at REAL,
+                    last_accessed REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_api_cache_last_accessed
+                ON api_cache (last_accessed)
+            ''')
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict) -> str:
+        """Build a stable cache key; the API key is excluded and ID lists are order-insensitive"""
+        normalized = {}
+        for name, value in params.items():
+            if name == 'key':
+                continue
+            value = str(value)
+            if name == 'id':
+                value = ','.join(sorted(value.split(',')))
+            normalized[name] = value
+
+        payload = json.dumps([endpoint, sorted(normalized.items())])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, params: Dict) -> Optional[Dict]:
+        """Return a fresh cached response, or None on a miss"""
+        cache_key = self.make_key(endpoint, params)
+        ttl = self.ttls.get(endpoint, 0)
+        now = time.time()
+
+        row = get_connection(self.db_path).execute(
+            "SELECT response, fetched_at FROM api_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+
+        if row is None or now - row[1] > ttl:
+            self._count(hit=False)
+            return None
+
+        with transaction(self.db_path) as conn:
+            conn.execute("UPDATE api_cache SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+        self._count(hit=True)
+        return json.loads(row[0])
+
+    def put(self, endpoint: str, params: Dict, response: Dict):
+        """Store a response, evicting the least recently used entries past the size cap"""
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO api_cache (cache_key, endpoint, response, fetched_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (self.make_key(endpoint, params), endpoint, json.dumps(response), now, now))
+            conn.execute('''
+                DELETE FROM api_cache WHERE cache_key IN (
+                    SELECT cache_key FROM api_cache
+                    ORDER BY last_accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def clear(self):
+        with transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM api_cache")
+
+    def stats(self) -> Dict:
+        entries = get_connection(self.db_path).execute("SELECT COUNT(*) FROM api_cache").fetchone()[0]
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+            'entries': entries,
+            'max_entries': self.max_entries
+        }
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -2,20 +2,76 @@
 YouTube API Service
 Handles all YouTube API interactions including search, video details, and utilities
 """
+import os
+import queue
 import requests
 import json
 import re
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Optional, Iterator, Tuple
+from ..metrics import YOUTUBE_CACHE_LOOKUPS, YOUTUBE_REQUESTS, stage_timer
+from .quota_ledger import QuotaExceededError
+
+# Point at a stand-in such as `python app.py fake-api` to run every ingest path offline
+DEFAULT_BASE_URL = os.getenv('YOUTUBE_API_BASE_URL', "https://www.googleapis.com/youtube/v3")
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('YOUTUBE_MAX_CONCURRENCY', '4'))
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_RESULTS_PER_PAGE = 50  # API limit for both search.list and videos.list
 
 class YouTubeService:
     """Service for interacting with YouTube API"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = DEFAULT_BASE_URL,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, cache=None, ledger=None,
+                 known_videos=None):
         self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.ledger = ledger
+        # Optional KnownVideoIndex; leave unset to refetch details (and stats) for stored videos
+        self.known_videos = known_videos
+
+        # One keep-alive pool shared by every call, sized for concurrent harvesting
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _get(self, endpoint: str, params: Dict) -> Dict:
+        """GET an API endpoint over the pooled session, serving from the cache when possible"""
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params)
+            YOUTUBE_CACHE_LOOKUPS.inc(endpoint=endpoint, result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+
+        # Cache hits are free; anything that goes over the wire is charged first
+        if self.ledger is not None:
+            self.ledger.reserve(endpoint)
+
+        with stage_timer(f'youtube.{endpoint}'):
+            response = self.session.get(
+                f"{self.base_url}/{endpoint}", params=params, timeout=REQUEST_TIMEOUT_SECONDS
+            )
+            data = response.json()
+        YOUTUBE_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+
+        # Never cache errors such as quotaExceeded; they must be retried later
+        if self.cache is not None and 'error' not in data:
+            self.cache.put(endpoint, params, data)
+        return data
     
     def search_videos(self, query: str, max_results: int = 10) -> List[str]:
         """Search for videos and return video IDs"""
-        search_url = "https://www.googleapis.com/youtube/v3/search"
+        video_ids, _ = self._search_page(query, max_results)
+        return video_ids
+
+    def _search_page(self, query: str, max_results: int,
+                     page_token: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """Fetch one page of search results; returns video IDs and the next page token"""
         params = {
             'key': self.api_key,
             'q': query,
@@ -25,10 +81,11 @@ class YouTubeService:
             'maxResults': max_results,
             'publishedAfter': '2020-01-01T00:00:00Z'
         }
+        if page_token:
+            params['pageToken'] = page_token
 
         try:
-            response = requests.get(search_url, params=params)
-            data = response.json()
+            data = self._get('search', params)
 
             # Check for API errors
             if 'error' in data:
@@ -37,24 +94,32 @@ class YouTubeService:
                     print(f"⚠️  YouTube API quota exceeded for query '{query}'")
                 else:
                     print(f"YouTube API Error for '{query}': {error_msg}")
-                return []
+                return [], None
 
             if 'items' not in data:
-                return []
+                return [], None
 
             video_ids = [item['id']['videoId'] for item in data['items']]
-            return video_ids
+            return video_ids, data.get('nextPageToken')
 
+        except QuotaExceededError as e:
+            print(f"⚠️  Skipping search for '{query}': {e}")
+            return [], None
         except Exception as e:
             print(f"Error searching videos for '{query}': {e}")
-            return []
-    
+            return [], None
+
     def get_video_details(self, video_ids: List[str]) -> List[Dict]:
         """Get detailed information for a list of video IDs"""
         if not video_ids:
             return []
 
-        details_url = "https://www.googleapis.com/youtube/v3/videos"
+        if len(video_ids) > MAX_RESULTS_PER_PAGE:
+            videos = []
+            for start in range(0, len(video_ids), MAX_RESULTS_PER_PAGE):
+                videos.extend(self.get_video_details(video_ids[start:start + MAX_RESULTS_PER_PAGE]))
+            return videos
+
         params = {
             'key': self.api_key,
             'id': ','.join(video_ids),
@@ -62,8 +127,7 @@ class YouTubeService:
         }
 
         try:
-            response = requests.get(details_url, params=params)
-            data = response.json()
+            data = self._get('videos', params)
 
             videos = []
             for item in data.get('items', []):
@@ -73,14 +137,133 @@ class YouTubeService:
 
             return videos
 
+        except QuotaExceededError as e:
+            print(f"⚠️  Skipping video details: {e}")
+            return []
         except Exception as e:
             print(f"Error getting video details: {e}")
             return []
     
+    def get_video_statistics(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch current counts for up to 50 videos (1 quota unit); IDs YouTube dropped are absent
+
+        Unlike the search helpers this raises QuotaExceededError and API errors so a
+        refresh job can stop cleanly instead of marking videos as refreshed.
+        """
+        if not video_ids:
+            return {}
+
+        params = {
+            'key': self.api_key,
+            'id': ','.join(video_ids[:MAX_RESULTS_PER_PAGE]),
+            'part': 'statistics'
+        }
+        data = self._get('videos', params)
+        if 'error' in data:
+            raise RuntimeError(data['error'].get('message', 'Unknown error'))
+
+        statistics = {}
+        for item in data.get('items', []):
+            counts = item.get('statistics', {})
+            statistics[item['id']] = {
+                'view_count': int(counts.get('viewCount', 0)),
+                'like_count': int(counts.get('likeCount', 0)),
+                'comment_count': int(counts.get('commentCount', 0))
+            }
+        return statistics
+
     def search_and_get_details(self, query: str, max_results: int = 10) -> List[Dict]:
         """Search for videos and get their details in one call"""
         video_ids = self.search_videos(query, max_results)
-        return self.get_video_details(video_ids)
+        return self.get_video_details(self._skip_known(video_ids))
+
+    def _skip_known(self, video_ids: List[str]) -> List[str]:
+        """Drop IDs we already store so they cost no videos.list lookup"""
+        if self.known_videos is None:
+            return video_ids
+        return self.known_videos.filter_unknown(video_ids)
+
+    def iter_search(self, query: str, max_total: int = 50) -> Iterator[Dict]:
+        """Stream up to max_total search hits as parsed videos, following page tokens
+
+        Details are fetched one page (at most 50 IDs) at a time, so callers can
+        start saving videos while later pages are still being requested.
+        """
+        page_token = None
+        fetched = 0
+        while fetched < max_total:
+            page_size = min(MAX_RESULTS_PER_PAGE, max_total - fetched)
+            video_ids, page_token = self._search_page(query, page_size, page_token)
+            if not video_ids:
+                return
+            fetched += len(video_ids)
+
+            yield from self.get_video_details(self._skip_known(video_ids))
+
+            if not page_token:
+                return
+
+    def stream_search_many(self, queries: List[str], max_total_per_query: int = 50) -> Iterator[Dict]:
+        """Run iter_search for several queries concurrently, yielding videos as they arrive
+
+        Unlike search_many the order is not stable; a bounded hand-off queue keeps
+        memory flat by pausing harvesters while the consumer is busy.
+        """
+        if not queries:
+            return
+
+        handoff = queue.Queue(maxsize=self.max_concurrency * MAX_RESULTS_PER_PAGE)
+        finished = object()
+        stopping = threading.Event()
+
+        def put(item):
+            while not stopping.is_set():
+                try:
+                    handoff.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def harvest(query):
+            try:
+                if stopping.is_set():
+                    return
+                for video in self.iter_search(query, max_total_per_query):
+                    if not put(video):
+                        return
+            finally:
+                put(finished)
+
+        workers = min(self.max_concurrency, len(queries))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='youtube-stream') as executor:
+            for query in queries:
+                executor.submit(harvest, query)
+
+            try:
+                remaining = len(queries)
+                while remaining:
+                    item = handoff.get()
+                    if item is finished:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                # Release harvesters blocked on a full queue if the consumer stops early
+                stopping.set()
+
+    def search_many(self, queries: List[str], max_results: int = 10,
+                    max_workers: Optional[int] = None) -> List[List[Dict]]:
+        """Search several queries concurrently; results come back in query order"""
+        if not queries:
+            return []
+
+        workers = min(max_workers or self.max_concurrency, self.max_concurrency, len(queries))
+        if workers == 1:
+            return [self.search_and_get_details(query, max_results) for query in queries]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='youtube-harvest') as executor:
+            return list(executor.map(lambda query: self.search_and_get_details(query, max_results), queries))
     
     def _parse_video_response(self, item: Dict) -> Dict:
         """Parse YouTube API response into our video format"""
@@ -3,6 +3,7 @@ from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 from .config import config
+from .profiling import register_request_profiler
 
 def create_app(config_name=None):
     """Flask application factory"""
@@ -24,9 +25,23 @@ def create_app(config_name=None):
     # Register API blueprints
     from .api.base import api_base_bp
     from .api.videos import videos_api_bp
+    from .api.quota import quota_api_bp
+    from .api.admin import admin_api_bp
 
     app.register_blueprint(api_base_bp)
     app.register_blueprint(videos_api_bp)
+    app.register_blueprint(quota_api_bp)
+    app.register_blueprint(admin_api_bp)
+
+    _register_request_metrics(app)
+    register_request_profiler(app)
+
+    from ..database.connection import release_connections
+
+    @app.teardown_appcontext
+    def release_request_connections(exception=None):
+        # The threaded dev server runs each request on a new thread; let the next one reuse its connections
+        release_connections()
 
     # Simple SPA routing - serve Vue app for all non-API routes
     from flask import send_from_directory, jsonify
@@ -46,3 +61,28 @@ def create_app(config_name=None):
             }), 404
 
     return app
+
+def _register_request_metrics(app):
+    """Time every request per endpoint; nothing is registered when metrics are disabled"""
+    from ..metrics import HTTP_REQUEST_DURATION, METRICS_ENABLED
+    if not METRICS_ENABLED:
+        return
+
+    import time
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # The URL rule keeps label cardinality bounded (no raw paths)
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=request.method, endpoint=endpoint, status=response.status_code
+            )
+        return response
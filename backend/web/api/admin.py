@@ -0,0 +1,46 @@
+from flask import Blueprint, current_app, jsonify, request, send_file
+from ..profiling import PROFILE_TOKEN_HEADER
+
+admin_api_bp = Blueprint('admin_api', __name__, url_prefix='/api/admin')
+
+@admin_api_bp.before_request
+def check_profiling_access():
+    """Hide the admin API unless profiling is on, and require the token when one is set"""
+    if 'profile_store' not in current_app.extensions:
+        return jsonify({'success': False, 'error': 'Profiling is disabled (PROFILING_ENABLED=0)'}), 404
+
+    token = current_app.config.get('PROFILE_TOKEN')
+    if token and request.headers.get(PROFILE_TOKEN_HEADER) != token:
+        return jsonify({'success': False, 'error': 'Invalid profile token'}), 403
+
+@admin_api_bp.route('/profiles')
+def list_profiles():
+    """List saved request profiles, slowest first (?order=recent for newest first)"""
+    store = current_app.extensions['profile_store']
+    limit = request.args.get('limit', 20, type=int)
+    profiles = store.list(limit=limit, slowest=request.args.get('order') != 'recent')
+    return jsonify({
+        'success': True,
+        'profiles': profiles,
+        'count': len(profiles)
+    })
+
+@admin_api_bp.route('/profiles/<name>')
+def get_profile(name):
+    """Summary of one profile with its most expensive functions"""
+    summary = current_app.extensions['profile_store'].get(name)
+    if summary is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    return jsonify({'success': True, 'profile': summary})
+
+@admin_api_bp.route('/profiles/<name>.prof')
+def download_profile(name):
+    """Raw cProfile output for snakeviz, flameprof or pstats"""
+    path = current_app.extensions['profile_store'].path_for(name)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    try:
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f"{name}.prof")
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
@@ -1,4 +1,5 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, jsonify
+from ...metrics import METRICS_ENABLED, REGISTRY
 
 # Base API blueprint for common functionality
 api_base_bp = Blueprint('api_base', __name__, url_prefix='/api')
@@ -12,6 +13,47 @@ def health_check():
         'version': '1.0.0'
     })
 
+@api_base_bp.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    if not METRICS_ENABLED:
+        return jsonify({'success': False, 'error': 'Metrics are disabled (METRICS_ENABLED=0)'}), 404
+
+    try:
+        _update_app_gauges(current_app.config.get('DATABASE_PATH', 'video_inspiration.db'))
+    except Exception as e:
+        print(f"Warning: could not update metrics gauges: {e}")
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def _update_app_gauges(db_path):
+    """Refresh point-in-time gauges (catalog, inventory, quota, model) right before a scrape"""
+    from ...database.preference_operations import get_user_count_from_database
+    from ...database.video_operations import get_catalog_counts_from_database
+    from ...services.quota_ledger import QuotaLedger
+    from .videos import _recommendation_services
+
+    counts = get_catalog_counts_from_database(db_path)
+    REGISTRY.gauge('mytube_catalog_videos', 'Videos stored in the catalog').set(counts['videos'])
+    REGISTRY.gauge('mytube_rated_videos', 'Videos the default user has rated').set(counts['rated'])
+    REGISTRY.gauge('mytube_unrated_videos', 'Unrated videos available to recommend to the default user').set(
+        counts['unrated']
+    )
+    REGISTRY.gauge('mytube_users', 'Users with at least one rating').set(get_user_count_from_database(db_path))
+
+    ledger = QuotaLedger(db_path, current_app.config.get('YOUTUBE_QUOTA_CEILING', 10000))
+    REGISTRY.gauge('mytube_youtube_quota_spent_units', 'YouTube quota units spent today').set(ledger.spent())
+    REGISTRY.gauge('mytube_youtube_quota_ceiling_units', 'Daily YouTube quota budget').set(ledger.ceiling)
+
+    service = _recommendation_services.get(db_path)
+    if service is not None:
+        REGISTRY.gauge('mytube_model_generation', "Generation of the default user's published model").set(
+            service.get_model_snapshot().generation
+        )
+        REGISTRY.gauge('mytube_model_trainers', 'Users with a model trainer in this process').set(service.user_count)
+        REGISTRY.gauge('mytube_refill_running', '1 while a background video refill runs').set(
+            1 if service.refiller.running else 0
+        )
+
 @api_base_bp.errorhandler(404)
 def api_not_found(error):
     """Handle 404 errors for API endpoints"""
@@ -0,0 +1,23 @@
+from flask import Blueprint, jsonify, current_app
+from ...services.quota_ledger import QuotaLedger
+
+quota_api_bp = Blueprint('quota_api', __name__, url_prefix='/api')
+
+@quota_api_bp.route('/quota')
+def get_quota():
+    """Get today's YouTube API quota spend and remaining budget"""
+    try:
+        ledger = QuotaLedger(
+            current_app.config.get('DATABASE_PATH', 'video_inspiration.db'),
+            ceiling=current_app.config.get('YOUTUBE_QUOTA_CEILING', 10000)
+        )
+        return jsonify({
+            'success': True,
+            **ledger.usage()
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -1,24 +1,67 @@
+import threading
 from flask import Blueprint, jsonify, request, current_app
-from ...services.recommendation_service import RecommendationService
-from ...database.preference_operations import save_video_rating_to_database, get_rated_count_from_database
-from ...ml.model_training import create_recommendation_model, train_model_on_user_preferences
-from ...database.preference_operations import get_training_data_from_database
+from ...services.recommendation_service import RecommendationService, is_valid_user_id
+from ...database.migrations import DEFAULT_USER_ID
+from ...database.preference_operations import get_liked_count_from_database, get_rated_count_from_database
 
 videos_api_bp = Blueprint('videos_api', __name__, url_prefix='/api')
 
+LIKED_PAGE_SIZE = 50
+MAX_LIKED_PAGE_SIZE = 200
 
+# One long-lived service per database so the trained model survives across requests
+_recommendation_services = {}
+_recommendation_services_lock = threading.Lock()
 
 def get_recommendation_service():
-    """Get a fresh recommendation service instance"""
+    """Get the process-wide recommendation service for the configured database"""
     db_path = current_app.config.get('DATABASE_PATH', 'video_inspiration.db')
-    return RecommendationService(db_path)
 
+    service = _recommendation_services.get(db_path)
+    if service is None:
+        with _recommendation_services_lock:
+            service = _recommendation_services.get(db_path)
+            if service is None:
+                service = RecommendationService(
+                    db_path,
+                    retrain_quiet_period=current_app.config.get('RETRAIN_QUIET_PERIOD_SECONDS', 2.0),
+                    retrain_rating_threshold=current_app.config.get('RETRAIN_RATING_THRESHOLD', 5),
+                    model_dir=current_app.config.get('MODEL_DIR'),
+                    refill_low_watermark=current_app.config.get('REFILL_LOW_WATERMARK', 5),
+                    refill_high_watermark=current_app.config.get('REFILL_HIGH_WATERMARK', 20),
+                    refill_retry_seconds=current_app.config.get('REFILL_RETRY_SECONDS', 300.0),
+                    feature_store_dir=current_app.config.get('FEATURE_STORE_DIR'),
+                    model_type=current_app.config.get('MODEL_TYPE'),
+                    full_retrain_every=current_app.config.get('ONLINE_FULL_RETRAIN_EVERY', 50),
+                    model_cache_max_models=current_app.config.get('MODEL_CACHE_MAX_MODELS', 32),
+                    model_cache_max_bytes=int(current_app.config.get('MODEL_CACHE_MAX_MB', 512) * 1024 * 1024),
+                    max_trainers=current_app.config.get('MODEL_TRAINERS_MAX', 256)
+                )
+                _recommendation_services[db_path] = service
+    return service
+
+def _invalid_user_response(user_id):
+    return jsonify({
+        'success': False,
+        'error': f"Invalid user ID {user_id!r} (use up to 64 letters, digits, '_', '.', '@' or '-')"
+    }), 400
+
+# The unprefixed routes act for the default user, so single-user setups keep working unchanged
 @videos_api_bp.route('/recommendations')
 def get_recommendations():
-    """Get video recommendations"""
+    """Get video recommendations for the default user"""
+    return get_user_recommendations(DEFAULT_USER_ID)
+
+@videos_api_bp.route('/users/<user_id>/recommendations')
+def get_user_recommendations(user_id):
+    """Get video recommendations for a user"""
+    if not is_valid_user_id(user_id):
+        return _invalid_user_response(user_id)
+
     try:
         service = get_recommendation_service()
-        recommendations = service.get_recommendations()
+        recommendations = service.get_recommendations(user_id)
+        snapshot = service.get_model_snapshot(user_id)
 
         # Format for web response
         formatted_recommendations = [
@@ -28,8 +71,11 @@ def get_recommendations():
         return jsonify({
             'success': True,
             'videos': formatted_recommendations,
-            'model_trained': service.model_trained,
-            'total_ratings': get_rated_count_from_database(service.db_path)
+            'user_id': user_id,
+            'model_trained': snapshot.has_model,
+            'model_generation': snapshot.generation,
+            'total_ratings': get_rated_count_from_database(service.db_path, user_id),
+            'refill': service.refiller.status(user_id=user_id)
         })
 
     except Exception as e:
@@ -56,7 +102,15 @@ def get_recommendations():
 
 @videos_api_bp.route('/rate', methods=['POST'])
 def rate_video():
-    """Rate a video"""
+    """Rate a video as the default user"""
+    return rate_user_video(DEFAULT_USER_ID)
+
+@videos_api_bp.route('/users/<user_id>/rate', methods=['POST'])
+def rate_user_video(user_id):
+    """Rate a video as a user"""
+    if not is_valid_user_id(user_id):
+        return _invalid_user_response(user_id)
+
     try:
         data = request.json
         video_id = data.get('video_id')
@@ -70,13 +124,16 @@ def rate_video():
 
         service = get_recommendation_service()
 
-        # Save rating and potentially retrain model
-        result = service.rate_video(video_id, liked)
+        # Save rating; the model retrains in the background
+        result = service.rate_video(video_id, liked, user_id)
 
         return jsonify({
             'success': True,
             'message': 'Rating saved successfully',
-            'model_retrained': result.get('model_retrained', False),
+            'status': 'retrain scheduled' if result.get('retrain_scheduled') else 'saved',
+            'retrain_scheduled': result.get('retrain_scheduled', False),
+            'model_updated': result.get('model_updated', False),
+            'model_generation': result.get('model_generation', 0),
             'total_ratings': result.get('total_ratings', 0)
         })
 
@@ -88,10 +145,21 @@ def rate_video():
 
 @videos_api_bp.route('/liked')
 def get_liked_videos():
-    """Get liked videos"""
+    """Get the default user's liked videos"""
+    return get_user_liked_videos(DEFAULT_USER_ID)
+
+@videos_api_bp.route('/users/<user_id>/liked')
+def get_user_liked_videos(user_id):
+    """Get a user's liked videos, newest first; pass next_before back as ?before= for the next page"""
+    if not is_valid_user_id(user_id):
+        return _invalid_user_response(user_id)
+
     try:
+        limit = min(max(request.args.get('limit', LIKED_PAGE_SIZE, type=int), 1), MAX_LIKED_PAGE_SIZE)
+        before = request.args.get('before', type=int)
+
         service = get_recommendation_service()
-        liked_videos = service.get_liked_videos()
+        liked_videos = service.get_liked_videos(limit, before, user_id)
 
         # Format for web response
         formatted_videos = [
@@ -101,7 +169,25 @@ def get_liked_videos():
         return jsonify({
             'success': True,
             'videos': formatted_videos,
-            'total_liked': len(formatted_videos)
+            'total_liked': get_liked_count_from_database(service.db_path, user_id),
+            'next_before': liked_videos[-1]['rating_id'] if len(liked_videos) == limit else None
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@videos_api_bp.route('/model-cache')
+def get_model_cache_stats():
+    """Per-user model cache size, hit rate and evictions"""
+    try:
+        service = get_recommendation_service()
+        return jsonify({
+            'success': True,
+            'cache': service.model_cache.stats(),
+            'active_users': service.user_count
         })
 
     except Exception as e:
@@ -10,7 +10,37 @@ class Config:
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'video_inspiration.db')
+
+    # Model retraining settings
+    RETRAIN_QUIET_PERIOD_SECONDS = float(os.getenv('RETRAIN_QUIET_PERIOD_SECONDS', '2.0'))
+    RETRAIN_RATING_THRESHOLD = int(os.getenv('RETRAIN_RATING_THRESHOLD', '5'))
+    MODEL_DIR = os.getenv('MODEL_DIR', 'models')
+    # 'forest' (full refit per retrain) or 'online' (incremental updates per rating)
+    MODEL_TYPE = os.getenv('MODEL_TYPE', 'forest')
+    ONLINE_FULL_RETRAIN_EVERY = int(os.getenv('ONLINE_FULL_RETRAIN_EVERY', '50'))
+    # Per-user models kept in memory; least recently used ones are evicted past either limit
+    MODEL_CACHE_MAX_MODELS = int(os.getenv('MODEL_CACHE_MAX_MODELS', '32'))
+    MODEL_CACHE_MAX_MB = float(os.getenv('MODEL_CACHE_MAX_MB', '512'))
+    # Trainers kept for recently active users (users without ratings never get one)
+    MODEL_TRAINERS_MAX = int(os.getenv('MODEL_TRAINERS_MAX', '256'))
+    # Memory-mapped float32 copy of video_features used for scoring; empty disables it
+    FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', 'feature_store')
+
+    # Background refill of unrated videos
+    REFILL_LOW_WATERMARK = int(os.getenv('REFILL_LOW_WATERMARK', '5'))
+    REFILL_HIGH_WATERMARK = int(os.getenv('REFILL_HIGH_WATERMARK', '20'))
+    REFILL_RETRY_SECONDS = float(os.getenv('REFILL_RETRY_SECONDS', '300'))
+
+    # YouTube API settings
+    YOUTUBE_QUOTA_CEILING = int(os.getenv('YOUTUBE_QUOTA_CEILING', '10000'))
     
+    # On-demand request profiling (X-Profile: 1 or ?profile=1, plus a random sample)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0').lower() in ('1', 'true', 'yes')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0.0'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '50'))
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+
     # Frontend settings
     FRONTEND_DIST_PATH = os.getenv('FRONTEND_DIST_PATH', 'frontend/dist')
     
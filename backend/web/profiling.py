@@ -0,0 +1,182 @@
+"""
+Request Profiling
+Profiles sampled or explicitly flagged requests with cProfile and keeps the latest results on disk
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_FLAG = 'profile'
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+TOP_FUNCTIONS = 15
+
+# Only one cProfile profiler can be active per process, so concurrent requests are skipped
+_profiler_lock = threading.Lock()
+
+
+class ProfileStore:
+    """Saves .prof files with a JSON summary beside each and keeps only the newest `keep`"""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+
+    def save(self, profiler: cProfile.Profile, meta: Dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', meta['path']).strip('-') or 'root'
+        name = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{meta['method']}-{slug[:60]}"
+
+        profiler.dump_stats(os.path.join(self.directory, name + '.prof'))
+        summary = dict(meta, name=name, top_functions=self._top_functions(profiler))
+        with open(os.path.join(self.directory, name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        self._prune()
+        return name
+
+    def list(self, limit: int = 20, slowest: bool = True) -> List[Dict]:
+        """Saved profiles, slowest first (or newest first), without the per-function breakdown"""
+        profiles = []
+        for summary in self._summaries():
+            summary.pop('top_functions', None)
+            profiles.append(summary)
+        key = 'duration_ms' if slowest else 'name'
+        profiles.sort(key=lambda summary: summary.get(key, 0), reverse=True)
+        return profiles[:limit]
+
+    def get(self, name: str) -> Optional[Dict]:
+        path = self.path_for(name, '.json')
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def path_for(self, name: str, suffix: str = '.prof') -> Optional[str]:
+        # Names come from URLs; never let one escape the profile directory
+        if not re.fullmatch(r'[A-Za-z0-9-]+', name):
+            return None
+        return os.path.join(self.directory, name + suffix)
+
+    def _summaries(self) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    summaries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return summaries
+
+    def _prune(self):
+        with self._lock:
+            names = sorted(
+                filename[:-len('.prof')] for filename in os.listdir(self.directory)
+                if filename.endswith('.prof')
+            )
+            # Names start with a timestamp, so the oldest sort first
+            for name in names[:-self.keep]:
+                for suffix in ('.prof', '.json'):
+                    try:
+                        os.remove(os.path.join(self.directory, name + suffix))
+                    except FileNotFoundError:
+                        pass
+
+    @staticmethod
+    def _top_functions(profiler: cProfile.Profile) -> List[Dict]:
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, own_time, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{function} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'own_seconds': round(own_time, 6),
+                'cumulative_seconds': round(cumulative, 6)
+            })
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+
+def register_request_profiler(app):
+    """Profile a sampled fraction of requests, plus any carrying X-Profile: 1 or ?profile=1"""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    from flask import g, request
+
+    store = ProfileStore(app.config.get('PROFILE_DIR', 'profiles'), app.config.get('PROFILE_KEEP', 50))
+    app.extensions['profile_store'] = store
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    token = app.config.get('PROFILE_TOKEN')
+
+    def requested() -> bool:
+        flagged = request.headers.get(PROFILE_HEADER) == '1' or request.args.get(PROFILE_QUERY_FLAG) == '1'
+        if not flagged:
+            return False
+        # With a token configured, strangers can't make the server profile on demand
+        return not token or request.headers.get(PROFILE_TOKEN_HEADER) == token
+
+    @app.before_request
+    def start_profiling():
+        if request.path.startswith('/api/admin/'):
+            return
+        if not (requested() or (sample_rate and random.random() < sample_rate)):
+            return
+        if not _profiler_lock.acquire(blocking=False):
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            _profiler_lock.release()
+            return
+        g.request_profiler = profiler
+        g.request_profile_started = time.perf_counter()
+
+    @app.after_request
+    def save_profile(response):
+        profiler = _stop_profiler(g)
+        if profiler is None:
+            return response
+
+        meta = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.url_rule.rule if request.url_rule else None,
+            'query': request.query_string.decode('utf-8', 'replace'),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.pop('request_profile_started')) * 1000, 3),
+            'recorded_at': datetime.now().isoformat()
+        }
+        try:
+            response.headers['X-Profile-Id'] = store.save(profiler, meta)
+        except OSError as e:
+            print(f"Warning: could not save request profile: {e}")
+        return response
+
+    @app.teardown_request
+    def stop_profiling(_exception=None):
+        # after_request is skipped when a view raises; never leave the profiler running
+        _stop_profiler(g)
+
+
+def _stop_profiler(g) -> Optional[cProfile.Profile]:
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+    return profiler
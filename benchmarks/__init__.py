@@ -0,0 +1 @@
+# Scaling benchmarks; run with `python -m benchmarks.run`
@@ -0,0 +1,80 @@
+"""
+Synthetic Catalog Generator
+Fills videos, video_features and preferences with reproducible data at any size
+"""
+import random
+import time
+from typing import Dict, Iterator, List, Optional
+from backend.database.connection import transaction
+from backend.database.manager import setup_database_tables
+from backend.database.video_operations import bulk_save_videos_with_features_to_database
+from backend.devtools.fake_youtube_api import FakeYouTubeAPI
+from backend.ml.feature_extraction import extract_features_batch
+from backend.services.youtube_service import YouTubeService
+
+GENERATE_BATCH_SIZE = 5000
+
+
+def default_rating_count(size: int) -> int:
+    """One rating per hundred videos, within what a single person plausibly rates"""
+    return min(max(size // 100, 50), 5000)
+
+
+def iter_synthetic_videos(size: int, seed: int = 0) -> Iterator[Dict]:
+    """Yield parsed videos exactly as YouTubeService would hand them to the ingest path"""
+    api = FakeYouTubeAPI(catalog_size=size, seed=seed)
+    parser = YouTubeService('benchmark')
+    for index in range(size):
+        yield parser._parse_video_response(api.generate_video(index))
+
+
+def sample_videos(count: int, seed: int = 0) -> List[Dict]:
+    return list(iter_synthetic_videos(count, seed))
+
+
+def would_like(video: Dict, rng: random.Random) -> bool:
+    """Hidden taste the model should be able to learn, with some noise"""
+    title = video['title'].lower()
+    liked = ('learn' in title or 'project' in title or 'neural' in title
+             or video['like_count'] / max(video['view_count'], 1) > 0.05)
+    return liked if rng.random() > 0.1 else not liked
+
+
+def generate_catalog(db_path: str, size: int, ratings: Optional[int] = None, seed: int = 0,
+                     batch_size: int = GENERATE_BATCH_SIZE) -> Dict:
+    """Create a catalog of size videos and rate a random subset of them"""
+    setup_database_tables(db_path)
+    ratings = default_rating_count(size) if ratings is None else min(ratings, size)
+    rng = random.Random(seed)
+    rated_indexes = set(rng.sample(range(size), ratings))
+
+    started = time.perf_counter()
+    batch = []
+    preferences = []
+    for index, video in enumerate(iter_synthetic_videos(size, seed)):
+        batch.append(video)
+        if index in rated_indexes:
+            preferences.append((video['id'], would_like(video, rng), ''))
+        if len(batch) >= batch_size:
+            _save_batch(batch, db_path)
+            batch = []
+    _save_batch(batch, db_path)
+
+    with transaction(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO preferences (video_id, liked, notes) VALUES (?, ?, ?)",
+            preferences
+        )
+
+    return {
+        'videos': size,
+        'ratings': len(preferences),
+        'liked': sum(1 for _, liked, _ in preferences if liked),
+        'seconds': time.perf_counter() - started
+    }
+
+
+def _save_batch(videos: List[Dict], db_path: str):
+    if videos:
+        features = extract_features_batch(videos).tolist()
+        bulk_save_videos_with_features_to_database(videos, features, db_path, GENERATE_BATCH_SIZE)
@@ -0,0 +1,92 @@
+"""
+Compiled Forest Microbenchmark
+Times sklearn's predict_proba against the compiled forest walker across batch sizes
+
+    python -m benchmarks.compiled_forest --ratings 1000 --batches 1 10 100 1000
+
+Every batch is checked for bit-identical probabilities before it is timed. The
+crossover point is where COMPILED_FOREST_MAX_BATCH should sit.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+import numpy as np
+
+from benchmarks.catalog import generate_catalog
+from benchmarks.online_learning import load_ratings
+
+DEFAULT_BATCHES = [1, 5, 10, 25, 50, 100, 200, 500, 1000, 5000]
+
+
+def median_seconds(func: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from backend.ml.compiled_forest import CompiledForest
+    from backend.ml.model_training import as_model_input, create_recommendation_model
+
+    parser = argparse.ArgumentParser(description='Compare sklearn and compiled forest inference')
+    parser.add_argument('--videos', type=int, default=20000, help='Synthetic catalog size (default: 20000)')
+    parser.add_argument('--ratings', type=int, default=1000, help='Ratings to train on (default: 1000)')
+    parser.add_argument('--batches', type=int, nargs='+', default=DEFAULT_BATCHES, help='Batch sizes to time')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per batch (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='Catalog seed (default: 0)')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='mytube-compiled-')
+    try:
+        db_path = os.path.join(work_dir, 'ratings.db')
+        print(f"🏗️  Generating {args.videos:,} videos with {args.ratings:,} ratings...")
+        generate_catalog(db_path, args.videos, ratings=args.ratings, seed=args.seed)
+        features, liked = load_ratings(db_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    model = create_recommendation_model('forest')
+    model.fit(as_model_input(features), liked)
+    started = time.perf_counter()
+    compiled = CompiledForest(model)
+    print(f"🌲 {compiled.n_trees} trees, {len(compiled.feature):,} nodes, depth {compiled.depth}, "
+          f"compiled in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    print(f"  {'batch':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for batch in args.batches:
+        X = as_model_input(features[rng.integers(0, len(features), size=batch)])
+        if not np.array_equal(model.predict_proba(X), compiled.predict_proba(X)):
+            print(f"❌ Probabilities differ at batch size {batch}")
+            return 1
+
+        sklearn_seconds = median_seconds(lambda: model.predict_proba(X), args.repeat)
+        compiled_seconds = median_seconds(lambda: compiled.predict_proba(X), args.repeat)
+        results.append({'batch': batch, 'sklearn_ms': sklearn_seconds * 1000,
+                        'compiled_ms': compiled_seconds * 1000, 'speedup': sklearn_seconds / compiled_seconds})
+        print(f"  {batch:>6} {sklearn_seconds * 1000:11.2f} {compiled_seconds * 1000:12.2f} "
+              f"{sklearn_seconds / compiled_seconds:7.1f}x")
+
+    print("✅ Probabilities identical at every batch size")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'videos': args.videos, 'ratings': len(liked), 'seed': args.seed,
+                       'trees': compiled.n_trees, 'depth': compiled.depth, 'results': results}, f, indent=2)
+            f.write('\n')
+        print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
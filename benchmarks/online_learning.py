@@ -0,0 +1,145 @@
+"""
+Online Learning Comparison
+Replays ratings in order and compares model backends on accuracy against update latency
+
+    python -m benchmarks.online_learning --ratings 1000 --refit-every 10
+
+Every rating is first predicted by the current model and then learned
+(progressive validation), so each model is only scored on ratings it has not seen.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+
+from benchmarks.catalog import generate_catalog
+
+WARMUP_RATINGS = 20
+
+
+def load_ratings(db_path: str):
+    """Features and labels in the order the ratings were made"""
+    from backend.database.preference_operations import get_ratings_since_from_database
+    from backend.ml.model_training import FEATURE_COLUMNS
+
+    ratings, _ = get_ratings_since_from_database(0, FEATURE_COLUMNS, 10 ** 9, db_path)
+    features = np.array([rating[2:] for rating in ratings], dtype=np.float64)
+    liked = np.array([rating[1] for rating in ratings], dtype=int)
+    return features, liked
+
+
+def replay(name: str, model_type: str, features: np.ndarray, liked: np.ndarray,
+           refit_every: Optional[int]) -> Dict:
+    """Predict-then-learn over every rating after the warm-up fit
+
+    refit_every refits from scratch on all ratings so far every that many ratings;
+    online models apply partial_fit for each rating in between.
+    """
+    from backend.ml.model_training import as_model_input, create_recommendation_model, supports_online_updates
+
+    model = create_recommendation_model(model_type)
+    model.fit(as_model_input(features[:WARMUP_RATINGS]), liked[:WARMUP_RATINGS])
+    online = supports_online_updates(model)
+
+    probabilities = []
+    update_seconds = []
+    refits = 0
+    for index in range(WARMUP_RATINGS, len(liked)):
+        row = features[index:index + 1]
+        probabilities.append(model.predict_proba(as_model_input(row))[0, 1])
+
+        started = time.perf_counter()
+        seen = index + 1
+        if refit_every and (seen - WARMUP_RATINGS) % refit_every == 0:
+            model = create_recommendation_model(model_type)
+            model.fit(as_model_input(features[:seen]), liked[:seen])
+            refits += 1
+        elif online:
+            model.partial_fit(as_model_input(row), liked[index:index + 1])
+        else:
+            # Between refits a forest simply ignores the new rating
+            continue
+        update_seconds.append(time.perf_counter() - started)
+
+    actual = liked[WARMUP_RATINGS:]
+    probabilities = np.clip(np.array(probabilities), 1e-6, 1 - 1e-6)
+    return {
+        'name': name,
+        'model_type': model_type,
+        'refit_every': refit_every,
+        'evaluated_ratings': len(actual),
+        'refits': refits,
+        'accuracy': accuracy_score(actual, probabilities >= 0.5),
+        'log_loss': log_loss(actual, probabilities, labels=[0, 1]),
+        'roc_auc': roc_auc_score(actual, probabilities) if len(set(actual)) > 1 else None,
+        'updates': len(update_seconds),
+        'update_mean_ms': statistics.fmean(update_seconds) * 1000 if update_seconds else 0.0,
+        'update_p95_ms': float(np.percentile(update_seconds, 95)) * 1000 if update_seconds else 0.0,
+        'update_max_ms': max(update_seconds) * 1000 if update_seconds else 0.0,
+        'update_total_seconds': sum(update_seconds)
+    }
+
+
+def print_table(results: List[Dict]):
+    print(f"  {'backend':<34} {'acc':>6} {'logloss':>8} {'auc':>6} {'updates':>8} "
+          f"{'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'total s':>8}")
+    for result in results:
+        auc = f"{result['roc_auc']:.3f}" if result['roc_auc'] is not None else '  n/a'
+        print(f"  {result['name']:<34} {result['accuracy']:6.3f} {result['log_loss']:8.3f} {auc:>6} "
+              f"{result['updates']:8d} {result['update_mean_ms']:9.2f} {result['update_p95_ms']:9.2f} "
+              f"{result['update_max_ms']:9.2f} {result['update_total_seconds']:8.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Compare forest refits with online updates')
+    parser.add_argument('--videos', type=int, default=20000, help='Synthetic catalog size (default: 20000)')
+    parser.add_argument('--ratings', type=int, default=1000, help='Ratings to replay (default: 1000)')
+    parser.add_argument('--refit-every', type=int, default=10,
+                        help='Ratings between forest refits (default: 10; 1 matches retraining per rating)')
+    parser.add_argument('--online-refit-every', type=int, default=50,
+                        help='Full refit interval for the online model with periodic retrains (default: 50)')
+    parser.add_argument('--seed', type=int, default=0, help='Catalog seed (default: 0)')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='mytube-online-')
+    try:
+        db_path = os.path.join(work_dir, 'ratings.db')
+        print(f"🏗️  Generating {args.videos:,} videos with {args.ratings:,} ratings...")
+        generate_catalog(db_path, args.videos, ratings=args.ratings, seed=args.seed)
+        features, liked = load_ratings(db_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    backends = [
+        (f'forest, refit every {args.refit_every}', 'forest', args.refit_every),
+        ('online, partial_fit only', 'online', None),
+        (f'online, full refit every {args.online_refit_every}', 'online', args.online_refit_every)
+    ]
+    results = []
+    for name, model_type, refit_every in backends:
+        print(f"   ⏱️  {name}")
+        results.append(replay(name, model_type, features, liked, refit_every))
+
+    print(f"📊 Progressive validation over {len(liked) - WARMUP_RATINGS} ratings "
+          f"({liked.mean():.0%} liked)")
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'videos': args.videos, 'ratings': len(liked), 'seed': args.seed,
+                       'results': results}, f, indent=2)
+            f.write('\n')
+        print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Benchmark Runner
+Times the hot paths against synthetic catalogs and writes comparable JSON results
+
+    python -m benchmarks.run --sizes 10k 100k 1m --output results.json
+    python -m benchmarks.run --sizes 10k --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.catalog import generate_catalog, sample_videos
+
+DEFAULT_SIZES = ['10k', '100k', '1m']
+DEFAULT_DATA_DIR = os.path.join('benchmarks', '.data')
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+FEATURE_SAMPLE_SIZE = 1000
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def time_call(func: Callable, repeat: int) -> Dict:
+    """Run func repeat times; keeps the last return value's row count when it has one"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+
+    timing = {
+        'repeat': repeat,
+        'min_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'mean_seconds': statistics.fmean(timings),
+        'max_seconds': max(timings)
+    }
+    if hasattr(result, '__len__'):
+        timing['rows'] = len(result)
+    return timing
+
+
+def get_catalog(size: int, data_dir: str, seed: int, regenerate: bool) -> str:
+    """Build (or reuse) the pristine catalog for size; benchmarks run on a copy of it"""
+    os.makedirs(data_dir, exist_ok=True)
+    db_path = os.path.join(data_dir, f"catalog-{size}-seed{seed}.db")
+    if regenerate or not os.path.exists(db_path):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        print(f"🏗️  Generating {size:,} synthetic videos...")
+        summary = generate_catalog(db_path, size, seed=seed)
+        _checkpoint(db_path)
+        print(
+            f"   {summary['ratings']} ratings ({summary['liked']} liked) "
+            f"in {summary['seconds']:.1f}s"
+        )
+    return db_path
+
+
+def _checkpoint(db_path: str):
+    from backend.database.connection import get_connection
+    get_connection(db_path).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def run_size(size: int, catalog_path: str, work_dir: str, repeat: int) -> Dict:
+    """Time every hot path against a scratch copy of one catalog"""
+    from backend.database.preference_operations import (
+        get_training_data_from_database,
+        get_unrated_videos_with_features_from_database
+    )
+    from backend.ml.feature_extraction import extract_all_features_from_video, extract_features_batch
+    from backend.ml.model_training import create_recommendation_model, train_model_on_user_preferences
+    from backend.ml.predictions import predict_video_preferences_with_model
+    from backend.services.recommendation_service import RecommendationService
+    from backend.services.scoring_service import recommend_top_unrated_videos
+
+    db_path = os.path.join(work_dir, f"bench-{size}.db")
+    shutil.copyfile(catalog_path, db_path)
+    model_dir = os.path.join(work_dir, f"models-{size}")
+    feature_store_dir = os.path.join(work_dir, f"feature-store-{size}")
+    results = {}
+
+    def record(name: str, func: Callable, times: int = repeat):
+        print(f"   ⏱️  {name}")
+        results[name] = time_call(func, times)
+
+    videos = sample_videos(FEATURE_SAMPLE_SIZE)
+    record('extract_all_features_from_video',
+           lambda: [extract_all_features_from_video(video) for video in videos])
+    record('extract_features_batch', lambda: extract_features_batch(videos))
+
+    record('get_training_data_from_database', lambda: get_training_data_from_database(db_path))
+    training_data = get_training_data_from_database(db_path)
+
+    def train():
+        model = create_recommendation_model()
+        train_model_on_user_preferences(model, training_data)
+        return training_data
+    record('train_model_on_user_preferences', train)
+    model = create_recommendation_model()
+    train_model_on_user_preferences(model, training_data)
+
+    record('get_unrated_videos_with_features_from_database',
+           lambda: get_unrated_videos_with_features_from_database(db_path))
+    unrated = get_unrated_videos_with_features_from_database(db_path)
+    # Bound as a default so the frame can be freed right after, before the next benchmarks
+    record('predict_video_preferences_with_model',
+           lambda unrated=unrated: predict_video_preferences_with_model(model, unrated))
+    del unrated
+    record('recommend_top_unrated_videos', lambda: recommend_top_unrated_videos(model, db_path))
+
+    # Startup trains and materializes scores for the whole catalog, so it runs once
+    services = []
+    record('recommendation_service_startup',
+           lambda: services.append(RecommendationService(db_path, retrain_quiet_period=3600,
+                                                         model_dir=model_dir,
+                                                         feature_store_dir=feature_store_dir)), times=1)
+    service = services[0]
+    record('get_liked_videos', service.get_liked_videos)
+    record('get_recommendations', service.get_recommendations)
+    service.stop()
+
+    results.update(_run_endpoints(db_path, model_dir, feature_store_dir, repeat))
+    return results
+
+
+def _run_endpoints(db_path: str, model_dir: str, feature_store_dir: str, repeat: int) -> Dict:
+    """Time full Flask requests through the test client"""
+    from backend.database.connection import get_connection
+    from backend.web import create_app
+    from backend.web.api import videos as videos_api
+
+    app = create_app('default')
+    app.config.update(
+        TESTING=True,
+        DATABASE_PATH=db_path,
+        MODEL_DIR=model_dir,
+        FEATURE_STORE_DIR=feature_store_dir,
+        RETRAIN_QUIET_PERIOD_SECONDS=3600.0
+    )
+    client = app.test_client()
+    results = {}
+
+    def request(method: str, path: str, **kwargs):
+        response = client.open(path, method=method, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}")
+        return response.get_json().get('videos', [])
+
+    print("   ⏱️  flask cold start")
+    results['flask GET /api/recommendations (cold)'] = time_call(
+        lambda: request('GET', '/api/recommendations'), 1
+    )
+
+    for path in ('/api/health', '/api/recommendations', '/api/liked', '/api/quota'):
+        print(f"   ⏱️  flask GET {path}")
+        results[f'flask GET {path}'] = time_call(lambda: request('GET', path), repeat)
+
+    unrated_id = get_connection(db_path).execute('''
+        SELECT v.id FROM videos v LEFT JOIN preferences p ON p.video_id = v.id
+        WHERE p.video_id IS NULL LIMIT 1
+    ''').fetchone()[0]
+    print("   ⏱️  flask POST /api/rate")
+    results['flask POST /api/rate'] = time_call(
+        lambda: request('POST', '/api/rate', json={'video_id': unrated_id, 'liked': True}), repeat
+    )
+
+    service = videos_api._recommendation_services.pop(db_path, None)
+    if service is not None:
+        service.stop()
+    return results
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Describe benchmarks whose best time got slower than baseline by more than threshold
+
+    Minimums are compared because they are the least sensitive to machine noise.
+    """
+    regressions = []
+    baseline_runs = {run['size']: run['benchmarks'] for run in baseline.get('runs', [])}
+    for run in current['runs']:
+        previous = baseline_runs.get(run['size'], {})
+        for name, timing in run['benchmarks'].items():
+            if name not in previous:
+                continue
+            before = previous[name]['min_seconds']
+            after = timing['min_seconds']
+            change = (after - before) / before if before else 0.0
+            marker = '🔴' if change > threshold else ('🟢' if change < -threshold else '  ')
+            print(f"  {marker} {run['size']:>9,}  {name:<52} {before:9.4f}s -> {after:9.4f}s ({change:+.0%})")
+            if change > threshold:
+                regressions.append(f"{name} at {run['size']:,} videos: {change:+.0%}")
+    return regressions
+
+
+def _environment() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='MyTube scaling benchmarks')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Catalog sizes, e.g. 10k 100k 1m (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Catalog seed (default: 0)')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help='Where generated catalogs are kept between runs')
+    parser.add_argument('--regenerate', action='store_true', help='Rebuild catalogs even if cached')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', help='Baseline JSON to compare best times against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='Slowdown counted as a regression (default: 0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    report = {'environment': _environment(), 'runs': []}
+    work_dir = tempfile.mkdtemp(prefix='mytube-bench-')
+    try:
+        for size in (parse_size(text) for text in args.sizes):
+            catalog_path = get_catalog(size, args.data_dir, args.seed, args.regenerate)
+            print(f"📏 Benchmarking {size:,} videos")
+            report['runs'].append({
+                'size': size,
+                'seed': args.seed,
+                'benchmarks': run_size(size, catalog_path, work_dir, args.repeat)
+            })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"💾 Results written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Compared with {args.compare}")
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"      {regression}")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
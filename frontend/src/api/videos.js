@@ -18,11 +18,13 @@ export async function fetchRecommendations() {
 }
 
 /**
- * Fetch liked videos from the API
- * @returns {Promise<Object>} API response with liked videos
+ * Fetch a page of liked videos from the API, newest first
+ * @param {number|null} before - The next_before value from the previous page, or null for the first page
+ * @returns {Promise<Object>} API response with liked videos and next_before
  */
-export async function fetchLikedVideos() {
-  const response = await fetch('/api/liked');
+export async function fetchLikedVideos(before = null) {
+  const url = before === null ? '/api/liked' : `/api/liked?before=${encodeURIComponent(before)}`;
+  const response = await fetch(url);
   const data = await response.json();
   
   if (!data.success) {
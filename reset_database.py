@@ -4,7 +4,6 @@ This will delete your existing database and create a fresh one.
 """
 
 import os
-import sqlite3
 from pathlib import Path
 
 
@@ -16,6 +15,11 @@ def reset_database():
         print(f"🗑️  Removing existing database: {db_path}")
         os.remove(db_path)
 
+    # WAL mode keeps uncheckpointed pages in side files next to the database
+    for suffix in ("-wal", "-shm"):
+        if Path(db_path + suffix).exists():
+            os.remove(db_path + suffix)
+
     # Create new database with updated schema
     print("🔧 Creating new database with updated schema...")
     from backend.database.manager import setup_database_tables
@@ -0,0 +1,51 @@
+import os
+import sys
+import pytest
+
+# Tests import the app the same way app.py does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog import generate_catalog
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """An empty, fully migrated database"""
+    from backend.database.manager import setup_database_tables
+    path = str(tmp_path / 'test.db')
+    setup_database_tables(path)
+    return path
+
+
+@pytest.fixture
+def catalog_db(tmp_path):
+    """A small synthetic catalog with features and some default-user ratings"""
+    path = str(tmp_path / 'catalog.db')
+    generate_catalog(path, 300, ratings=40, seed=0)
+    return path
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    return str(tmp_path / 'models')
+
+
+@pytest.fixture
+def client(catalog_db, tmp_path):
+    """A Flask test client serving catalog_db; the service's trainers are stopped afterwards"""
+    from backend.web import create_app
+    from backend.web.api import videos as videos_api
+
+    app = create_app('default')
+    app.config.update(
+        TESTING=True,
+        DATABASE_PATH=catalog_db,
+        MODEL_DIR=str(tmp_path / 'models'),
+        FEATURE_STORE_DIR=str(tmp_path / 'feature_store'),
+        RETRAIN_QUIET_PERIOD_SECONDS=3600.0
+    )
+    yield app.test_client()
+
+    service = videos_api._recommendation_services.pop(catalog_db, None)
+    if service is not None:
+        service.stop()
@@ -0,0 +1,95 @@
+import copy
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from backend.ml import compiled_forest
+from backend.ml.compiled_forest import CompiledForest, get_compiled_forest, predict_proba_fast
+from backend.ml.model_training import FEATURE_COLUMNS, as_model_input, create_recommendation_model
+
+
+@pytest.fixture(scope='module')
+def training_set():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, len(FEATURE_COLUMNS)))
+    y = (X[:, 0] + 0.5 * X[:, 3] - X[:, 7] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def forest(training_set):
+    X, y = training_set
+    model = create_recommendation_model('forest')
+    model.fit(as_model_input(X), y)
+    return model
+
+
+@pytest.mark.parametrize('batch', [1, 2, 10, 128, 1000])
+def test_matches_predict_proba_bit_for_bit(forest, batch):
+    X = as_model_input(np.random.default_rng(batch).normal(size=(batch, len(FEATURE_COLUMNS))))
+    assert np.array_equal(CompiledForest(forest).predict_proba(X), forest.predict_proba(X))
+
+
+def test_matches_predict_proba_with_missing_values(training_set):
+    X, y = training_set
+    X = X.copy()
+    X[::7, 2] = np.nan
+    model = RandomForestClassifier(n_estimators=20, random_state=1).fit(as_model_input(X), y)
+
+    rows = X[:50].copy()
+    rows[::3, 5] = np.nan
+    rows = as_model_input(rows)
+    assert np.array_equal(CompiledForest(model).predict_proba(rows), model.predict_proba(rows))
+
+
+def test_rejects_mismatched_features(forest):
+    compiled = CompiledForest(forest)
+    with pytest.raises(ValueError):
+        compiled.predict_proba(np.zeros((1, len(FEATURE_COLUMNS) - 1)))
+
+
+def test_predict_proba_fast_matches_on_both_sides_of_the_batch_limit(forest, training_set, monkeypatch):
+    X, _ = training_set
+    monkeypatch.setattr(compiled_forest, 'COMPILED_FOREST_MAX_BATCH', 50)
+    assert get_compiled_forest(forest) is get_compiled_forest(forest)
+    assert get_compiled_forest(object()) is None
+
+    for rows in (X[:10], X[:200]):
+        rows = as_model_input(rows)
+        assert np.array_equal(predict_proba_fast(forest, rows), forest.predict_proba(rows))
+
+
+def _with_tree_arrays(forest, **overrides):
+    """Copy of forest whose trees are plain arrays, to mimic other sklearn versions' tree internals"""
+    forest = copy.deepcopy(forest)
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        arrays = {name: getattr(tree, name) for name in (
+            'node_count', 'max_depth', 'children_left', 'children_right', 'feature',
+            'threshold', 'missing_go_to_left', 'value')}
+        arrays.update({name: override(tree) for name, override in overrides.items()})
+        estimator.tree_ = SimpleNamespace(**{name: value for name, value in arrays.items() if value is not None})
+    return forest
+
+
+def test_normalizes_leaf_counts_from_older_sklearn(forest, monkeypatch):
+    # Before 1.4 leaves held weighted class counts
+    counts = _with_tree_arrays(forest, value=lambda tree: tree.value * tree.weighted_n_node_samples[:, None, None])
+    monkeypatch.setattr(compiled_forest, 'LEAF_VALUES_ARE_FRACTIONS', False)
+
+    X = as_model_input(np.random.default_rng(3).normal(size=(20, len(FEATURE_COLUMNS))))
+    np.testing.assert_allclose(CompiledForest(counts).predict_proba(X), forest.predict_proba(X))
+
+
+def test_falls_back_when_a_forest_cant_be_compiled(forest, training_set, monkeypatch):
+    # Before 1.3 trees had no missing_go_to_left
+    assert get_compiled_forest(_with_tree_arrays(forest, missing_go_to_left=lambda tree: None)) is None
+
+    def broken(model):
+        raise AttributeError("unexpected tree layout")
+
+    model = copy.deepcopy(forest)
+    monkeypatch.setattr(compiled_forest, 'CompiledForest', broken)
+    rows = as_model_input(training_set[0][:10])
+    assert get_compiled_forest(model) is None
+    assert np.array_equal(predict_proba_fast(model, rows), forest.predict_proba(rows))
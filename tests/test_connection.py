@@ -0,0 +1,35 @@
+import threading
+from backend.database.connection import get_connection, release_connections, transaction
+
+
+def _in_thread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_connections_released_by_finished_threads_are_reused(db_path):
+    def request():
+        conn = get_connection(db_path)
+        conn.execute("SELECT COUNT(*) FROM videos").fetchone()
+        release_connections()
+        return conn
+
+    first = _in_thread(request)
+    assert all(_in_thread(request) is first for _ in range(5))
+
+
+def test_released_connection_drops_an_open_transaction(db_path):
+    def request():
+        with transaction(db_path) as conn:
+            conn.execute("INSERT INTO videos (id, title) VALUES ('abc', 'kept')")
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO videos (id, title) VALUES ('xyz', 'dropped')")
+        release_connections()
+        return conn
+
+    conn = _in_thread(request)
+    assert not conn.in_transaction
+    assert [row[0] for row in get_connection(db_path).execute("SELECT id FROM videos")] == ['abc']
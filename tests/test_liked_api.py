@@ -0,0 +1,56 @@
+from backend.database.connection import get_connection
+from backend.database.preference_operations import save_video_rating_to_database
+
+
+def _liked_ids_newest_first(db_path, user_id='default'):
+    return [row[0] for row in get_connection(db_path).execute(
+        "SELECT video_id FROM preferences WHERE user_id = ? AND liked = 1 ORDER BY id DESC", (user_id,)
+    )]
+
+
+def _all_pages(client, path, limit):
+    pages = []
+    before = None
+    while True:
+        query = f'?limit={limit}' + (f'&before={before}' if before is not None else '')
+        body = client.get(path + query).get_json()
+        assert body['success']
+        pages.append(body)
+        before = body['next_before']
+        if before is None:
+            return pages
+
+
+def test_pages_walk_every_liked_video_newest_first(client, catalog_db):
+    expected = _liked_ids_newest_first(catalog_db)
+    assert len(expected) > 7
+
+    pages = _all_pages(client, '/api/liked', 7)
+    ids = [video['id'] for page in pages for video in page['videos']]
+    assert ids == expected
+    assert all(page['total_liked'] == len(expected) for page in pages)
+    assert all(0 <= video['confidence'] <= 100 for page in pages for video in page['videos'])
+
+
+def test_new_likes_do_not_shift_later_pages(client, catalog_db):
+    expected = _liked_ids_newest_first(catalog_db)
+    first = client.get('/api/liked?limit=5').get_json()
+
+    unrated = get_connection(catalog_db).execute('''
+        SELECT v.id FROM videos v LEFT JOIN preferences p ON p.video_id = v.id
+        WHERE p.video_id IS NULL LIMIT 1
+    ''').fetchone()[0]
+    save_video_rating_to_database(unrated, True, '', catalog_db)
+
+    second = client.get(f"/api/liked?limit=5&before={first['next_before']}").get_json()
+    assert [video['id'] for video in second['videos']] == expected[5:10]
+
+
+def test_pages_are_per_user(client, catalog_db):
+    video_id = _liked_ids_newest_first(catalog_db)[0]
+    client.post('/api/users/alice/rate', json={'video_id': video_id, 'liked': True})
+
+    body = client.get('/api/users/alice/liked').get_json()
+    assert [video['id'] for video in body['videos']] == [video_id]
+    assert body['total_liked'] == 1
+    assert body['next_before'] is None
@@ -0,0 +1,45 @@
+import sqlite3
+from backend.database.migrations import DEFAULT_USER_ID, MIGRATIONS, get_schema_version, run_migrations
+
+
+def _legacy_database(path):
+    """A database as the first release left it: base tables only, duplicate ratings allowed"""
+    conn = sqlite3.connect(path)
+    MIGRATIONS[0](conn)
+    conn.execute("PRAGMA user_version = 1")
+    conn.executemany("INSERT INTO videos (id, title) VALUES (?, ?)", [('a', 'A'), ('b', 'B')])
+    conn.executemany("INSERT INTO preferences (video_id, liked) VALUES (?, ?)",
+                     [('a', 1), ('b', 0), ('a', 0)])
+    conn.execute("INSERT INTO video_scores (video_id, model_generation, like_probability) VALUES ('b', 3, 0.25)")
+    conn.commit()
+    conn.close()
+
+
+def test_fresh_database_runs_every_migration(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    assert run_migrations(path) == len(MIGRATIONS)
+    assert get_schema_version(path) == len(MIGRATIONS)
+
+
+def test_legacy_database_is_upgraded_in_order(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    _legacy_database(path)
+
+    assert run_migrations(path) == len(MIGRATIONS) - 1
+    assert get_schema_version(path) == len(MIGRATIONS)
+
+    conn = sqlite3.connect(path)
+    # The latest rating per video wins, and existing data belongs to the default user
+    assert conn.execute("SELECT user_id, video_id, liked FROM preferences ORDER BY video_id").fetchall() == [
+        (DEFAULT_USER_ID, 'a', 0), (DEFAULT_USER_ID, 'b', 0)
+    ]
+    assert conn.execute("SELECT user_id, video_id, model_generation FROM video_scores").fetchall() == [
+        (DEFAULT_USER_ID, 'b', 3)
+    ]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'quota_usage', 'job_state', 'video_scores_staging'} <= tables
+    conn.close()
+
+
+def test_migrations_run_once_per_process(db_path):
+    assert run_migrations(db_path) == 0
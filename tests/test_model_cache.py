@@ -0,0 +1,85 @@
+import threading
+import time
+import pytest
+from backend.services import model_cache as model_cache_module
+from backend.services.model_cache import ModelCache
+
+
+@pytest.fixture(autouse=True)
+def fixed_model_size(monkeypatch):
+    # Plain objects stand in for models; every one counts as 100 bytes
+    monkeypatch.setattr(model_cache_module, 'estimate_model_bytes', lambda model: 100)
+
+
+def test_evicts_least_recently_used_past_the_model_count():
+    cache = ModelCache(max_models=2)
+    cache.put(('alice', 1), 'a1')
+    cache.put(('bob', 1), 'b1')
+    assert cache.get(('alice', 1), lambda: None) == 'a1'
+
+    cache.put(('carol', 1), 'c1')
+    assert cache.peek(('bob', 1)) is None
+    assert cache.peek(('alice', 1)) == 'a1'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_evicts_past_the_byte_budget_but_keeps_the_newest():
+    cache = ModelCache(max_models=10, max_bytes=250)
+    for user_id in ('alice', 'bob', 'carol'):
+        cache.put((user_id, 1), user_id)
+    assert len(cache) == 2
+    assert cache.stats()['bytes'] == 200
+
+    tiny = ModelCache(max_models=10, max_bytes=50)
+    tiny.put(('alice', 1), 'a1')
+    assert tiny.peek(('alice', 1)) == 'a1'
+
+
+def test_newer_generation_replaces_older_ones_without_counting_an_eviction():
+    cache = ModelCache(max_models=4)
+    cache.put(('alice', 1), 'a1')
+    assert cache.put(('alice', 2), 'a2')
+    assert cache.peek(('alice', 1)) is None
+    assert len(cache) == 1
+    assert cache.stats()['evictions'] == 0
+
+
+def test_late_load_of_an_older_generation_is_not_cached():
+    cache = ModelCache(max_models=4)
+    cache.put(('alice', 3), 'a3')
+    assert not cache.put(('alice', 2), 'a2')
+    assert cache.peek(('alice', 3)) == 'a3'
+    assert cache.peek(('alice', 2)) is None
+
+    # Unless it is the model being published
+    assert cache.put(('alice', 2), 'a2', replace=True)
+    assert cache.peek(('alice', 3)) is None
+    assert cache.peek(('alice', 2)) == 'a2'
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ModelCache(max_models=4)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(('alice', 1), loader)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.stats()['misses'] == 1
+
+
+def test_loader_without_a_model_caches_nothing():
+    cache = ModelCache(max_models=4)
+    assert cache.get(('alice', 1), lambda: None) is None
+    assert len(cache) == 0
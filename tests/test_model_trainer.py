@@ -0,0 +1,65 @@
+from backend.database.connection import get_connection
+from backend.database.preference_operations import save_video_rating_to_database
+from backend.services.model_cache import ModelCache
+from backend.services.model_trainer import BackgroundModelTrainer
+
+
+def _unrated_video_id(db_path):
+    return get_connection(db_path).execute('''
+        SELECT v.id FROM videos v LEFT JOIN preferences p ON p.video_id = v.id
+        WHERE p.video_id IS NULL LIMIT 1
+    ''').fetchone()[0]
+
+
+def test_rating_back_to_older_data_publishes_a_new_generation(catalog_db, model_dir):
+    cache = ModelCache(max_models=4)
+    trainer = BackgroundModelTrainer(catalog_db, model_dir=model_dir, model_cache=cache)
+    assert trainer.train_now()
+    video_id = _unrated_video_id(catalog_db)
+
+    generations = []
+    for liked in (True, False, True):
+        save_video_rating_to_database(video_id, liked, '', catalog_db)
+        assert trainer.train_now()
+        generations.append(trainer.snapshot.generation)
+
+    # The third fit reuses the first one's artifact but must still move forward
+    assert generations[0] < generations[1] < generations[2]
+    assert cache.peek(('default', generations[2])) is not None
+    assert cache.stats()['entries'] == 1
+
+    hits = cache.hits
+    model = trainer.get_model()
+    for _ in range(4):
+        assert trainer.get_model() is model
+    assert cache.hits == hits + 5
+
+
+def test_published_model_replaces_a_newer_cached_generation(catalog_db):
+    cache = ModelCache(max_models=4)
+    trainer = BackgroundModelTrainer(catalog_db, model_cache=cache)
+    assert trainer.train_now()
+    model = trainer.get_model()
+    cache.put(('default', trainer.snapshot.generation + 5), model)
+
+    trainer._publish(trainer.snapshot, model)
+    assert cache.peek(('default', trainer.snapshot.generation)) is model
+    assert len(cache) == 1
+
+
+def test_online_update_leaves_changed_labels_to_a_full_retrain(catalog_db):
+    trainer = BackgroundModelTrainer(catalog_db, model_type='online')
+    assert trainer.train_now()
+    video_id = _unrated_video_id(catalog_db)
+
+    save_video_rating_to_database(video_id, True, '', catalog_db)
+    assert trainer.update_online()
+    generation = trainer.snapshot.generation
+
+    save_video_rating_to_database(video_id, False, '', catalog_db)
+    assert not trainer.update_online()
+    assert trainer.snapshot.generation == generation
+
+    assert trainer.train_now()
+    assert trainer.snapshot.generation > generation
+    assert not trainer.is_stale()
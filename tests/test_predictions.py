@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from backend.ml.model_training import FEATURE_COLUMNS, as_model_input
+from backend.ml.predictions import (
+    predict_video_preferences_with_model,
+    score_feature_matrix_with_model,
+    score_videos_with_model
+)
+
+
+def _forest(labels):
+    X = np.random.default_rng(0).normal(size=(len(labels), len(FEATURE_COLUMNS)))
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(as_model_input(X), labels)
+
+
+@pytest.mark.parametrize('label, expected', [(1, 1.0), (0, 0.0)])
+def test_single_class_models_score_a_constant(label, expected):
+    model = _forest([label] * 12)
+    features = np.random.default_rng(1).normal(size=(4, len(FEATURE_COLUMNS)))
+    assert score_feature_matrix_with_model(model, features).tolist() == [expected] * 4
+
+    frame = pd.DataFrame(features, columns=FEATURE_COLUMNS).assign(
+        video_id=list('abcd'), id=list('abcd'), title='t', channel_name='c', view_count=1
+    )
+    assert [probability for _, probability in score_videos_with_model(model, frame)] == [expected] * 4
+    assert [video['like_probability'] for video in predict_video_preferences_with_model(model, frame)] == [expected] * 4
+
+
+def test_two_class_models_score_the_liked_column():
+    model = _forest([0, 1] * 6)
+    features = np.random.default_rng(1).normal(size=(4, len(FEATURE_COLUMNS)))
+    expected = model.predict_proba(as_model_input(features))[:, list(model.classes_).index(1)]
+    assert np.array_equal(score_feature_matrix_with_model(model, features), expected)
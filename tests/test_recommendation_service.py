@@ -0,0 +1,55 @@
+from backend.database.connection import get_connection
+from backend.services.recommendation_service import RecommendationService
+
+
+def _video_ids(db_path, count):
+    return [row[0] for row in get_connection(db_path).execute("SELECT id FROM videos LIMIT ?", (count,))]
+
+
+def test_users_without_ratings_get_no_trainer(catalog_db):
+    service = RecommendationService(catalog_db, retrain_quiet_period=3600)
+    try:
+        for index in range(20):
+            recommendations = service.get_recommendations(f'visitor{index}')
+            assert recommendations
+            assert not service.get_model_snapshot(f'visitor{index}').has_model
+            assert service.get_liked_videos(user_id=f'visitor{index}') == []
+        assert service.user_count == 1
+    finally:
+        service.stop()
+
+
+def test_trainer_registry_is_bounded(catalog_db):
+    service = RecommendationService(catalog_db, retrain_quiet_period=3600, max_trainers=2)
+    try:
+        video_id = _video_ids(catalog_db, 1)[0]
+        for user_id in ('alice', 'bob', 'carol'):
+            service.rate_video(video_id, True, user_id)
+        assert service.user_count == 2
+        assert list(service._trainers) == ['bob', 'carol']
+
+        # A dropped user gets a new trainer on their next request
+        service.get_recommendations('alice')
+        assert list(service._trainers) == ['carol', 'alice']
+    finally:
+        service.stop()
+
+
+def test_online_model_waits_for_both_classes(catalog_db):
+    conn = get_connection(catalog_db)
+    conn.execute("UPDATE preferences SET liked = 1")
+    conn.commit()
+
+    service = RecommendationService(catalog_db, retrain_quiet_period=3600, model_type='online')
+    try:
+        assert not service.get_model_snapshot().has_model
+        assert service.get_recommendations()
+
+        # Ratings still save, and the first dislike makes the model trainable
+        video_id = _video_ids(catalog_db, 300)[-1]
+        result = service.rate_video(video_id, False)
+        assert result['total_ratings'] == 41
+        service.get_trainer().train_now()
+        assert service.get_model_snapshot().has_model
+    finally:
+        service.stop()